@@ -5,7 +5,7 @@ import time
 import random
 import webbrowser
 from models.gpt_model import naturallanguagetoexpectation
-from models.falcon_model import get_expectations, load_peft_model
+from models.falcon_model import get_expectations, get_model, model_stats
 from helpers.utils import * 
 from connecting_data.database.postgresql import *
 from connecting_data.filesystem.pandas_filesystem import *
@@ -61,10 +61,13 @@ def perform_data_quality_checks(DQ_APP, key):
         submit_button = st.button("Submit", key=key.format(name='submit'))
         if submit_button:
             with st.spinner('Running your data quality checks'):
-                time.sleep(10)
                 try:
-                    model, tknizer = load_peft_model()
+                    # Loaded once per process, then shared across sessions
+                    model, tknizer = get_model()
                     nltoge = get_expectations(checks_input, model, tknizer)
+                    stats = model_stats()
+                    st.caption(f"Model loaded in {stats['load_seconds']:.1f}s ({stats['precision']} on {stats['device']}), "
+                               f"expectation generated in {stats['last_generation_seconds']:.2f}s")
                     st.write(nltoge)
                     expectation_result = DQ_APP.run_expectation(nltoge)
                     st.success('Your test has successfully been run! Get results')
@@ -1,25 +1,143 @@
+"""
+Finetuned Falcon-7B (QLoRA adapter) translating natural language to GE expectations.
+
+The model is loaded once per process and shared by every session. The first load
+merges the adapter into the base weights and saves the merged model as safetensors,
+so later starts load it directly and skip the merge.
+"""
 from transformers import AutoModelForCausalLM, AutoTokenizer
 from peft import PeftModel, PeftConfig
+from dotenv import load_dotenv, find_dotenv
+import glob
+import os
+import threading
+import time
 import torch
 
+load_dotenv(find_dotenv())
+
+BASE_MODEL_ID = "tiiuae/falcon-7b-instruct"
+PEFT_MODEL_ID = "DioulaD/falcon-7b-instruct-qlora-ge-dq-v2"
+# Merged weights are saved there after the first load
+MERGED_MODEL_DIR = os.environ.get("FALCON_MERGED_MODEL_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "uncommitted", "falcon-7b-ge-dq-merged")
+# "bfloat16" (default), "float32", or "int8" (dynamic int8 quantization of the linear layers, CPU only)
+FALCON_PRECISION = os.environ.get("FALCON_PRECISION") or "bfloat16"
+PRECISIONS = ["bfloat16", "float32", "int8"]
+
+_lock = threading.Lock()
+_model = None
+# Guards _stats, updated from concurrent request threads
+_stats_lock = threading.Lock()
+_stats = {
+    "precision": None,
+    "device": None,
+    "loaded_from": None,
+    "load_seconds": None,
+    "requests": 0,
+    "last_generation_seconds": None,
+    "total_generation_seconds": 0.0,
+}
+
+
+def get_device():
+  # If CUDA support is not available, encoding will silenty fail if cuda:0 is hardcoded
+  return 'cuda:0' if torch.cuda.is_available() else 'cpu'
+
+
+def has_merged_weights(merged_model_dir=MERGED_MODEL_DIR):
+  return (os.path.exists(os.path.join(merged_model_dir, "config.json"))
+          and bool(glob.glob(os.path.join(merged_model_dir, "*.safetensors"))))
 
-def load_peft_model():
-    peft_model_id = "DioulaD/falcon-7b-instruct-qlora-ge-dq-v2"    
+
+def merge_peft_model(merged_model_dir=MERGED_MODEL_DIR):
+  """
+  Apply the QLoRA adapter to the base model, merge it and save the merged weights as safetensors
+  """
+  model = AutoModelForCausalLM.from_pretrained(
+          BASE_MODEL_ID,
+          torch_dtype=torch.bfloat16,
+          device_map="auto",
+          trust_remote_code=True,
+      )
+  model = PeftModel.from_pretrained(model, PEFT_MODEL_ID)
+  model = model.merge_and_unload()
+
+  config = PeftConfig.from_pretrained(PEFT_MODEL_ID)
+  tknizer = AutoTokenizer.from_pretrained(config.base_model_name_or_path)
+  try:
+    os.makedirs(merged_model_dir, exist_ok=True)
+    model.save_pretrained(merged_model_dir, safe_serialization=True)
+    tknizer.save_pretrained(merged_model_dir)
+    print(f"Saved merged Falcon weights to {merged_model_dir}")
+  except Exception as e:
+    print(f"Unable to save the merged Falcon weights: {str(e)}")
+  return model, tknizer
+
+
+def load_peft_model(precision=FALCON_PRECISION, merged_model_dir=MERGED_MODEL_DIR):
+  """
+  Load the finetuned model, from the saved merged weights when available
+  Params:
+    precision : "bfloat16", "float32", or "int8" for dynamic quantization on CPU
+  Returns:
+    (model, tokenizer)
+  """
+  if precision not in PRECISIONS:
+    raise ValueError(f"Unknown precision: {precision}")
+  device = get_device()
+  start = time.perf_counter()
+  if has_merged_weights(merged_model_dir):
+    loaded_from = merged_model_dir
     model = AutoModelForCausalLM.from_pretrained(
-            "tiiuae/falcon-7b-instruct",
-            torch_dtype=torch.bfloat16,
-            device_map="auto",
+            merged_model_dir,
+            torch_dtype=torch.float32 if precision != "bfloat16" else torch.bfloat16,
+            device_map="auto" if device != 'cpu' else None,
             trust_remote_code=True,
+            use_safetensors=True,
         )
-    model = PeftModel.from_pretrained(model, peft_model_id)
-    model = model.merge_and_unload()
+    tknizer = AutoTokenizer.from_pretrained(merged_model_dir)
+  else:
+    loaded_from = f"{BASE_MODEL_ID} + {PEFT_MODEL_ID}"
+    model, tknizer = merge_peft_model(merged_model_dir)
+    if precision != "bfloat16":
+      model = model.float()
+  if precision == "int8" and device == 'cpu':
+    # Dynamic quantization: int8 weights, activations quantized on the fly
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+  model.eval()
+  tknizer.pad_token = tknizer.eos_token
 
-    config = PeftConfig.from_pretrained(peft_model_id)
+  load_seconds = time.perf_counter() - start
+  with _stats_lock:
+    _stats.update({"precision": precision, "device": device, "loaded_from": loaded_from,
+                   "load_seconds": load_seconds})
+  print(f"Loaded Falcon model ({precision} on {device}) from {loaded_from} in {load_seconds:.1f}s")
+  return model, tknizer
 
-    tknizer = AutoTokenizer.from_pretrained(config.base_model_name_or_path)
-    tknizer.pad_token = tknizer.eos_token
-    return model, tknizer
 
+def get_model(precision=FALCON_PRECISION):
+  """
+  Process-wide model and tokenizer, loaded on first use and shared across sessions
+  """
+  global _model
+  with _lock:
+    with _stats_lock:
+      loaded_precision = _stats["precision"]
+    if _model is None or loaded_precision != precision:
+      _model = load_peft_model(precision)
+    return _model
+
+
+def model_stats():
+  """
+  Load time and generation latency of the resident model
+  """
+  with _stats_lock:
+    stats = dict(_stats)
+  stats["average_generation_seconds"] = (stats["total_generation_seconds"] / stats["requests"]
+                                         if stats["requests"] else None)
+  return stats
 
 
 def get_expectations(prompt, model, tknizer):
@@ -31,12 +149,9 @@ def get_expectations(prompt, model, tknizer):
     tknizer = Tokenizer from peft model
   """
   try:
-    # If CUDA support is not available, encoding will silenty fail if cuda:0 is hardcoded
-    if torch.cuda.is_available():
-      device = 'cuda:0'
-    else:
-      device = 'cpu'
-    
+    device = get_device()
+    start = time.perf_counter()
+
     encoding = tknizer(prompt, return_tensors="pt").to(device)
 
     with torch.inference_mode():
@@ -48,6 +163,13 @@ def get_expectations(prompt, model, tknizer):
           top_k=0
       )
     response = tknizer.decode(out[0], skip_special_tokens=True)
+
+    generation_seconds = time.perf_counter() - start
+    with _stats_lock:
+      _stats["requests"] += 1
+      _stats["last_generation_seconds"] = generation_seconds
+      _stats["total_generation_seconds"] += generation_seconds
+    print(f"Falcon generated {out.shape[-1] - encoding.input_ids.shape[-1]} tokens in {generation_seconds:.2f}s")
     return response.split("\n")[1]
 
   except Exception as e:
@@ -4,13 +4,23 @@ import pandas as pd
 import time
 import random
 import webbrowser
-import ollama
 import json
 import os
-import re
+import functools
 from helpers.utils import * 
 from connecting_data.database.postgresql import *
+from connecting_data.database.engine import pool_stats
 from connecting_data.filesystem.pandas_filesystem import *
+from helpers.expectation_results import as_result_dict
+from helpers.column_profiles import PROFILE_STORE
+from helpers.docs_builder import DOCS_BUILDER
+from helpers.ge_context import CONTEXT_LOCK
+from helpers.expectation_signatures import VALID_EXPECTATION_TYPES, expectation_json_schema, validate_expectation
+from models.ollama_model import cached_chat_completion, match_expectations, parse_expectation, parse_expectations
+from models.backends import LLM_ROUTER, BackendError
+from models.prompts import schema_context, with_examples
+from models.llm_cache import LLM_CACHE
+from models.rule_parser import parse_check, split_checks
 from streamlit_extras.dataframe_explorer import dataframe_explorer
 from streamlit_extras.no_default_selectbox import selectbox
 
@@ -21,47 +31,36 @@ def local_css(file_name):
 def remote_css(url):
     st.markdown(f'<link href="{url}" rel="stylesheet">', unsafe_allow_html=True)
 
-# Define valid Great Expectations expectation types for validation
-VALID_EXPECTATION_TYPES = [
-    # Column expectations
-    "expect_column_values_to_be_null",
-    "expect_column_values_to_not_be_null",
-    "expect_column_values_to_be_in_set",
-    "expect_column_values_to_not_be_in_set",
-    "expect_column_values_to_be_between",
-    "expect_column_values_to_be_increasing",
-    "expect_column_values_to_be_decreasing",
-    "expect_column_values_to_match_regex",
-    "expect_column_values_to_match_regex_list",
-    "expect_column_values_to_match_strftime_format",
-    "expect_column_values_to_be_dateutil_parseable",
-    "expect_column_values_to_be_json_parseable",
-    "expect_column_values_to_match_json_schema",
-    "expect_column_distinct_values_to_be_in_set",
-    "expect_column_distinct_values_to_contain_set",
-    "expect_column_distinct_values_to_equal_set",
-    "expect_column_mean_to_be_between",
-    "expect_column_median_to_be_between",
-    "expect_column_quantile_values_to_be_between",
-    "expect_column_stdev_to_be_between",
-    "expect_column_unique_value_count_to_be_between",
-    "expect_column_proportion_of_unique_values_to_be_between",
-    "expect_column_most_common_value_to_be_in_set",
-    "expect_column_sum_to_be_between",
-    "expect_column_min_to_be_between",
-    "expect_column_max_to_be_between",
-    "expect_column_value_lengths_to_be_between",
-    "expect_column_value_lengths_to_equal",
-    "expect_column_values_to_be_unique",
-    "expect_column_values_to_not_be_null",
-    # Table expectations
-    "expect_table_row_count_to_be_between",
-    "expect_table_row_count_to_equal",
-    "expect_table_column_count_to_be_between",
-    "expect_table_column_count_to_equal",
-    "expect_table_columns_to_match_ordered_list",
-    "expect_table_columns_to_match_set"
-]
+def expectation_error(element, columns=None):
+    """
+    Reason why a translated element cannot be run, None when it is valid.
+    Checked against the expectation signatures and the dataset columns, before any GE work.
+    """
+    if isinstance(element, dict) and element.get('expectation_type') not in VALID_EXPECTATION_TYPES:
+        return f"Invalid expectation type: {element.get('expectation_type')}"
+    errors = validate_expectation(element, columns)
+    return "; ".join(errors) if errors else None
+
+
+def is_valid_expectation_response(content, columns=None):
+    """
+    Only cache responses that parse to a runnable expectation
+    """
+    try:
+        return expectation_error(parse_expectation(content), columns) is None
+    except json.JSONDecodeError:
+        return False
+
+
+def is_valid_expectations_response(content, columns=None):
+    """
+    Only cache multi-check responses whose elements are all valid expectations
+    """
+    try:
+        elements = parse_expectations(content)
+    except json.JSONDecodeError:
+        return False
+    return bool(elements) and all(expectation_error(element, columns) is None for element in elements)
 
 # Use the absolute path to the data directory
 local_filesystem_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/')
@@ -129,6 +128,13 @@ def display_test_result(result_dict):
         st.success(f"✅ Test Passed: {result_type}")
     else:
         st.error(f"❌ Test Failed: {result_type}")
+    if result_dict.get('result', {}).get('inconclusive'):
+        st.warning(f"⚠️ Inconclusive: the estimate is too close to the threshold, the true value is within "
+                   f"{result_dict['result'].get('observed_value_bounds')}. Validate with an exact engine to decide.")
+    progressive = result_dict.get('result', {}).get('details', {}).get('progressive', {})
+    if progressive.get('decision') in ("definitive", "statistical"):
+        st.info(f"Decided ({progressive['decision']}) on a {progressive['sample_fraction']:.0%} sample of "
+                f"{progressive['sampled_rows']:,} rows, the counts below are those of the sample.")
     
     # Create tabs for different sections of the results
     test_params, result_details, errors = st.tabs(["Test Parameters", "Result Details", "Errors"])
@@ -165,6 +171,95 @@ def display_test_result(result_dict):
         else:
             st.write("No errors reported.")
 
+def routed_generate(handled_by, is_valid):
+    """
+    Generation callback of cached_chat_completion going through the LLM backend router.
+    The name of the backend which answered is appended to handled_by, its model is
+    returned with the content so that fallback answers are not cached as the primary's.
+    """
+    def generate(system_prompt, user_text, openers, response_format):
+        content, backend = LLM_ROUTER.generate(system_prompt, user_text, openers, is_valid=is_valid,
+                                               response_format=response_format)
+        handled_by.append(backend)
+        return content, LLM_ROUTER.model_of(backend)
+    return generate
+
+def perform_multiple_checks(DQ_APP, checks_input):
+    """
+    Translate a list of checks (one per line) and run the valid ones together as a suite.
+    Checks the rule-based parser recognizes skip the LLM; the others are translated by
+    Ollama in a single call returning a JSON array. Invalid elements are reported one by one.
+    Params:
+        DQ_APP (object) : Instanciated class for data quality checks
+        checks_input (str) : Checks described by the user, one per line
+    """
+    checks = split_checks(checks_input)
+    schema, _ = schema_context(DQ_APP)
+    translations = {}
+    llm_checks = []
+    for index, check in enumerate(checks):
+        expectation_json = parse_check(check, schema)
+        if expectation_json is not None:
+            translations[index] = (expectation_json, "rule-based parser")
+        else:
+            llm_checks.append(index)
+
+    if llm_checks:
+        start = time.perf_counter()
+        ollama_response_content = None
+        try:
+            llm_input = "\n".join(checks[index] for index in llm_checks)
+            is_valid = functools.partial(is_valid_expectations_response, columns=list(schema))
+            _, system_prompt = schema_context(DQ_APP, multi_check=True)
+            system_prompt = with_examples(system_prompt, llm_input, multi_check=True)
+            handled_by = []
+            ollama_response_content, cache_hit = cached_chat_completion(
+                system_prompt, llm_input, schema,
+                model=LLM_ROUTER.model, is_valid=is_valid, openers="[{", generate=routed_generate(handled_by, is_valid),
+                response_format=expectation_json_schema(VALID_EXPECTATION_TYPES, schema, multi_check=True))
+            path = "LLM response cache" if cache_hit else f"{handled_by[0]} backend"
+            st.caption(f"{len(llm_checks)} checks translated by the {path} in one call "
+                       f"({time.perf_counter() - start:.2f} s)")
+            elements = parse_expectations(ollama_response_content)
+            if len(elements) != len(llm_checks):
+                st.warning(f"Ollama returned {len(elements)} expectations for {len(llm_checks)} checks, "
+                           "they are matched to the checks by column.")
+            matched = match_expectations([checks[index] for index in llm_checks], elements, list(schema))
+            for index, element in zip(llm_checks, matched):
+                translations[index] = (element, path)
+        except json.JSONDecodeError as json_err:
+            st.error(f"Error parsing JSON response from Ollama: {json_err}")
+            st.text_area("Ollama Response (raw):", ollama_response_content, height=150)
+        except BackendError as backend_err:
+            st.error(f"Error communicating with the LLM backends: {backend_err}. Is Ollama running and the model '{LLM_ROUTER.model}' pulled?")
+
+    valid = []
+    for index, check in enumerate(checks):
+        expectation_json, path = translations.get(index, (None, None))
+        if expectation_json is None:
+            error = "No expectation was generated for this check"
+        else:
+            error = expectation_error(expectation_json, list(schema))
+        if error is not None:
+            st.error(f"Check {index + 1} skipped: '{check}'. {error}")
+        else:
+            valid.append((check, expectation_json, path))
+
+    if not valid:
+        st.warning(f"None of the {len(checks)} checks could be translated into a valid expectation.")
+        return
+    with st.expander(f"Generated Expectations ({len(valid)} of {len(checks)} checks)"):
+        for check, expectation_json, path in valid:
+            st.caption(f"{check} (handled by the {path})")
+            st.json(expectation_json)
+
+    runs = DQ_APP.run_expectations([expectation_json for _, expectation_json, _ in valid])
+    passed = sum(1 for run in runs if as_result_dict(run["result"]).get('success'))
+    st.success(f'{len(runs)} tests have been run as one suite, {passed} passed. See results below.')
+    for (check, _, _), run in zip(valid, runs):
+        with st.expander(f"Results: {check}"):
+            display_test_result(as_result_dict(run["result"]))
+
 def perform_data_quality_checks(DQ_APP, key):
     """
     Function to perform data quality checks using Ollama
@@ -176,131 +271,84 @@ def perform_data_quality_checks(DQ_APP, key):
     
     checks_input = st.text_area("Describe the checks you want to perform", key=key.format(name='check_input'),
                                 placeholder="Example: 'Column price should be between 0 and 2000.' or 'Column status must be one of [COMPLETED, PENDING, SHIPPED]'. Ensure column names match the data.")
+    multi_check = st.checkbox("Multiple checks (one per line)", key=key.format(name='multi_check'),
+                              help="Translate every line in one request and run the valid checks together as a suite.")
 
     if checks_input:
         submit_button = st.button("Submit", key=key.format(name='submit'))
         if submit_button:
             with st.spinner('Generating expectation and running checks with Ollama...'):
-                try:
-                    # --- Ollama Integration ---
-                    system_prompt = ("""You are an expert in Great Expectations. Your task is to convert the user's natural language description of a data quality check into a single Great Expectations Expectation JSON object. 
-
-ONLY output the JSON object, nothing else. The JSON should be compatible with the Great Expectations `run_expectation` method. Focus on creating ONE expectation per request.
-
-IMPORTANT JSON formatting:
-- Use valid JSON format with double quotes for strings and property names
-- For missing or unlimited values, use 'null' (not None, undefined, or empty string)
-- For example: {"max_value": null} not {"max_value": None}
-
-IMPORTANT Regex Guidelines:
-- Use expect_column_values_to_match_regex only for text pattern matching
-- For numeric columns, use expect_column_values_to_be_between or other numeric expectations
-- Regex patterns must be valid PostgreSQL regular expressions
-
-Available tables and their columns:
-1. PostgreSQL Tables:
-   - customers: customer_id (int), first_name (text), last_name (text), email (text), phone (text), address (text), created_at (timestamp), updated_at (timestamp)
-   - products: product_id (int), name (text), description (text), price (decimal), stock_quantity (int), created_at (timestamp), updated_at (timestamp)
-   - orders: order_id (int), customer_id (int), order_date (timestamp), total_amount (decimal), status (text), created_at (timestamp), updated_at (timestamp)
-   - order_items: order_item_id (int), order_id (int), product_id (int), quantity (int), unit_price (decimal), created_at (timestamp), updated_at (timestamp)
-
-2. CSV Files:
-   - Housing: id (int), address (text), city (text), state (text), zip (text), price (int), bedrooms (int), bathrooms (float), sqft (int), year_built (int), property_type (text)
-   - SupermarketSales: [sales data]
-   - Users: [user data]
-
-IMPORTANT: Use ONLY these valid expectation types:
-- expect_column_values_to_be_between
-- expect_column_values_to_be_in_set
-- expect_column_values_to_not_be_null
-- expect_column_values_to_be_null
-- expect_column_values_to_be_unique
-- expect_column_values_to_match_regex (use only for text columns)
-- expect_table_row_count_to_be_between
-- expect_column_mean_to_be_between
-- expect_column_min_to_be_between
-- expect_column_max_to_be_between
-- expect_column_sum_to_be_between
-- expect_column_proportion_of_unique_values_to_be_between
-
-Example user input: 'Column price should be between 0 and 2000000.'
-Example JSON output: {"expectation_type": "expect_column_values_to_be_between", "kwargs": {"column": "price", "min_value": 0, "max_value": 2000000}}
-
-Example user input: 'Column price should be greater than 0.'
-Example JSON output: {"expectation_type": "expect_column_values_to_be_between", "kwargs": {"column": "price", "min_value": 0, "max_value": null}}
-
-Example user input: 'Column status must be one of [COMPLETED, PENDING, SHIPPED]'
-Example JSON output: {"expectation_type": "expect_column_values_to_be_in_set", "kwargs": {"column": "status", "value_set": ["COMPLETED", "PENDING", "SHIPPED"]}}
-
-Example user input: 'Column email should match email format'
-Example JSON output: {"expectation_type": "expect_column_values_to_match_regex", "kwargs": {"column": "email", "regex": "^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\\.[a-zA-Z]{2,}$"}}
-
-Make sure to format the JSON correctly and use the exact expectation names as listed above.""")
-
-                    response = ollama.chat(
-                        model='phi4-mini', # Using phi4-mini as requested
-                        messages=[
-                            {'role': 'system', 'content': system_prompt},
-                            {'role': 'user', 'content': checks_input}
-                        ]
-                    )
-
-                    ollama_response_content = response['message']['content'].strip()
-                    
-                    # Attempt to find JSON within potential markdown code blocks
-                    if ollama_response_content.startswith("```json"):
-                        ollama_response_content = ollama_response_content[7:]
-                    elif ollama_response_content.startswith("```"):
-                        ollama_response_content = ollama_response_content[3:]
-                    
-                    if ollama_response_content.endswith("```"):
-                        ollama_response_content = ollama_response_content[:-3]
-                    
-                    # Clean up the response to ensure it's valid JSON
-                    ollama_response_content = ollama_response_content.strip()
-                    
-                    # Fix Python None -> JSON null conversion
-                    ollama_response_content = ollama_response_content.replace(": None", ": null")
-                    ollama_response_content = ollama_response_content.replace(":None", ":null")
-                    
-                    # Debug the raw response
-                    st.write("Raw Ollama Response:")
-                    st.code(ollama_response_content, language='json')
-                    
+                if multi_check:
                     try:
-                        # Parse the JSON response
-                        expectation_json = json.loads(ollama_response_content)
-                    except json.JSONDecodeError:
-                        # Try a different approach - extract JSON using regex
-                        json_pattern = r'\{.*\}'
-                        match = re.search(json_pattern, ollama_response_content, re.DOTALL)
-                        if match:
-                            json_str = match.group(0)
-                            expectation_json = json.loads(json_str)
+                        perform_multiple_checks(DQ_APP, checks_input)
+                    except Exception as e:
+                        st.error(f"An unexpected error occurred: {e}")
+                    return
+                try:
+                    ollama_response_content = None
+                    # Schema and schema-aware prompt of the selected source, cached per dataset version
+                    schema, system_prompt = schema_context(DQ_APP)
+                    # --- Rule-based fast path for the common phrasings ---
+                    start = time.perf_counter()
+                    expectation_json = parse_check(checks_input, schema)
+                    if expectation_json is not None:
+                        st.caption(f"Handled by the rule-based parser in {(time.perf_counter() - start) * 1e6:.0f} µs")
+                    else:
+                        # --- Ollama Integration ---
+                        # The few-shot examples closest to the request complete the prompt
+                        system_prompt = with_examples(system_prompt, checks_input)
+                        # Translations are cached per request text, table schema, model and prompt
+                        # Output constrained to the expectation signatures and the dataset columns
+                        handled_by = []
+                        is_valid = functools.partial(is_valid_expectation_response, columns=list(schema))
+                        ollama_response_content, cache_hit = cached_chat_completion(
+                            system_prompt, checks_input, schema,
+                            model=LLM_ROUTER.model, is_valid=is_valid, generate=routed_generate(handled_by, is_valid),
+                            response_format=expectation_json_schema(VALID_EXPECTATION_TYPES, schema))
+                        if cache_hit:
+                            st.caption("Handled by the LLM response cache")
                         else:
-                            raise
+                            st.caption(f"Handled by the {handled_by[0]} backend in {time.perf_counter() - start:.2f} s")
+                        
+                        # Debug the raw response
+                        st.write("Raw Ollama Response:")
+                        st.code(ollama_response_content, language='json')
+                        
+                        # Parse the JSON response
+                        expectation_json = parse_expectation(ollama_response_content)
                     
-                    # Validate that the expectation type is valid
+                    # Validate the expectation type, kwargs and column before touching the data
                     expectation_type = expectation_json.get('expectation_type')
                     if expectation_type not in VALID_EXPECTATION_TYPES:
                         st.error(f"Invalid expectation type: {expectation_type}")
                         st.warning(f"Please use one of the valid expectation types: {', '.join(VALID_EXPECTATION_TYPES[:5])}...")
                         return
+                    errors = validate_expectation(expectation_json, list(schema))
+                    if errors:
+                        st.json(expectation_json)
+                        for error in errors:
+                            st.error(error)
+                        return
 
                     st.write("Generated Expectation:")
                     st.json(expectation_json) # Show the generated JSON
 
+                    start = time.perf_counter()
                     expectation_result = DQ_APP.run_expectation(expectation_json)
                     st.success('Your test has successfully been run! See results below.')
+                    profile = as_result_dict(expectation_result).get('meta', {}).get('column_profile')
+                    validated_by = (f"the column profile computed at {profile['computed_at']}" if profile
+                                    else f"the {DQ_APP.validation_engine} engine")
+                    st.caption(f"Validated by {validated_by} in {(time.perf_counter() - start) * 1000:.0f} ms")
                     with st.expander("Show Results"):
                         st.subheader("Data Quality result")
-                        display_test_result(expectation_result.to_json_dict())
+                        display_test_result(as_result_dict(expectation_result))
                 
                 except json.JSONDecodeError as json_err:
                      st.error(f"Error parsing JSON response from Ollama: {json_err}")
                      st.text_area("Ollama Response (raw):", ollama_response_content, height=150)
-                except ollama.ResponseError as ollama_err:
-                    st.error(f"Error communicating with Ollama: {ollama_err}. Is Ollama running and the model 'phi4-mini' pulled?")
+                except BackendError as backend_err:
+                    st.error(f"Error communicating with the LLM backends: {backend_err}. Is Ollama running and the model '{LLM_ROUTER.model}' pulled?")
                 except Exception as e:
                     st.error(f"An unexpected error occurred: {e}")
                     st.warning("This might happen if the generated expectation is invalid for the data, the column name is misspelled, or Ollama didn't produce valid JSON.")
@@ -312,11 +360,21 @@ def open_data_docs(DQ_APP, key):
         DQ_APP (object) : Instanciated class for data quality checks
                           (Data sources : PostgreSQL, Filesystem, etc.)
     """
+    docs_status = DOCS_BUILDER.status()
+    if docs_status["building"]:
+        st.info(f"Data docs building… ({docs_status['pending_pages']} new pages queued). "
+                f"The site shows the last completed build.", icon="⏳")
+    elif docs_status["last_build_finished"]:
+        st.caption(f"Data docs last built at {docs_status['last_build_finished']} "
+                   f"in {docs_status['last_build_seconds']:.1f}s")
+    if docs_status["last_error"]:
+        st.warning(f"Last data docs build failed: {docs_status['last_error']}", icon="⚠️")
 
     open_docs_button = st.button("Open Data Docs", key=key.format(name='data_docs'))
     if open_docs_button:
         try:
-            data_docs_url = DQ_APP.context.get_docs_sites_urls()[0]['site_url']
+            with CONTEXT_LOCK:
+                data_docs_url = DQ_APP.context.get_docs_sites_urls()[0]['site_url']
             st.write(data_docs_url)
             webbrowser.open_new_tab(data_docs_url)
         except:
@@ -388,34 +446,88 @@ def main():
 
         if data_source:
             key = "filesystem_{name}"
+            engines = {"Native (vectorized)": "native",
+                       "Parallel (process pool)": "parallel",
+                       "Great Expectations": "great_expectations",
+                       "Streaming (large files)": "chunked",
+                       "Approximate (sketches)": "approximate",
+                       "Progressive (samples)": "progressive"}
+            engine = st.radio("Validation engine", list(engines), horizontal=True, key=key.format(name='engine'),
+                              help="Native evaluates the checks directly on the loaded data and stores them with "
+                                   "Great Expectations in the background, Parallel does the same on a pool of worker "
+                                   "processes by splitting the checks by column and the rows into partitions "
+                                   "(data under PARALLEL_MIN_ROWS rows is validated in-process). Streaming validates the whole file in "
+                                   "bounded chunks, only the first rows are loaded for the preview. Approximate "
+                                   "streams the file too and estimates distinct counts and quantiles with sketches. "
+                                   "Progressive decides row-level checks on growing random samples of the file.")
+            exact_results = engines[engine] == "progressive" and st.checkbox(
+                "Confirm passes with a full pass", key=key.format(name='exact_results'),
+                help="Failures are reported as soon as a sample shows them, passes are confirmed on every row.")
             # Display a preview of the data
             st.subheader("Preview of the data:")
-            data = read_local_filesystem_tb(local_filesystem_path, data_source, mapping)
-            display_data_preview(data)
-
-            DQ_APP = PandasFilesystemDatasource(data_source, data)
+            if engines[engine] in ("chunked", "approximate", "progressive"):
+                data = read_local_filesystem_preview(local_filesystem_path, data_source, mapping)
+                display_data_preview(data)
+                DQ_APP = PandasFilesystemDatasource(data_source, data,
+                                                    file_path=local_file_path(local_filesystem_path, data_source, mapping),
+                                                    validation_engine=engines[engine], exact_results=exact_results)
+            else:
+                data, memory = read_local_filesystem_typed(local_filesystem_path, data_source, mapping)
+                if memory:
+                    st.caption(f"Loaded {memory['rows']:,} rows with compact dtypes: "
+                               f"{memory['default_bytes'] / 1024 ** 2:.2f} MB → {memory['typed_bytes'] / 1024 ** 2:.2f} MB in memory")
+                display_data_preview(data)
+                DQ_APP = PandasFilesystemDatasource(data_source, data,
+                                                    file_path=local_file_path(local_filesystem_path, data_source, mapping),
+                                                    validation_engine=engines[engine], persist_mode="single_pass")
             perform_data_quality_checks(DQ_APP, key)
             next_steps(DQ_APP, data_owners, data_source, key)
 
     with t2:
         try:
-            data_owners = postgresql_data_owners()
             tables = get_pg_tables()
+            data_owners = postgresql_data_owners(tables)
             data_source = selectbox("Select PostgreSQL table", tables)
             if data_source:
                 key = "postgresql_{name}"
-                # Display a preview of the data
+                engines = {"Great Expectations": "great_expectations",
+                           "Streaming (server-side cursor)": "chunked",
+                           "SQL pushdown (aggregate query)": "pushdown",
+                           "Approximate (sketches)": "approximate",
+                           "Progressive (TABLESAMPLE)": "progressive"}
+                engine = st.radio("Validation engine", list(engines), horizontal=True, key=key.format(name='engine'),
+                                  help="Streaming, SQL pushdown and Approximate validate the whole table without "
+                                       "loading it in the app. Approximate estimates distinct counts and quantiles "
+                                       "with sketches. Progressive decides row-level checks on growing samples.")
+                exact_results = engines[engine] == "progressive" and st.checkbox(
+                    "Confirm passes with a full pass", key=key.format(name='exact_results'),
+                    help="Failures are reported as soon as a sample shows them, passes are confirmed on every row.")
+                # Display a bounded page of the data
                 st.subheader("Preview of the data:")
-                data = read_pg_tables(data_source)
+                page = st.number_input(f"Preview page ({PREVIEW_PAGE_SIZE:,} rows per page)", min_value=1, value=1, step=1,
+                                       key=key.format(name='preview_page'))
+                page_keys = session_state.setdefault(key.format(name=f'page_keys_{data_source}'), {})
+                data = read_pg_page(data_source, page=page - 1, page_keys=page_keys)
                 display_data_preview(data)
         
-                DQ_APP = PostgreSQLDatasource('gdpr_fines', data_source)
+                DQ_APP = PostgreSQLDatasource('gdpr_fines', data_source,
+                                              validation_engine=engines[engine], persist_mode="single_pass",
+                                              exact_results=exact_results)
                 perform_data_quality_checks(DQ_APP, key)
                 next_steps(DQ_APP, data_owners, data_source, key)
+            with st.sidebar.expander("Database connection pool"):
+                st.json(pool_stats())
         except:
             st.warning('Unable to connect to Postgresql. Please verify that you have added your connection string in .env file', icon="⚠️")
             Exception("PostgreSQL Connection error")
 
+    with st.sidebar.expander("LLM response cache"):
+        st.json(LLM_CACHE.stats())
+    with st.sidebar.expander("LLM backends"):
+        st.json(LLM_ROUTER.stats())
+    with st.sidebar.expander("Column profiles"):
+        st.json(PROFILE_STORE.stats())
+
  
 local_css("ui/front.css")
 remote_css('https://fonts.googleapis.com/icon?family=Material+Icons')
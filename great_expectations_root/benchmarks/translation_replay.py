@@ -0,0 +1,362 @@
+"""
+Offline replay benchmark of the natural language to expectation pipeline.
+
+Replays recorded prompts through the same steps as the app: rule-based fast path,
+schema-aware prompt with retrieved examples, LLM call through the backend router,
+JSON extraction and validation against VALID_EXPECTATION_TYPES. The LLM is an
+in-process stub, so the benchmark runs without network:
+    - by default the stub answers with recorded responses (record them once against a
+      live Ollama with --record, which also stores the token counts Ollama reports);
+    - with --oracle the stub answers with the expected expectation, which measures the
+      pipeline overhead around the model only: accuracy is not reported.
+
+Datasets are .json lists or .jsonl files of {"prompt", "completion"} records, or of
+{"request_id", "title", "body"} requests (unlabelled, the body is the prompt).
+
+The JSON report (latency percentiles, token counts, parse failure rate, exact match
+accuracy) is meant to be diffed between releases.
+
+Usage, from the great_expectations_root directory:
+    python -m benchmarks.translation_replay --record
+    python -m benchmarks.translation_replay --output uncommitted/translation_benchmark.json
+"""
+import argparse
+import datetime
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+from helpers.expectation_results import normalize_expectation
+from helpers.expectation_signatures import VALID_EXPECTATION_TYPES, expectation_json_schema, validate_expectation
+from models.backends import BackendRouter, FakeBackend
+from models.fewshot import ROOT_DIR, TRAIN_PATH
+from models.ollama_model import OLLAMA_MODEL, chat_completion, parse_expectation
+from models.prompts import build_system_prompt, with_examples
+from models.rule_parser import parse_check
+
+# Failures listed in the report
+MAX_REPORTED_FAILURES = 25
+# Responses recorded with --record, replayed by default
+DEFAULT_RECORDINGS_PATH = os.path.join(ROOT_DIR, "uncommitted", "translation_recordings.json")
+
+
+def load_cases(paths, limit=None):
+    """
+    Benchmark cases from .json lists or .jsonl files of {"prompt", "completion"} records.
+    The completion (expected expectation) is optional, "text" and the "body" of
+    {"request_id", "title", "body"} requests are accepted for the prompt. Each case
+    carries the schema of its dataset (see dataset_schema).
+    """
+    cases = []
+    for path in paths:
+        with open(path) as f:
+            records = json.load(f) if path.endswith(".json") else [json.loads(line) for line in f if line.strip()]
+        dataset_cases = []
+        for record in records:
+            prompt = record.get("prompt") or record.get("text") or record.get("body")
+            if not prompt:
+                continue
+            expected = record.get("completion") or record.get("expected")
+            try:
+                expected_type, expected_kwargs = normalize_expectation(expected) if expected else (None, None)
+            except ValueError:
+                expected_type, expected_kwargs = None, None
+            source = os.path.basename(path)
+            if record.get("request_id"):
+                source = f"{source}:{record['request_id']}"
+            dataset_cases.append({"source": source, "prompt": prompt.strip(),
+                                  "expected": {"expectation_type": expected_type, "kwargs": expected_kwargs}
+                                  if expected_type else None})
+        schema = dataset_schema(dataset_cases)
+        cases += [{**case, "schema": schema} for case in dataset_cases]
+    return cases[:limit] if limit else cases
+
+
+def expected_columns(case):
+    """
+    Columns referenced by the expected expectation of a case
+    """
+    kwargs = (case["expected"] or {}).get("kwargs") or {}
+    columns = [kwargs[name] for name in ("column", "column_A", "column_B") if isinstance(kwargs.get(name), str)]
+    columns += [column for column in kwargs.get("column_list") or [] if isinstance(column, str)]
+    return columns
+
+
+def dataset_schema(cases):
+    """
+    Schema of a replayed dataset: the union of the columns of all its expected
+    expectations. The same schema is given for every case of the dataset, so it does
+    not tell the model which column the expected answer uses, as in the app where the
+    prompt lists every column of the table.
+    """
+    return {column: "object" for case in cases for column in expected_columns(case)}
+
+
+def count_tokens(text):
+    """
+    Approximate token count (words and punctuation), used when Ollama counts were not
+    recorded
+    """
+    return len(re.findall(r"\w+|[^\w\s]", text or ""))
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def same_value(a, b):
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)) and not isinstance(a, bool):
+        return abs(a - b) <= 1e-9 * max(1.0, abs(a), abs(b))
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(same_value(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def exact_match(expectation, expected):
+    """
+    Same expectation type and kwargs, None kwargs being the same as absent ones
+    """
+    kwargs = {key: value for key, value in (expectation.get("kwargs") or {}).items() if value is not None}
+    expected_kwargs = {key: value for key, value in expected["kwargs"].items() if value is not None}
+    return (expectation.get("expectation_type") == expected["expectation_type"]
+            and kwargs.keys() == expected_kwargs.keys()
+            and all(same_value(kwargs[key], expected_kwargs[key]) for key in kwargs))
+
+
+def replay_prompt(case, schema):
+    """
+    System prompt of a case, leaving the case itself out of the retrieved examples
+    """
+    return with_examples(build_system_prompt("replay", schema), case["prompt"], exclude_prompts={case["prompt"]})
+
+
+def oracle_response(cases):
+    """
+    Stub answering each prompt with its expected expectation
+    """
+    responses = {case["prompt"]: json.dumps(case["expected"]) for case in cases if case["expected"]}
+    return lambda user_text: responses.get(user_text, "I cannot translate this check.")
+
+
+def run_case(case, router, use_fast_path=True, constrained=True, usage=None):
+    """
+    Translate one case through the pipeline
+    Params:
+        usage (dict) : Prompt -> token counts recorded from Ollama
+    Returns:
+        dict : Measures and outcome of the case
+    """
+    schema = case["schema"]
+    start = time.perf_counter()
+    expectation = parse_check(case["prompt"], schema) if use_fast_path and schema else None
+    measure = {"prompt": case["prompt"], "source": case["source"], "path": "rule", "prompt_tokens": 0,
+               "completion_tokens": 0, "response": None}
+    if expectation is None:
+        measure["path"] = "llm"
+        system_prompt = replay_prompt(case, schema)
+        response_format = expectation_json_schema(VALID_EXPECTATION_TYPES, schema) if constrained else None
+        recorded = (usage or {}).get(case["prompt"]) or {}
+        measure["token_source"] = "ollama" if recorded.get("prompt_tokens") is not None else "approximate"
+        measure["prompt_tokens"] = (recorded["prompt_tokens"] if measure["token_source"] == "ollama"
+                                    else count_tokens(system_prompt) + count_tokens(case["prompt"]))
+        try:
+            content, backend = router.generate(system_prompt, case["prompt"], response_format=response_format)
+            measure["response"] = content
+            measure["completion_tokens"] = (recorded.get("completion_tokens") or 0 if measure["token_source"] == "ollama"
+                                            else count_tokens(content))
+            expectation = parse_expectation(content)
+        except json.JSONDecodeError:
+            expectation = None
+            measure["error"] = "parse_failure"
+        except Exception as e:
+            expectation = None
+            measure["error"] = f"backend_error: {str(e)}"
+    measure["latency_seconds"] = time.perf_counter() - start
+    measure["parsed"] = isinstance(expectation, dict)
+    measure["expectation"] = expectation if measure["parsed"] else None
+    if measure["parsed"]:
+        errors = ([f"Invalid expectation type: {expectation.get('expectation_type')}"]
+                  if expectation.get("expectation_type") not in VALID_EXPECTATION_TYPES
+                  else validate_expectation(expectation, list(schema) or None))
+        measure["valid"] = not errors
+        if errors:
+            measure["error"] = "; ".join(errors)
+    else:
+        measure["valid"] = False
+        measure.setdefault("error", "parse_failure")
+    if case["expected"] is not None:
+        measure["expected"] = case["expected"]
+        measure["exact_match"] = measure["parsed"] and exact_match(expectation, case["expected"])
+        measure["type_match"] = measure["parsed"] and expectation.get("expectation_type") == case["expected"]["expectation_type"]
+    return measure
+
+
+def summarize(measures, config):
+    """
+    Report of a benchmark run
+    """
+    latencies = [measure["latency_seconds"] for measure in measures]
+    llm_measures = [measure for measure in measures if measure["path"] == "llm"]
+    # The oracle answers with the expected expectation, its accuracy measures nothing
+    oracle = config.get("backend") == "oracle"
+    labelled = [measure for measure in measures if "exact_match" in measure]
+    count = len(measures)
+    token_sources = {measure["token_source"] for measure in llm_measures}
+
+    def rate(values):
+        return sum(1 for value in values if value) / len(values) if values else None
+
+    failures = [{key: measure.get(key) for key in ("source", "prompt", "path", "error", "response", "expected")}
+                for measure in measures
+                if not measure["valid"] or (not oracle and measure.get("exact_match") is False)]
+    return {
+        "generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "config": config,
+        "cases": count,
+        "paths": {"rule": count - len(llm_measures), "llm": len(llm_measures)},
+        "latency_seconds": {
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "mean": statistics.fmean(latencies) if latencies else None,
+            "max": max(latencies) if latencies else None,
+            "llm_p50": percentile([measure["latency_seconds"] for measure in llm_measures], 0.5),
+            "llm_p95": percentile([measure["latency_seconds"] for measure in llm_measures], 0.95),
+        },
+        "tokens": {
+            "source": token_sources.pop() if len(token_sources) == 1 else ("mixed" if token_sources else None),
+            "prompt_total": sum(measure["prompt_tokens"] for measure in measures),
+            "completion_total": sum(measure["completion_tokens"] for measure in measures),
+            "prompt_mean_per_llm_call": (statistics.fmean([measure["prompt_tokens"] for measure in llm_measures])
+                                         if llm_measures else None),
+            "completion_mean_per_llm_call": (statistics.fmean([measure["completion_tokens"] for measure in llm_measures])
+                                             if llm_measures else None),
+        },
+        "parse_failure_rate": rate([not measure["parsed"] for measure in measures]),
+        "invalid_rate": rate([not measure["valid"] for measure in measures]),
+        "labelled_cases": len(labelled),
+        "exact_match": None if oracle else rate([measure["exact_match"] for measure in labelled]),
+        "type_match": None if oracle else rate([measure["type_match"] for measure in labelled]),
+        "accuracy_note": ("not meaningful with the oracle backend, which answers with the expected expectation"
+                          if oracle else None),
+        "failures": failures[:MAX_REPORTED_FAILURES],
+    }
+
+
+def load_recordings(recordings_path):
+    """
+    Recorded responses and Ollama token counts, by prompt. Recordings made before the
+    token counts were stored map prompts to the response text.
+    Returns:
+        (dict, dict) : Prompt -> response, prompt -> {"prompt_tokens", "completion_tokens"}
+    """
+    with open(recordings_path) as f:
+        recordings = json.load(f)
+    responses = {}
+    usage = {}
+    for prompt, recording in recordings.items():
+        if isinstance(recording, dict):
+            responses[prompt] = recording.get("response") or ""
+            usage[prompt] = {key: recording.get(key) for key in ("prompt_tokens", "completion_tokens")}
+        else:
+            responses[prompt] = recording
+    return responses, usage
+
+
+def build_stub_router(cases, recordings_path=None, latency_seconds=0.0):
+    """
+    Router over the stub backend
+    Returns:
+        (BackendRouter, dict) : The router and the recorded token counts by prompt
+    """
+    usage = {}
+    if recordings_path:
+        recordings, usage = load_recordings(recordings_path)
+        responses = lambda user_text: recordings.get(user_text, "")
+    else:
+        responses = oracle_response(cases)
+    router = BackendRouter([FakeBackend(responses=responses, latency_seconds=latency_seconds, timeout_seconds=60)])
+    return router, usage
+
+
+def record_responses(cases, recordings_path, constrained=True, model=OLLAMA_MODEL):
+    """
+    Record the responses of the live Ollama model, with the prompt and completion token
+    counts it reports, for later offline replays
+    """
+    recordings = {}
+    for case in cases:
+        schema = case["schema"]
+        system_prompt = replay_prompt(case, schema)
+        response_format = expectation_json_schema(VALID_EXPECTATION_TYPES, schema) if constrained else None
+        usage = {}
+        try:
+            response = chat_completion(system_prompt, case["prompt"], model, response_format=response_format,
+                                       usage=usage)
+            recordings[case["prompt"]] = {"response": response, **usage}
+        except Exception as e:
+            print(f"Unable to record '{case['prompt']}': {str(e)}")
+    os.makedirs(os.path.dirname(os.path.abspath(recordings_path)), exist_ok=True)
+    with open(recordings_path, "w") as f:
+        json.dump(recordings, f, indent=2)
+    print(f"Recorded {len(recordings)} responses to {recordings_path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline replay benchmark of the NL to expectation pipeline")
+    parser.add_argument("--dataset", action="append",
+                        help="JSON or JSONL file of {prompt, completion} records (default: train.json)")
+    parser.add_argument("--recordings", default=DEFAULT_RECORDINGS_PATH,
+                        help="JSON file of the recorded LLM responses (default: uncommitted/translation_recordings.json)")
+    parser.add_argument("--record", action="store_true", help="Record live Ollama responses to --recordings")
+    parser.add_argument("--oracle", action="store_true",
+                        help="Answer with the expected expectations, to measure the pipeline overhead only")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated stub latency in seconds")
+    parser.add_argument("--limit", type=int, help="Replay only the first N cases")
+    parser.add_argument("--no-fast-path", action="store_true", help="Send every case to the LLM")
+    parser.add_argument("--unconstrained", action="store_true", help="Do not send the JSON schema output format")
+    parser.add_argument("--output", help="Report path (default: stdout)")
+    args = parser.parse_args(argv)
+
+    datasets = args.dataset or [TRAIN_PATH]
+    cases = load_cases(datasets, args.limit)
+    if args.record:
+        record_responses(cases, args.recordings, constrained=not args.unconstrained)
+        return
+    if not args.oracle and not os.path.exists(args.recordings):
+        parser.error(f"No recorded responses at {args.recordings}: record them with --record against a live "
+                     "Ollama, or pass --oracle to measure the pipeline overhead only")
+
+    recordings_path = None if args.oracle else args.recordings
+    router, usage = build_stub_router(cases, recordings_path, args.latency)
+    measures = [run_case(case, router, use_fast_path=not args.no_fast_path, constrained=not args.unconstrained,
+                         usage=usage)
+                for case in cases]
+    config = {
+        "datasets": [os.path.relpath(path) for path in datasets],
+        "backend": "oracle" if args.oracle else "recorded",
+        "recordings": recordings_path,
+        "stub_latency_seconds": args.latency,
+        "fast_path": not args.no_fast_path,
+        "constrained_output": not args.unconstrained,
+    }
+    report = json.dumps(summarize(measures, config), indent=2, sort_keys=True, default=str)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+        print(f"Benchmark report written to {args.output}")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Process-wide pooled SQLAlchemy engine shared by every PostgreSQL code path
+(pandas reads, psycopg2 cursors and the GE SqlAlchemyExecutionEngine).
+"""
+from contextlib import contextmanager
+import os
+import threading
+import time
+from dotenv import load_dotenv, find_dotenv
+from sqlalchemy import create_engine, event
+
+load_dotenv(find_dotenv())
+
+POSTGRES_CONNECTION_STRING = os.environ.get('DATABASE_CONNECTION_STRING')
+# Pool sizing, tune under concurrent users with pool_stats()
+PG_POOL_SIZE = int(os.environ.get('PG_POOL_SIZE', 5))
+PG_POOL_MAX_OVERFLOW = int(os.environ.get('PG_POOL_MAX_OVERFLOW', 10))
+PG_POOL_TIMEOUT = float(os.environ.get('PG_POOL_TIMEOUT', 30))
+PG_POOL_RECYCLE = int(os.environ.get('PG_POOL_RECYCLE', 1800))
+
+_engine = None
+_engine_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"checkouts": 0, "waits": 0, "wait_seconds": 0.0, "timeouts": 0}
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    with _stats_lock:
+        _stats["checkouts"] += 1
+
+
+def get_engine():
+    """
+    Return the shared engine, creating it on first use
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_engine(POSTGRES_CONNECTION_STRING,
+                                    pool_size=PG_POOL_SIZE,
+                                    max_overflow=PG_POOL_MAX_OVERFLOW,
+                                    pool_timeout=PG_POOL_TIMEOUT,
+                                    pool_recycle=PG_POOL_RECYCLE,
+                                    pool_pre_ping=True)
+            event.listen(_engine, "checkout", _on_checkout)
+        return _engine
+
+
+def _acquire(connect):
+    """
+    Check a connection out of the pool, recording whether the caller had to wait
+    for another one to be returned
+    """
+    engine = get_engine()
+    exhausted = engine.pool.checkedout() >= PG_POOL_SIZE + PG_POOL_MAX_OVERFLOW
+    start = time.perf_counter()
+    try:
+        connection = connect(engine)
+    except Exception:
+        if exhausted:
+            with _stats_lock:
+                _stats["timeouts"] += 1
+        raise
+    if exhausted:
+        with _stats_lock:
+            _stats["waits"] += 1
+            _stats["wait_seconds"] += time.perf_counter() - start
+    return connection
+
+
+@contextmanager
+def pooled_connection():
+    """
+    Raw DBAPI (psycopg2) connection from the shared pool, returned to the pool on exit
+    """
+    connection = _acquire(lambda engine: engine.raw_connection())
+    try:
+        yield connection
+    finally:
+        connection.close()
+
+
+@contextmanager
+def engine_connection():
+    """
+    SQLAlchemy connection from the shared pool, for pandas reads
+    """
+    connection = _acquire(lambda engine: engine.connect())
+    try:
+        yield connection
+    finally:
+        connection.close()
+
+
+def quote_identifier(name):
+    """
+    Quote a PostgreSQL identifier (table or column name)
+    """
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def use_shared_engine(datasource):
+    """
+    Point the SqlAlchemyExecutionEngine of a GE datasource at the shared engine,
+    instead of the engine it built from its connection string
+    """
+    datasource.execution_engine.engine = get_engine()
+    return datasource
+
+
+def pool_stats():
+    """
+    Current state and counters of the shared pool
+    """
+    pool = get_engine().pool
+    with _stats_lock:
+        stats = dict(_stats)
+    stats.update({
+        "pool_size": pool.size(),
+        "max_overflow": PG_POOL_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    })
+    return stats
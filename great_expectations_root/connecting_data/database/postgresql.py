@@ -4,61 +4,297 @@ import ruamel
 from great_expectations.core.batch import BatchRequest, RuntimeBatchRequest
 from dotenv import load_dotenv, find_dotenv
 import os 
-import psycopg2
-from sqlalchemy import create_engine
+import time
+import datetime
+from decimal import Decimal
 import pandas as pd 
+from great_expectations.core.expectation_configuration import ExpectationConfiguration
+from great_expectations.data_context.types.resource_identifiers import ExpectationSuiteIdentifier
+from helpers.ge_context import CONTEXT_LOCK, get_data_context, register_datasource, serialized
+from helpers.docs_builder import DOCS_BUILDER
+from helpers.single_pass import expectation_key, validate_and_persist
+from helpers.expectation_results import build_exception_result, normalize_expectation
+from helpers.column_profiles import PROFILE_STORE, ColumnProfile, DatasetProfile, answer_from_profile
+from connecting_data.filesystem.chunked_validation import build_state, required_columns, to_python, validate_chunks
+from connecting_data.filesystem.approximate_validation import run_approximate_expectations
+from connecting_data.filesystem.progressive_validation import run_progressive_expectations
+from connecting_data.database.sql_pushdown import run_pushdown
+from connecting_data.database.engine import engine_connection, pooled_connection, quote_identifier, use_shared_engine
 
 load_dotenv(find_dotenv())
 
 # Get your postgresql connection string from the environment variable
 POSTGRES_CONNECTION_STRING = os.environ.get('DATABASE_CONNECTION_STRING')
 
-def read_pg_tables(table_name):
+# Rows shown per preview page
+PREVIEW_PAGE_SIZE = 1000
+# Rows fetched per round trip by server-side cursors
+FETCH_SIZE = 10_000
+# Column data types profiled with SUM / AVG / STDDEV, and with MIN / MAX
+NUMERIC_TYPES = ["smallint", "integer", "bigint", "numeric", "real", "double precision"]
+ORDERABLE_TYPES = NUMERIC_TYPES + ["text", "character varying", "character", "date", "time without time zone",
+                                   "time with time zone", "timestamp without time zone", "timestamp with time zone"]
+
+def read_pg_tables(table_name, limit=PREVIEW_PAGE_SIZE, offset=0, order_by=None):
+    """
+    Read a bounded page of a postgresql table in pandas dataframe
+    Params:
+        order_by (str) : SQL expression ordering the rows, so that pages do not overlap
+    """
+    query = f'select * from public.{quote_identifier(table_name)}'
+    if order_by is not None:
+        query += f' order by {order_by}'
+    with engine_connection() as connection:
+        df = pd.read_sql_query(query + ' limit %(limit)s offset %(offset)s',
+                               con=connection, params={"limit": limit, "offset": offset})
+    return df
+
+def get_pg_primary_key(table_name):
+    """
+    Return the primary key column of a table, or None if it has no single column primary key
     """
-    Read postgresql table in pandas dataframe
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT a.attname
+            FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+            WHERE i.indrelid = %s::regclass AND i.indisprimary
+        """, (f"public.{quote_identifier(table_name)}",))
+        columns = cursor.fetchall()
+        cursor.close()
+    return columns[0][0] if len(columns) == 1 else None
+
+def read_pg_page(table_name, page=0, page_keys=None, page_size=PREVIEW_PAGE_SIZE):
+    """
+    Read one preview page of a postgresql table.
+    Uses keyset pagination on the primary key when the last key of the previous page
+    is known, and LIMIT/OFFSET otherwise, ordered by the primary key (or the physical
+    row location, ctid, without single column primary key) so that pages are stable.
+    Params:
+        page (int) : Page number, starting at 0
+        page_keys (dict) : Last primary key value of each page already read, updated in place
     """
-    engine = create_engine(POSTGRES_CONNECTION_STRING)
-    df = pd.read_sql_query(f'select * from {table_name}',con=engine)
+    page_keys = page_keys if page_keys is not None else {}
+    key_column = get_pg_primary_key(table_name)
+    if key_column is None or (page > 0 and (page - 1) not in page_keys):
+        order_by = quote_identifier(key_column) if key_column is not None else "ctid"
+        df = read_pg_tables(table_name, limit=page_size, offset=page * page_size, order_by=order_by)
+        if key_column is not None and not df.empty:
+            page_keys[page] = to_python(df[key_column].iloc[-1])
+        return df
+
+    query = f"select * from public.{quote_identifier(table_name)}"
+    params = {"limit": page_size}
+    if page > 0:
+        query += f" where {quote_identifier(key_column)} > %(after)s"
+        params["after"] = page_keys[page - 1]
+    query += f" order by {quote_identifier(key_column)} limit %(limit)s"
+    with engine_connection() as connection:
+        df = pd.read_sql_query(query, con=connection, params=params)
+    if not df.empty:
+        page_keys[page] = to_python(df[key_column].iloc[-1])
     return df
 
+def iter_pg_table(table_name, columns=None, fetch_size=FETCH_SIZE, sample_fraction=None, seed=0):
+    """
+    Stream a postgresql table in DataFrame chunks through a named server-side cursor,
+    so the whole table is never held in memory
+    Params:
+        columns (list) : Columns to read, all columns if None
+        fetch_size (int) : Rows fetched per round trip
+        sample_fraction (float) : Only read a random sample of about this fraction of the
+                                  table pages (TABLESAMPLE SYSTEM), repeatable with `seed`
+    """
+    if columns is None:
+        select_list = "*"
+    elif columns:
+        select_list = ", ".join(quote_identifier(column) for column in columns)
+    else:
+        # Only the row count is needed
+        select_list = "1 as row_marker"
+    with pooled_connection() as conn:
+        cursor = conn.cursor(name=f"stream_{table_name}_{os.getpid()}_{id(conn)}")
+        cursor.itersize = fetch_size
+        query = f"select {select_list} from public.{quote_identifier(table_name)}"
+        params = None
+        if sample_fraction is not None:
+            query += " tablesample system (%(percent)s) repeatable (%(seed)s)"
+            params = {"percent": min(sample_fraction, 1.0) * 100, "seed": seed}
+        cursor.execute(query, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                yield pd.DataFrame(rows, columns=[description[0] for description in cursor.description])
+        finally:
+            cursor.close()
+            conn.rollback()
+
+def get_pg_table_version(table_name):
+    """
+    Version of a table derived from its pg_stat_user_tables modification counters.
+    The statistics are updated asynchronously, so a very recent write may not be visible yet.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT n_tup_ins, n_tup_upd, n_tup_del, n_live_tup
+            FROM pg_stat_user_tables
+            WHERE schemaname = 'public' AND relname = %s
+        """, (table_name,))
+        counters = cursor.fetchone()
+        cursor.close()
+    return f"{table_name}:" + ":".join(str(counter) for counter in (counters or ()))
+
+def get_pg_table_schema(table_name):
+    """
+    Column names and data types of a table, in column order
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT column_name, data_type
+            FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = %s
+            ORDER BY ordinal_position
+        """, (table_name,))
+        columns = cursor.fetchall()
+        cursor.close()
+    return {column: data_type for column, data_type in columns}
+
+def _profile_value(value):
+    """
+    JSON friendly aggregate value, matching the pandas profiles (floats, ISO dates)
+    """
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+def get_pg_table_profile(table_name, version):
+    """
+    Column profile of a table from one aggregate query (counts, min, max, sum, mean, stdev).
+    Distinct counts are the planner estimates of pg_stats, refreshed by ANALYZE, so they
+    are kept as estimates and never used to answer expectations.
+    """
+    schema = get_pg_table_schema(table_name)
+    select_list = ["COUNT(*) AS row_count"]
+    for index, (column, data_type) in enumerate(schema.items()):
+        quoted = quote_identifier(column)
+        select_list.append(f"COUNT({quoted}) AS c{index}_count")
+        if data_type in ORDERABLE_TYPES:
+            select_list += [f"MIN({quoted}) AS c{index}_min", f"MAX({quoted}) AS c{index}_max"]
+        if data_type in NUMERIC_TYPES:
+            select_list += [f"SUM({quoted}) AS c{index}_sum", f"AVG({quoted}) AS c{index}_mean",
+                            f"STDDEV_SAMP({quoted}) AS c{index}_stdev"]
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT {', '.join(select_list)} FROM public.{quote_identifier(table_name)}")
+            row = dict(zip([description[0] for description in cursor.description], cursor.fetchone()))
+            cursor.execute("""
+                SELECT attname, n_distinct FROM pg_stats
+                WHERE schemaname = 'public' AND tablename = %s
+            """, (table_name,))
+            n_distinct = dict(cursor.fetchall())
+        finally:
+            cursor.close()
+            conn.rollback()
+    row_count = int(row["row_count"])
+    columns = {}
+    for index, (column, data_type) in enumerate(schema.items()):
+        count = int(row[f"c{index}_count"])
+        # Negative n_distinct is a fraction of the rows
+        distinct = n_distinct.get(column)
+        if distinct is not None and distinct < 0:
+            distinct = round(-distinct * count)
+        columns[column] = ColumnProfile.from_dict({
+            "row_count": row_count,
+            "null_count": row_count - count,
+            "min": _profile_value(row.get(f"c{index}_min")),
+            "max": _profile_value(row.get(f"c{index}_max")),
+            "numeric": data_type in NUMERIC_TYPES,
+            "sum": _profile_value(row.get(f"c{index}_sum")) if count else 0,
+            "mean": _profile_value(row.get(f"c{index}_mean")),
+            "stdev": _profile_value(row.get(f"c{index}_stdev")),
+            "distinct": int(distinct) if distinct is not None else None,
+            "distinct_exact": False,
+        })
+    return DatasetProfile(version, row_count, columns)
+
 def get_pg_tables():
     """
     List all tables from a PostgreSQL database using a connection string
     """
-    conn = psycopg2.connect(POSTGRES_CONNECTION_STRING)
-    cursor = conn.cursor()
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
 
-    query = "SELECT table_name FROM information_schema.tables WHERE table_schema='public' AND table_type='BASE TABLE';"
-    cursor.execute(query)
+        query = "SELECT table_name FROM information_schema.tables WHERE table_schema='public' AND table_type='BASE TABLE';"
+        cursor.execute(query)
 
-    tables = cursor.fetchall()
-    tables = [t[0] for t in tables]
-    cursor.close()
-    conn.close()
+        tables = cursor.fetchall()
+        tables = [t[0] for t in tables]
+        cursor.close()
     return tables
 
-def postgresql_data_owners():
+def postgresql_data_owners(tables=None):
     """
     Map each postgresql with its data owner
     """
-    tables = get_pg_tables()
+    tables = get_pg_tables() if tables is None else tables
     return {datasource : 'YMO@aidatadoctor.com' for datasource in tables}
 
+# Validation engines available for PostgreSQL tables
+VALIDATION_ENGINES = ["great_expectations", "chunked", "pushdown", "approximate", "progressive"]
+# How GE results are persisted: full checkpoint rerun, or the single validation pass
+PERSIST_MODES = ["checkpoint", "single_pass"]
+
 class PostgreSQLDatasource():
     """
     Run Data Quality checks on PostgreSQL data database
     """
-    def __init__(self, database, asset_name):
+    def __init__(self, database, asset_name, validation_engine="great_expectations", fetch_size=FETCH_SIZE,
+                 persist_mode="checkpoint", use_profile=True, exact_results=False):
         """ 
         Init class attributes
+        Params:
+            validation_engine (str) : "great_expectations" validates through a GE validator,
+                                      "chunked" streams the table through a server-side cursor,
+                                      "pushdown" compiles the checks into aggregate SQL,
+                                      "approximate" streams the table and estimates distinct
+                                      counts and quantiles with sketches, "progressive" decides
+                                      row-level checks on growing TABLESAMPLE samples
+            fetch_size (int) : Rows per round trip for the chunked engine
+            persist_mode (str) : "checkpoint" reruns the suite in a checkpoint after each check,
+                                 "single_pass" validates the suite once on the whole table
+                                 and stores that result
+            use_profile (bool) : Answer aggregate expectations from the column profile of the
+                                 table version when it decides them (not with the
+                                 great_expectations engine, whose results are persisted)
+            exact_results (bool) : Confirm the passes of the progressive engine with a full pass
         """
+        if validation_engine not in VALIDATION_ENGINES:
+            raise ValueError(f"Unknown validation engine: {validation_engine}")
+        if persist_mode not in PERSIST_MODES:
+            raise ValueError(f"Unknown persist mode: {persist_mode}")
         self.database = database
         self.asset_name = asset_name
+        self.source_name = asset_name
+        self.validation_engine = validation_engine
+        self.fetch_size = fetch_size
+        self.persist_mode = persist_mode
+        self.use_profile = use_profile
+        self.exact_results = exact_results
         self.datasource_name = f"{asset_name}_datasource"  # Use table name as datasource name
         self.expectation_suite_name = f"{asset_name}_expectation_suite"
         self.checkpoint_name = f"{asset_name}_checkpoint"
-        self.context = ge.get_context()
+        self._schema = None
+        self.context = get_data_context()
 
+    @serialized
     def add_or_update_datasource(self):
         """
         Create data source if it does not exist or updating existing one
@@ -78,22 +314,25 @@ class PostgreSQLDatasource():
                 class_name: InferredAssetSqlDataConnector
                 include_schema_name: true
         """
-        self.context.test_yaml_config(datasource_yaml)
-        self.context.add_datasource(**yaml.load(datasource_yaml, Loader=ruamel.yaml.Loader))
+        datasource = register_datasource(self.context, datasource_yaml)
+        use_shared_engine(datasource)
 
-    def configure_datasource(self):
+    def configure_datasource(self, query=None):
         """
         Add a RuntimeDataConnector
+        Params:
+            query (str) : Batch query, defaults to the first rows of the table
         """
         batch_request = RuntimeBatchRequest(
             datasource_name=self.datasource_name,  # Use the datasource_name, not database name
             data_connector_name="default_runtime_data_connector_name",
             data_asset_name=self.asset_name,  # this can be anything that identifies this data
-            runtime_parameters={"query": f"SELECT * from public.{self.asset_name} LIMIT 10"},
+            runtime_parameters={"query": query or f"SELECT * from public.{self.asset_name} LIMIT 10"},
             batch_identifiers={"default_identifier_name": "default_identifier"},
         )
         return batch_request
 
+    @serialized
     def add_or_update_ge_suite(self):
         """
         create expectation suite if not exist and update it if there is already a suite
@@ -101,100 +340,344 @@ class PostgreSQLDatasource():
         self.context.add_or_update_expectation_suite(
                      expectation_suite_name = self.expectation_suite_name)
 
-    def get_validator(self):
+    @serialized
+    def get_validator(self, query=None):
         """
         Retrieve a validator object for a fine grain adjustment on the expectation suite.
         """
         self.add_or_update_datasource()
-        batch_request = self.configure_datasource()
+        batch_request = self.configure_datasource(query)
         self.add_or_update_ge_suite()
         validator = self.context.get_validator(batch_request=batch_request,
                                                expectation_suite_name=self.expectation_suite_name,
                                         )
         return validator, batch_request
 
-    def run_expectation(self, expectation):
+    @serialized
+    def add_expectations_to_suite(self, expectations):
         """
-        Run your dataquality checks here
+        Store expectations evaluated outside of a validator in the expectation suite
         """
-        validator, batch_request = self.get_validator()
-        
         try:
-            # Handle both string and dict expectations
-            if isinstance(expectation, dict):
-                # Handle the case where expectation is already a dictionary
-                expectation_type = expectation.get('expectation_type')
-                kwargs = expectation.get('kwargs', {})
-                
-                if not expectation_type:
-                    raise ValueError("Invalid expectation format: missing 'expectation_type'")
-                
-                # Special handling for regex expectations on non-text columns
-                if expectation_type == 'expect_column_values_to_match_regex':
-                    # Get column type from database
-                    conn = psycopg2.connect(POSTGRES_CONNECTION_STRING)
-                    cursor = conn.cursor()
+            suite = self.context.get_expectation_suite(expectation_suite_name=self.expectation_suite_name)
+        except Exception:
+            suite = self.context.add_or_update_expectation_suite(
+                     expectation_suite_name = self.expectation_suite_name)
+        for expectation in expectations:
+            expectation_type, kwargs = normalize_expectation(expectation)
+            suite.add_expectation(ExpectationConfiguration(expectation_type=expectation_type, kwargs=kwargs),
+                                  overwrite_existing=True)
+        self.context.save_expectation_suite(suite)
+        DOCS_BUILDER.request_build(self.context, [ExpectationSuiteIdentifier(self.expectation_suite_name)])
+
+    def add_expectation_to_suite(self, expectation):
+        """
+        Store an expectation evaluated outside of a validator in the expectation suite
+        """
+        self.add_expectations_to_suite([expectation])
+
+    def run_chunked_expectation(self, expectation):
+        """
+        Validate the whole table streamed through a server-side cursor.
+        Returns a GE compatible result dict.
+        """
+        print(f"Running chunked expectation on {self.asset_name}: {expectation}")
+        states = [build_state(expectation)]
+        chunks = iter_pg_table(self.asset_name, required_columns(states), self.fetch_size)
+        expectation_result = validate_chunks(chunks, states)[0]
+        self.add_expectation_to_suite(expectation)
+        return expectation_result
+
+    def run_pushdown_expectation(self, expectation):
+        """
+        Validate the whole table with a server-side aggregate query.
+        Returns a GE compatible result dict.
+        """
+        print(f"Running pushdown expectation on {self.asset_name}: {expectation}")
+        expectation_result = run_pushdown(self.asset_name, [expectation])[0]
+        self.add_expectation_to_suite(expectation)
+        return expectation_result
+
+    def run_approximate_expectations(self, expectations):
+        """
+        Validate the whole table in one pass of a server-side cursor, estimating distinct
+        counts and quantiles with mergeable sketches
+        Returns:
+            list : One dict per expectation with its "expectation", its result dict
+                   (with error bounds for the approximate ones) and its "duration_seconds"
+        """
+        print(f"Running approximate expectations on {self.asset_name}")
+        results = run_approximate_expectations(
+            lambda columns: iter_pg_table(self.asset_name, columns, self.fetch_size), expectations)
+        self.add_expectations_to_suite(expectations)
+        return [{"expectation": expectation, "result": result, "duration_seconds": duration}
+                for expectation, (result, duration) in zip(expectations, results)]
+
+    def run_progressive_expectations(self, expectations):
+        """
+        Decide row-level expectations on growing TABLESAMPLE samples of the table, stopping
+        as soon as they fail (or pass, unless exact results are requested). The other
+        expectations, and the undecided ones, are validated in one full streaming pass.
+        Returns:
+            list : One dict per expectation with its "expectation", its result dict and
+                   its "duration_seconds"
+        """
+        print(f"Running progressive expectations on {self.asset_name}")
+        results = run_progressive_expectations(
+            lambda columns, fraction, seed: iter_pg_table(self.asset_name, columns, self.fetch_size, fraction, seed),
+            lambda columns: iter_pg_table(self.asset_name, columns, self.fetch_size),
+            expectations, exact=self.exact_results)
+        self.add_expectations_to_suite(expectations)
+        return [{"expectation": expectation, "result": result, "duration_seconds": duration}
+                for expectation, (result, duration) in zip(expectations, results)]
+
+    def text_regex_kwargs(self, kwargs):
+        """
+        Kwargs of a regex expectation, reading a text cast of the column when it is not a
+        text column
+        """
+        # Get column type from database
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT data_type 
+                FROM information_schema.columns 
+                WHERE table_name = %s 
+                AND column_name = %s
+            """, (self.asset_name, kwargs.get("column")))
+            column_type = cursor.fetchone()
+            cursor.close()
+
+            # If column is not text/varchar, modify the query to cast it
+            if column_type and column_type[0] not in ['text', 'character varying', 'varchar']:
+                # Create a temporary view with the cast column
+                cursor = conn.cursor()
+                try:
                     cursor.execute(f"""
-                        SELECT data_type 
-                        FROM information_schema.columns 
-                        WHERE table_name = '{self.asset_name}' 
-                        AND column_name = '{kwargs.get("column")}'
+                        CREATE OR REPLACE VIEW temp_{self.asset_name}_cast AS 
+                        SELECT *, CAST({kwargs.get("column")} AS TEXT) as {kwargs.get("column")}_text 
+                        FROM {self.asset_name}
                     """)
-                    column_type = cursor.fetchone()
+                    conn.commit()
+                    # Update kwargs to use the cast column
+                    kwargs["column"] = f"{kwargs.get('column')}_text"
+                except Exception as e:
+                    conn.rollback()
+                    print(f"Error creating temporary view: {str(e)}")
+                finally:
                     cursor.close()
-                    conn.close()
-
-                    # If column is not text/varchar, modify the query to cast it
-                    if column_type and column_type[0] not in ['text', 'character varying', 'varchar']:
-                        # Create a temporary view with the cast column
-                        conn = psycopg2.connect(POSTGRES_CONNECTION_STRING)
-                        cursor = conn.cursor()
-                        try:
-                            cursor.execute(f"""
-                                CREATE OR REPLACE VIEW temp_{self.asset_name}_cast AS 
-                                SELECT *, CAST({kwargs.get("column")} AS TEXT) as {kwargs.get("column")}_text 
-                                FROM {self.asset_name}
-                            """)
-                            conn.commit()
-                            # Update kwargs to use the cast column
-                            kwargs["column"] = f"{kwargs.get('column')}_text"
-                        except Exception as e:
-                            print(f"Error creating temporary view: {str(e)}")
-                        finally:
-                            cursor.close()
-                            conn.close()
-                
-                # Convert dict to function call
-                expectation_code = f"{expectation_type}(**{kwargs})"
-                print(f"Running expectation: {expectation_code}")
-                
-                # Execute the expectation
+        return kwargs
+
+    def apply_expectation(self, validator, expectation):
+        """
+        Evaluate one expectation (dict or legacy string) with a validator
+        """
+        # Handle both string and dict expectations
+        if isinstance(expectation, dict):
+            # Handle the case where expectation is already a dictionary
+            expectation_type = expectation.get('expectation_type')
+            kwargs = expectation.get('kwargs', {})
+            
+            if not expectation_type:
+                raise ValueError("Invalid expectation format: missing 'expectation_type'")
+            
+            # Special handling for regex expectations on non-text columns
+            if expectation_type == 'expect_column_values_to_match_regex':
+                kwargs = self.text_regex_kwargs(kwargs)
+            
+            # Convert dict to function call
+            expectation_code = f"{expectation_type}(**{kwargs})"
+            print(f"Running expectation: {expectation_code}")
+            
+            # Execute the expectation
+            local_vars = {"validator": validator}
+            try:
+                exec(f"expectation_result = validator.{expectation_code}", globals(), local_vars)
+                expectation_result = local_vars.get("expectation_result")
+                if expectation_result is None:
+                    raise ValueError(f"Failed to execute expectation: {expectation_code}")
+            except AttributeError as e:
+                raise ValueError(f"Invalid expectation type: {expectation_type}. {str(e)}")
+            except Exception as e:
+                raise ValueError(f"Error executing expectation: {str(e)}")
+        else:
+            # Handle string format (legacy)
+            def my_function(expectation, validator):
                 local_vars = {"validator": validator}
+                exec(f"expectation_result = validator.{expectation}", globals(), local_vars)
+                return local_vars.get("expectation_result")
+            
+            expectation_result = my_function(expectation, validator)
+        return expectation_result
+
+    def dataset_version(self):
+        """
+        Version of the table, from its pg_stat_user_tables counters
+        """
+        return get_pg_table_version(self.asset_name)
+
+    def get_schema(self):
+        """
+        Column names and data types of the table, used to key cached LLM translations
+        """
+        if self._schema is None:
+            self._schema = get_pg_table_schema(self.asset_name)
+        return self._schema
+
+    def column_profile(self):
+        """
+        Column statistics of the table version, computed once per version and persisted
+        """
+        version = self.dataset_version()
+        return PROFILE_STORE.get_or_compute(f"postgresql:{self.database}:{self.asset_name}", version,
+                                            lambda: get_pg_table_profile(self.asset_name, version))
+
+    def run_profiled_expectations(self, expectations):
+        """
+        Answer the expectations decided by the column profile, without scanning the table
+        Returns:
+            dict : Index of the answered expectations -> run dict ("expectation", "result",
+                   "duration_seconds")
+        """
+        # The great_expectations engine validates and persists every result with GE
+        if not self.use_profile or self.validation_engine == "great_expectations":
+            return {}
+        start = time.perf_counter()
+        answers = answer_from_profile(expectations, self.column_profile)
+        if not answers:
+            return {}
+        duration = time.perf_counter() - start
+        answered = [expectations[index] for index in sorted(answers)]
+        print(f"Answered {len(answered)} expectations from the column profile")
+        self.add_expectations_to_suite(answered)
+        return {index: {"expectation": expectations[index], "result": result, "duration_seconds": duration}
+                for index, result in answers.items()}
+
+    @serialized
+    def run_single_pass(self, expectations):
+        """
+        Add expectations to the suite (with the special cases of apply_expectation), then
+        validate the suite once on the whole table and persist that result like the
+        checkpoint does (validation store, evaluation parameters and data docs). Unchanged
+        expectations reuse their previous result while the table is unchanged.
+        Returns:
+            list : GE results of `expectations`
+        """
+        # Same batch as the checkpoint would use, so a single evaluation is enough
+        query = f"SELECT * from public.{self.asset_name}"
+        validator, batch_request = self.get_validator(query)
+        configurations = []
+        for expectation in expectations:
+            expectation_type, kwargs = normalize_expectation(expectation)
+            # Same special cases as apply_expectation
+            if expectation_type == 'expect_column_values_to_match_regex':
+                kwargs = self.text_regex_kwargs(kwargs)
+            configuration = ExpectationConfiguration(expectation_type=expectation_type, kwargs=kwargs)
+            validator.expectation_suite.add_expectation(configuration, overwrite_existing=True)
+            configurations.append(configuration)
+        validator.save_expectation_suite(discard_failed_expectations=False)
+        batch_fingerprint = f"{query}|{get_pg_table_version(self.asset_name)}"
+        run_name = datetime.datetime.now().strftime(f'%Y%m%d-%H%M%S-{self.asset_name}-run')
+        _, _, results = validate_and_persist(self.context, validator, batch_fingerprint, run_name)
+        return [results[expectation_key(configuration)] for configuration in configurations]
+
+    def run_expectation(self, expectation):
+        """
+        Run your dataquality checks here
+        """
+        profiled = self.run_profiled_expectations([expectation])
+        if profiled:
+            return profiled[0]["result"]
+        if self.validation_engine == "chunked":
+            return self.run_chunked_expectation(expectation)
+        if self.validation_engine == "pushdown":
+            return self.run_pushdown_expectation(expectation)
+        if self.validation_engine == "approximate":
+            return self.run_approximate_expectations([expectation])[0]["result"]
+        if self.validation_engine == "progressive":
+            return self.run_progressive_expectations([expectation])[0]["result"]
+        if self.persist_mode == "single_pass":
+            return self.run_single_pass([expectation])[0]
+
+        with CONTEXT_LOCK:
+            validator, batch_request = self.get_validator()
+        
+            try:
+                expectation_result = self.apply_expectation(validator, expectation)
+                validator.save_expectation_suite(discard_failed_expectations=False)
+                self.run_ge_checkpoint(batch_request)
+                return expectation_result
+            except Exception as e:
+                print(f"Error running expectation: {str(e)}")
+                raise
+
+    def run_expectations(self, expectations):
+        """
+        Run a list of expectations against the same batch. Expectations decided by the
+        column profile are answered from it, the others by the validation engine.
+        Returns:
+            list : One dict per expectation with its "expectation", its "result"
+                   (GE result or result dict) and its "duration_seconds"
+        """
+        profiled = self.run_profiled_expectations(expectations)
+        remaining = [expectation for index, expectation in enumerate(expectations) if index not in profiled]
+        runs = iter(self.run_engine_expectations(remaining) if remaining else [])
+        return [profiled[index] if index in profiled else next(runs) for index in range(len(expectations))]
+
+    def run_engine_expectations(self, expectations):
+        """
+        Run a list of expectations against the same batch with the validation engine.
+        The validator (datasource, suite, batch) is built once, the suite is saved once
+        and the checkpoint runs once for the whole list. The pushdown engine answers the
+        list with one fused query, so each expectation reports the duration of that query.
+        Returns:
+            list : One dict per expectation with its "expectation", its "result"
+                   (GE result or result dict) and its "duration_seconds"
+        """
+        if self.validation_engine == "chunked":
+            states = [build_state(expectation) for expectation in expectations]
+            chunks = iter_pg_table(self.asset_name, required_columns(states), self.fetch_size)
+            results = validate_chunks(chunks, states)
+            self.add_expectations_to_suite(expectations)
+            return [{"expectation": expectation, "result": result, "duration_seconds": state.elapsed_seconds}
+                    for expectation, result, state in zip(expectations, results, states)]
+        if self.validation_engine == "approximate":
+            return self.run_approximate_expectations(expectations)
+        if self.validation_engine == "progressive":
+            return self.run_progressive_expectations(expectations)
+        if self.validation_engine == "pushdown":
+            start = time.perf_counter()
+            results = run_pushdown(self.asset_name, expectations)
+            duration = time.perf_counter() - start
+            self.add_expectations_to_suite(expectations)
+            return [{"expectation": expectation, "result": result, "duration_seconds": duration}
+                    for expectation, result in zip(expectations, results)]
+        if self.persist_mode == "single_pass":
+            # The suite is validated in one pass, each expectation reports the pass duration
+            start = time.perf_counter()
+            results = self.run_single_pass(expectations)
+            duration = time.perf_counter() - start
+            return [{"expectation": expectation, "result": result, "duration_seconds": duration}
+                    for expectation, result in zip(expectations, results)]
+
+        with CONTEXT_LOCK:
+            validator, batch_request = self.get_validator()
+            results = []
+            for expectation in expectations:
+                start = time.perf_counter()
                 try:
-                    exec(f"expectation_result = validator.{expectation_code}", globals(), local_vars)
-                    expectation_result = local_vars.get("expectation_result")
-                    if expectation_result is None:
-                        raise ValueError(f"Failed to execute expectation: {expectation_code}")
-                except AttributeError as e:
-                    raise ValueError(f"Invalid expectation type: {expectation_type}. {str(e)}")
+                    expectation_result = self.apply_expectation(validator, expectation)
                 except Exception as e:
-                    raise ValueError(f"Error executing expectation: {str(e)}")
-            else:
-                # Handle string format (legacy)
-                def my_function(expectation, validator):
-                    local_vars = {"validator": validator}
-                    exec(f"expectation_result = validator.{expectation}", globals(), local_vars)
-                    return local_vars.get("expectation_result")
-                
-                expectation_result = my_function(expectation, validator)
-            
+                    print(f"Error running expectation: {str(e)}")
+                    expectation_type, kwargs = normalize_expectation(expectation)
+                    expectation_result = build_exception_result(expectation_type, kwargs, e)
+                results.append({"expectation": expectation, "result": expectation_result,
+                                "duration_seconds": time.perf_counter() - start})
             validator.save_expectation_suite(discard_failed_expectations=False)
             self.run_ge_checkpoint(batch_request)
-            return expectation_result
-        except Exception as e:
-            print(f"Error running expectation: {str(e)}")
-            raise
+            return results
     
+    @serialized
     def add_or_update_ge_checkpoint(self):
         """
         Create new GE checkpoint or update an existing one using the modern API.
@@ -229,10 +712,6 @@ action_list:
   - name: store_evaluation_params
     action:
       class_name: StoreEvaluationParametersAction
-  - name: update_data_docs
-    action:
-      class_name: UpdateDataDocsAction
-      site_names: []
 """
             # Add the new checkpoint
             self.context.add_checkpoint(**yaml.safe_load(checkpoint_config))
@@ -240,13 +719,14 @@ action_list:
             print(f"Error creating/updating checkpoint: {str(e)}")
             raise
 
+    @serialized
     def run_ge_checkpoint(self, batch_request):
         """
         Run GE checkpoint
         """
         self.add_or_update_ge_checkpoint()
 
-        self.context.run_checkpoint(
+        checkpoint_result = self.context.run_checkpoint(
                 checkpoint_name = self.checkpoint_name,
                 validations=[
                             {
@@ -255,5 +735,9 @@ action_list:
                             }
                             ],
                 )
+        # Data docs are rendered in the background, only for the new validation results
+        # and the suite page
+        DOCS_BUILDER.request_build(self.context, [*checkpoint_result.list_validation_result_identifiers(),
+                                                  ExpectationSuiteIdentifier(self.expectation_suite_name)])
 
 
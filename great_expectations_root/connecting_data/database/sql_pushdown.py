@@ -0,0 +1,271 @@
+"""
+SQL pushdown of the supported expectation types.
+
+A list of expectations is compiled into a single aggregate query over the table,
+fusing every row-level check into `COUNT(*) FILTER (WHERE ...)` columns of one scan.
+Unexpected values are only fetched afterwards, for failing expectations, and capped
+to a bounded sample per expectation.
+"""
+from decimal import Decimal
+
+from connecting_data.database.engine import pooled_connection, quote_identifier
+from helpers.expectation_results import (
+    PARTIAL_UNEXPECTED_COUNT,
+    build_aggregate_result,
+    build_exception_result,
+    build_map_result,
+    normalize_expectation,
+)
+
+# Row-level expectations: SQL condition selecting the unexpected non missing rows
+MAP_EXPECTATIONS = [
+    "expect_column_values_to_be_between",
+    "expect_column_values_to_be_in_set",
+    "expect_column_values_to_not_be_in_set",
+    "expect_column_values_to_match_regex",
+]
+# Aggregate expectations: SQL expression of the observed value
+AGGREGATE_FUNCTIONS = {
+    "expect_column_mean_to_be_between": "AVG({column})",
+    "expect_column_min_to_be_between": "MIN({column})",
+    "expect_column_max_to_be_between": "MAX({column})",
+    "expect_column_sum_to_be_between": "SUM({column})",
+    "expect_column_proportion_of_unique_values_to_be_between":
+        "COUNT(DISTINCT {column})::float / NULLIF(COUNT({column}), 0)",
+}
+PUSHDOWN_EXPECTATION_TYPES = MAP_EXPECTATIONS + list(AGGREGATE_FUNCTIONS) + [
+    "expect_column_values_to_not_be_null",
+    "expect_column_values_to_be_null",
+    "expect_column_values_to_be_unique",
+    "expect_table_row_count_to_be_between",
+]
+
+
+def _to_json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+class CompiledExpectation():
+    """
+    SQL fragments of one expectation within a fused suite query
+    """
+    def __init__(self, index, table, expectation):
+        self.index = index
+        self.table = table
+        self.expectation_type, self.kwargs = normalize_expectation(expectation)
+        if self.expectation_type not in PUSHDOWN_EXPECTATION_TYPES:
+            raise ValueError(f"Expectation type not supported by SQL pushdown: {self.expectation_type}")
+        self.params = {}
+        self.column = quote_identifier(self.kwargs["column"]) if "column" in self.kwargs else None
+        self.unexpected_condition = self._unexpected_condition()
+
+    def _param(self, name, value):
+        key = f"e{self.index}_{name}"
+        self.params[key] = value
+        return f"%({key})s"
+
+    def _unexpected_condition(self):
+        """
+        Condition selecting the unexpected rows, None for aggregate expectations
+        """
+        column = self.column
+        kwargs = self.kwargs
+        if self.expectation_type == "expect_column_values_to_not_be_null":
+            return f"{column} IS NULL"
+        if self.expectation_type == "expect_column_values_to_be_null":
+            return f"{column} IS NOT NULL"
+        if self.expectation_type == "expect_column_values_to_be_between":
+            bounds = []
+            if kwargs.get("min_value") is not None:
+                operator = ">" if kwargs.get("strict_min") else ">="
+                bounds.append(f"{column} {operator} {self._param('min', kwargs['min_value'])}")
+            if kwargs.get("max_value") is not None:
+                operator = "<" if kwargs.get("strict_max") else "<="
+                bounds.append(f"{column} {operator} {self._param('max', kwargs['max_value'])}")
+            return f"{column} IS NOT NULL AND NOT ({' AND '.join(bounds) or 'TRUE'})"
+        if self.expectation_type == "expect_column_values_to_be_in_set":
+            return f"{column} IS NOT NULL AND NOT ({column} = ANY({self._param('set', list(kwargs.get('value_set') or []))}))"
+        if self.expectation_type == "expect_column_values_to_not_be_in_set":
+            return f"{column} = ANY({self._param('set', list(kwargs.get('value_set') or []))})"
+        if self.expectation_type == "expect_column_values_to_match_regex":
+            # Casting to text lets the regex run on non text columns as well
+            return f"{column} IS NOT NULL AND CAST({column} AS TEXT) !~ {self._param('regex', kwargs['regex'])}"
+        return None
+
+    def select_list(self):
+        """
+        Aggregate columns contributed to the fused suite query
+        """
+        prefix = f"e{self.index}"
+        if self.unexpected_condition is not None:
+            select_list = [f"COUNT(*) AS {prefix}_elements",
+                           f"COUNT(*) FILTER (WHERE {self.column} IS NULL) AS {prefix}_missing",
+                           f"COUNT(*) FILTER (WHERE {self.unexpected_condition}) AS {prefix}_unexpected"]
+        elif self.expectation_type == "expect_column_values_to_be_unique":
+            # Rows belonging to a duplicated value, computed by a grouped subquery
+            select_list = [f"COUNT(*) AS {prefix}_elements",
+                           f"COUNT(*) FILTER (WHERE {self.column} IS NULL) AS {prefix}_missing",
+                           f"(SELECT COALESCE(SUM(d.n), 0) FROM (SELECT COUNT(*) AS n FROM {self.table} "
+                           f"WHERE {self.column} IS NOT NULL GROUP BY {self.column} HAVING COUNT(*) > 1) d) "
+                           f"AS {prefix}_unexpected"]
+        elif self.expectation_type == "expect_table_row_count_to_be_between":
+            select_list = [f"COUNT(*) AS {prefix}_observed"]
+        else:
+            function = AGGREGATE_FUNCTIONS[self.expectation_type].format(column=self.column)
+            select_list = [f"{function} AS {prefix}_observed"]
+        return select_list
+
+    def sample_query(self):
+        """
+        Bounded query returning a sample of unexpected values as a json array
+        """
+        if self.expectation_type == "expect_column_values_to_be_unique":
+            inner = (f"SELECT {self.column} AS v FROM {self.table} WHERE {self.column} IS NOT NULL "
+                     f"GROUP BY {self.column} HAVING COUNT(*) > 1 LIMIT {PARTIAL_UNEXPECTED_COUNT}")
+        elif self.unexpected_condition is not None:
+            inner = (f"SELECT {self.column} AS v FROM {self.table} "
+                     f"WHERE {self.unexpected_condition} LIMIT {PARTIAL_UNEXPECTED_COUNT}")
+        else:
+            return None
+        return f"(SELECT json_agg(s.v) FROM ({inner}) s) AS e{self.index}_sample"
+
+    def result(self, row, samples):
+        """
+        Build the GE compatible result dict from the fused query row
+        """
+        prefix = f"e{self.index}"
+        if f"{prefix}_observed" in row:
+            observed_value = _to_json_value(row[f"{prefix}_observed"])
+            return build_aggregate_result(self.expectation_type, self.kwargs, observed_value)
+        count_missing = self.expectation_type in ("expect_column_values_to_not_be_null",
+                                                  "expect_column_values_to_be_null")
+        unexpected_count = int(row[f"{prefix}_unexpected"])
+        if self.expectation_type == "expect_column_values_to_not_be_null":
+            partial_unexpected_list = [None] * min(unexpected_count, PARTIAL_UNEXPECTED_COUNT)
+        else:
+            partial_unexpected_list = [_to_json_value(v) for v in samples.get(f"{prefix}_sample") or []]
+        return build_map_result(self.expectation_type, self.kwargs,
+                                int(row[f"{prefix}_elements"]), int(row[f"{prefix}_missing"]),
+                                unexpected_count, partial_unexpected_list,
+                                count_missing=count_missing)
+
+
+def compile_suite(table_name, expectations):
+    """
+    Compile the expectations pushdown supports
+    Returns:
+        (list, dict) : The compiled expectations and the errors of the other ones by index
+    """
+    table = f"public.{quote_identifier(table_name)}"
+    compiled = []
+    errors = {}
+    for index, expectation in enumerate(expectations):
+        try:
+            compiled.append(CompiledExpectation(index, table, expectation))
+        except Exception as e:
+            errors[index] = e
+    return compiled, errors
+
+
+def fused_query(compiled):
+    """
+    One aggregate query scanning the table once for all the compiled expectations
+    Returns:
+        (str, dict) : SQL query and its parameters
+    """
+    select_list = [column for expectation in compiled for column in expectation.select_list()]
+    params = {key: value for expectation in compiled for key, value in expectation.params.items()}
+    return f"SELECT {', '.join(select_list)} FROM {compiled[0].table}", params
+
+
+def _fetch_row(cursor, query, params):
+    cursor.execute(query, params)
+    row = cursor.fetchone()
+    return dict(zip([description[0] for description in cursor.description], row))
+
+
+def _fetch_fused(conn, cursor, compiled, errors):
+    """
+    Row of the fused query. When it fails, each expectation is queried on its own so
+    that one bad fragment (e.g. a bound of the wrong type) only fails its expectation.
+    """
+    try:
+        return _fetch_row(cursor, *fused_query(compiled))
+    except Exception as e:
+        conn.rollback()
+        if len(compiled) == 1:
+            errors[compiled[0].index] = e
+            return {}
+        print(f"Fused pushdown query failed, running the expectations one by one: {str(e)}")
+    row = {}
+    for expectation in compiled:
+        try:
+            row.update(_fetch_row(cursor, *fused_query([expectation])))
+        except Exception as e:
+            conn.rollback()
+            errors[expectation.index] = e
+    return row
+
+
+def _fetch_samples(conn, cursor, failing):
+    """
+    Unexpected value samples of the failing expectations, an empty sample for the ones
+    whose sample query fails
+    """
+    sample_params = {key: value for expectation in failing for key, value in expectation.params.items()}
+    try:
+        return _fetch_row(cursor, f"SELECT {', '.join(e.sample_query() for e in failing)}", sample_params)
+    except Exception as e:
+        conn.rollback()
+        if len(failing) == 1:
+            return {}
+        print(f"Pushdown sample query failed, fetching the samples one by one: {str(e)}")
+    samples = {}
+    for expectation in failing:
+        samples.update(_fetch_samples(conn, cursor, [expectation]))
+    return samples
+
+
+def run_pushdown(table_name, expectations):
+    """
+    Evaluate expectations on the database server.
+    One fused aggregate query answers the whole suite; a second bounded query fetches
+    unexpected value samples only when some row-level expectation failed. An expectation
+    that cannot be compiled, queried or checked gets an exception result of its own.
+    """
+    compiled, errors = compile_suite(table_name, expectations)
+    row = {}
+    samples = {}
+    if compiled:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                row = _fetch_fused(conn, cursor, compiled, errors)
+                failing = [expectation for expectation in compiled
+                           if expectation.index not in errors
+                           and int(row.get(f"e{expectation.index}_unexpected") or 0) > 0
+                           and expectation.expectation_type != "expect_column_values_to_not_be_null"]
+                if failing:
+                    samples = _fetch_samples(conn, cursor, failing)
+            finally:
+                cursor.close()
+                conn.rollback()
+
+    results = {}
+    for expectation in compiled:
+        if expectation.index in errors:
+            continue
+        try:
+            results[expectation.index] = expectation.result(row, samples)
+        except Exception as e:
+            errors[expectation.index] = e
+    for index, error in errors.items():
+        try:
+            expectation_type, kwargs = normalize_expectation(expectations[index])
+        except ValueError:
+            expectation_type, kwargs = str(expectations[index]), {}
+        print(f"Error running pushdown expectation {expectation_type}: {str(error)}")
+        results[index] = build_exception_result(expectation_type, kwargs, error)
+    return [results[index] for index in range(len(expectations))]
@@ -0,0 +1,401 @@
+"""
+Streaming (chunked) validation of local files.
+
+Each supported expectation keeps a small aggregate state that is updated chunk by
+chunk, so peak memory depends on the chunk size and not on the size of the file.
+States are mergeable, which lets other engines reuse them on partitions of a frame.
+"""
+import time
+import numpy as np
+import pandas as pd
+
+from connecting_data.filesystem.columnar_cache import get_columnar_cache
+from helpers.expectation_results import (
+    PARTIAL_UNEXPECTED_COUNT,
+    build_aggregate_result,
+    build_exception_result,
+    build_map_result,
+    normalize_expectation,
+)
+
+# Rows per chunk read from disk
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def to_python(value):
+    """
+    Convert numpy / pandas scalars to plain python values (JSON friendly)
+    """
+    if value is None:
+        return None
+    if hasattr(value, "item"):
+        try:
+            return value.item()
+        except (ValueError, AttributeError):
+            pass
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+
+def categorical_mask(values, category_mask):
+    """
+    Broadcast a boolean mask computed once per category to the non missing values
+    of a categorical column, so the check runs on the integer codes
+    """
+    return pd.Series(np.asarray(category_mask)[values.cat.codes.to_numpy()], index=values.index)
+
+
+def is_categorical(values):
+    return isinstance(values.dtype, pd.CategoricalDtype)
+
+
+class ExpectationState():
+    """
+    Aggregate state of one expectation over a stream of DataFrame chunks
+    """
+    def __init__(self, expectation_type, kwargs):
+        self.expectation_type = expectation_type
+        self.kwargs = kwargs
+        self.column = kwargs.get("column")
+        # Time spent updating this state, reported by the batch APIs
+        self.elapsed_seconds = 0.0
+
+    @property
+    def columns(self):
+        """
+        Columns that must be read to evaluate the expectation
+        """
+        return [self.column] if self.column is not None else []
+
+    def update(self, chunk):
+        raise NotImplementedError
+
+    def merge(self, other):
+        raise NotImplementedError
+
+    def result(self):
+        raise NotImplementedError
+
+
+class ColumnMapState(ExpectationState):
+    """
+    Row-level expectation: counts elements, missing and unexpected values
+    """
+    count_missing = False
+
+    def __init__(self, expectation_type, kwargs):
+        super().__init__(expectation_type, kwargs)
+        self.element_count = 0
+        self.missing_count = 0
+        self.unexpected_count = 0
+        self.partial_unexpected_list = []
+
+    def unexpected_mask(self, values):
+        """
+        Boolean mask of unexpected values among the non missing values of a chunk
+        """
+        raise NotImplementedError
+
+    def update(self, chunk):
+        series = chunk[self.column]
+        missing = series.isna()
+        values = series[~missing]
+        mask = self.unexpected_mask(values)
+        self.element_count += len(series)
+        self.missing_count += int(missing.sum())
+        self.unexpected_count += int(mask.sum())
+        self._keep_partial(values[mask])
+
+    def _keep_partial(self, unexpected):
+        room = PARTIAL_UNEXPECTED_COUNT - len(self.partial_unexpected_list)
+        if room > 0 and len(unexpected):
+            self.partial_unexpected_list.extend(to_python(v) for v in unexpected.iloc[:room])
+
+    def merge(self, other):
+        self.element_count += other.element_count
+        self.missing_count += other.missing_count
+        self.unexpected_count += other.unexpected_count
+        room = PARTIAL_UNEXPECTED_COUNT - len(self.partial_unexpected_list)
+        self.partial_unexpected_list.extend(other.partial_unexpected_list[:max(room, 0)])
+        return self
+
+    def result(self):
+        return build_map_result(self.expectation_type, self.kwargs,
+                                self.element_count, self.missing_count,
+                                self.unexpected_count, self.partial_unexpected_list,
+                                count_missing=self.count_missing)
+
+
+class NotNullState(ColumnMapState):
+    count_missing = True
+
+    def update(self, chunk):
+        missing = chunk[self.column].isna()
+        self.element_count += len(missing)
+        self.missing_count += int(missing.sum())
+        self.unexpected_count += int(missing.sum())
+        room = PARTIAL_UNEXPECTED_COUNT - len(self.partial_unexpected_list)
+        self.partial_unexpected_list.extend([None] * min(room, int(missing.sum())))
+
+
+class NullState(ColumnMapState):
+    count_missing = True
+
+    def update(self, chunk):
+        series = chunk[self.column]
+        present = series[series.notna()]
+        self.element_count += len(series)
+        self.missing_count += len(series) - len(present)
+        self.unexpected_count += len(present)
+        self._keep_partial(present)
+
+
+class BetweenState(ColumnMapState):
+    def unexpected_mask(self, values):
+        min_value = self.kwargs.get("min_value")
+        max_value = self.kwargs.get("max_value")
+        expected = pd.Series(True, index=values.index)
+        if min_value is not None:
+            expected &= values > min_value if self.kwargs.get("strict_min") else values >= min_value
+        if max_value is not None:
+            expected &= values < max_value if self.kwargs.get("strict_max") else values <= max_value
+        return ~expected
+
+
+class InSetState(ColumnMapState):
+    def unexpected_mask(self, values):
+        value_set = self.kwargs.get("value_set") or []
+        if is_categorical(values):
+            return categorical_mask(values, ~values.cat.categories.isin(value_set))
+        return ~values.isin(value_set)
+
+
+class NotInSetState(ColumnMapState):
+    def unexpected_mask(self, values):
+        value_set = self.kwargs.get("value_set") or []
+        if is_categorical(values):
+            return categorical_mask(values, values.cat.categories.isin(value_set))
+        return values.isin(value_set)
+
+
+class MatchRegexState(ColumnMapState):
+    def unexpected_mask(self, values):
+        regex = self.kwargs["regex"]
+        if is_categorical(values):
+            categories = pd.Series(values.cat.categories.astype(str))
+            return categorical_mask(values, ~categories.str.contains(regex, regex=True))
+        return ~values.astype(str).str.contains(regex, regex=True)
+
+
+class UniqueState(ColumnMapState):
+    """
+    Uniqueness needs the count of every distinct value, so its state grows with
+    the cardinality of the column (not with the number of rows).
+    """
+    def __init__(self, expectation_type, kwargs):
+        super().__init__(expectation_type, kwargs)
+        self.value_counts = pd.Series(dtype="int64")
+
+    def update(self, chunk):
+        series = chunk[self.column]
+        self.element_count += len(series)
+        self.missing_count += int(series.isna().sum())
+        self.value_counts = self.value_counts.add(series.value_counts(), fill_value=0)
+
+    def merge(self, other):
+        self.element_count += other.element_count
+        self.missing_count += other.missing_count
+        self.value_counts = self.value_counts.add(other.value_counts, fill_value=0)
+        return self
+
+    def result(self):
+        duplicated = self.value_counts[self.value_counts > 1]
+        self.unexpected_count = int(duplicated.sum())
+        self.partial_unexpected_list = [to_python(v) for v in duplicated.index[:PARTIAL_UNEXPECTED_COUNT]]
+        return super().result()
+
+
+class RowCountState(ExpectationState):
+    def __init__(self, expectation_type, kwargs):
+        super().__init__(expectation_type, kwargs)
+        self.row_count = 0
+
+    def update(self, chunk):
+        self.row_count += len(chunk)
+
+    def merge(self, other):
+        self.row_count += other.row_count
+        return self
+
+    def result(self):
+        return build_aggregate_result(self.expectation_type, self.kwargs, self.row_count)
+
+
+class ColumnStatsState(ExpectationState):
+    """
+    Running count / sum / min / max of the non missing values of a column
+    """
+    def __init__(self, expectation_type, kwargs):
+        super().__init__(expectation_type, kwargs)
+        self.count = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def update(self, chunk):
+        values = chunk[self.column].dropna()
+        if values.empty:
+            return
+        self.count += len(values)
+        if self.expectation_type in ("expect_column_mean_to_be_between", "expect_column_sum_to_be_between"):
+            self.sum += to_python(values.sum())
+        self._update_bounds(to_python(values.min()), to_python(values.max()))
+
+    def _update_bounds(self, chunk_min, chunk_max):
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+
+    def merge(self, other):
+        self.count += other.count
+        self.sum += other.sum
+        if other.count:
+            self._update_bounds(other.min, other.max)
+        return self
+
+    def observed_value(self):
+        if self.expectation_type == "expect_column_mean_to_be_between":
+            return self.sum / self.count if self.count else None
+        if self.expectation_type == "expect_column_sum_to_be_between":
+            return self.sum
+        if self.expectation_type == "expect_column_min_to_be_between":
+            return self.min
+        return self.max
+
+    def result(self):
+        return build_aggregate_result(self.expectation_type, self.kwargs, self.observed_value())
+
+
+class ProportionUniqueState(ExpectationState):
+    def __init__(self, expectation_type, kwargs):
+        super().__init__(expectation_type, kwargs)
+        self.count = 0
+        self.distinct_values = set()
+
+    def update(self, chunk):
+        values = chunk[self.column].dropna()
+        self.count += len(values)
+        self.distinct_values.update(values.unique())
+
+    def merge(self, other):
+        self.count += other.count
+        self.distinct_values |= other.distinct_values
+        return self
+
+    def result(self):
+        observed = len(self.distinct_values) / self.count if self.count else None
+        return build_aggregate_result(self.expectation_type, self.kwargs, observed)
+
+
+EXPECTATION_STATES = {
+    "expect_column_values_to_not_be_null": NotNullState,
+    "expect_column_values_to_be_null": NullState,
+    "expect_column_values_to_be_between": BetweenState,
+    "expect_column_values_to_be_in_set": InSetState,
+    "expect_column_values_to_not_be_in_set": NotInSetState,
+    "expect_column_values_to_match_regex": MatchRegexState,
+    "expect_column_values_to_be_unique": UniqueState,
+    "expect_table_row_count_to_be_between": RowCountState,
+    "expect_column_mean_to_be_between": ColumnStatsState,
+    "expect_column_min_to_be_between": ColumnStatsState,
+    "expect_column_max_to_be_between": ColumnStatsState,
+    "expect_column_sum_to_be_between": ColumnStatsState,
+    "expect_column_proportion_of_unique_values_to_be_between": ProportionUniqueState,
+}
+
+
+def build_state(expectation):
+    """
+    Create the aggregate state for an expectation dict or legacy expectation string
+    """
+    expectation_type, kwargs = normalize_expectation(expectation)
+    state_class = EXPECTATION_STATES.get(expectation_type)
+    if state_class is None:
+        raise ValueError(f"Expectation type not supported in streaming mode: {expectation_type}")
+    return state_class(expectation_type, kwargs)
+
+
+def required_columns(states):
+    """
+    Union of the columns needed by a list of states, in first-seen order
+    """
+    columns = []
+    for state in states:
+        for column in state.columns:
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+def validate_chunks(chunks, states):
+    """
+    Feed every chunk to every state and return one result dict per state
+    """
+    failed = {}
+    for chunk in chunks:
+        for index, state in enumerate(states):
+            if index in failed:
+                continue
+            start = time.perf_counter()
+            try:
+                state.update(chunk)
+            except Exception as e:
+                failed[index] = e
+            state.elapsed_seconds += time.perf_counter() - start
+    return [build_exception_result(state.expectation_type, state.kwargs, failed[index])
+            if index in failed else state.result()
+            for index, state in enumerate(states)]
+
+
+def iter_csv_chunks(file_path, columns=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Read a csv file lazily in chunks of `chunksize` rows, only loading `columns`
+    """
+    usecols = columns if columns else None
+    if columns is not None and not columns:
+        # Only the row count is needed: read a single column
+        usecols = [0]
+    return pd.read_csv(file_path, usecols=usecols, chunksize=chunksize)
+
+
+def iter_file_chunks(file_path, columns=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Read a csv file in chunks, from its columnar cache copy when available
+    """
+    try:
+        cache = get_columnar_cache(file_path)
+        if cache.get(file_path) is not None:
+            return cache.iter_batches(file_path, columns, chunksize)
+    except Exception as e:
+        print(f"Columnar cache unavailable for {file_path}: {str(e)}")
+    return iter_csv_chunks(file_path, columns, chunksize)
+
+
+def run_chunked_expectations(file_path, expectations, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Validate a list of expectations against a csv file in one streaming pass
+    Params:
+        file_path (str) : Path of the csv file
+        expectations (list) : Expectation dicts or legacy expectation strings
+        chunksize (int) : Rows per chunk, bounds the peak memory
+    """
+    states = [build_state(expectation) for expectation in expectations]
+    chunks = iter_file_chunks(file_path, required_columns(states), chunksize)
+    return validate_chunks(chunks, states)
+
+
+def run_chunked_expectation(file_path, expectation, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Validate a single expectation against a csv file in one streaming pass
+    """
+    return run_chunked_expectations(file_path, [expectation], chunksize)[0]
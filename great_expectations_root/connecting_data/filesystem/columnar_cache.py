@@ -0,0 +1,254 @@
+"""
+Columnar (Parquet) cache for the csv files of the local data directory.
+
+Each csv file is converted once to a Parquet copy stored next to it in
+`.columnar_cache/`. The cache key is the path, size and mtime of the csv file, so an
+edited file is converted again. Reads only load the requested columns, and the total
+size of the cache is kept under a disk budget by evicting the least recently used copies.
+
+The copy is typed like pd.read_csv reads the file: the type of each column is the
+narrowest of bool, int64, float64 and string fitting every value of the file (not only
+the first block), the pandas missing value markers are nulls, and dates and times stay
+strings.
+"""
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+from dotenv import load_dotenv, find_dotenv
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, reads fall back to csv parsing
+    pa = None
+    pc = None
+    pa_csv = None
+    pq = None
+
+load_dotenv(find_dotenv())
+
+CACHE_DIR_NAME = ".columnar_cache"
+# Disk budget of the cache in bytes (default 2 GiB)
+CACHE_MAX_BYTES = int(os.environ.get('COLUMNAR_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+# Values read as missing by pd.read_csv
+NULL_VALUES = ["", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+               "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"]
+# Values read as booleans by pd.read_csv
+TRUE_VALUES = ["True", "TRUE", "true"]
+FALSE_VALUES = ["False", "FALSE", "false"]
+# Candidate column types, narrowest first
+COLUMN_TYPES = ["bool", "int64", "float64", "string"]
+
+
+def fits_type(values, type_name):
+    """
+    Whether every non null value of a string array converts to `type_name`
+    """
+    values = values.drop_null()
+    if type_name == "bool":
+        return bool(pc.all(pc.is_in(values, value_set=pa.array(TRUE_VALUES + FALSE_VALUES))).as_py() in (True, None))
+    try:
+        pc.cast(values, pa.type_for_alias(type_name))
+        return True
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return False
+
+
+def infer_column_types(file_path):
+    """
+    Narrowest type of each column fitting all of its values, in one pass over the file
+    read as strings. Columns without any value are float64, like in pandas.
+    """
+    with open(file_path, newline="") as f:
+        names = next(csv.reader(f))
+    convert_options = pa_csv.ConvertOptions(column_types={name: pa.string() for name in names},
+                                            null_values=NULL_VALUES, strings_can_be_null=True,
+                                            quoted_strings_can_be_null=True)
+    candidates = {name: 0 for name in names}
+    seen = {name: False for name in names}
+    for batch in pa_csv.open_csv(file_path, convert_options=convert_options):
+        for name in names:
+            values = batch.column(name)
+            seen[name] = seen[name] or values.null_count < len(values)
+            while COLUMN_TYPES[candidates[name]] != "string" and not fits_type(values, COLUMN_TYPES[candidates[name]]):
+                candidates[name] += 1
+    return {name: pa.type_for_alias(COLUMN_TYPES[candidates[name]] if seen[name] else "float64")
+            for name in names}
+
+
+def file_fingerprint(file_path):
+    """
+    Identify a version of a file by its absolute path, size and modification time
+    """
+    stat = os.stat(file_path)
+    return {"path": os.path.abspath(file_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def fingerprint_key(fingerprint):
+    """
+    Stable hash of a file fingerprint
+    """
+    return hashlib.sha1(json.dumps(fingerprint, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ColumnarCache():
+    """
+    LRU cache of Parquet copies of csv files under a disk budget
+    """
+    def __init__(self, cache_dir, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+        # Versions whose copy alone exceeds the budget, not worth converting again
+        self._oversized = set()
+        # Versions that failed to convert, read from the csv file
+        self._failed = set()
+
+    @property
+    def enabled(self):
+        return pq is not None
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, indent=1)
+        os.replace(tmp_path, self.index_path)
+
+    def _remove(self, index, key):
+        entry = index.pop(key, None)
+        if entry is not None:
+            try:
+                os.remove(os.path.join(self.cache_dir, entry["file"]))
+            except OSError:
+                pass
+
+    def _convert(self, file_path, parquet_path):
+        """
+        Stream the csv file into a Parquet file, one row group per csv block, with the
+        column types inferred on the whole file
+        """
+        tmp_path = f"{parquet_path}.tmp"
+        convert_options = pa_csv.ConvertOptions(column_types=infer_column_types(file_path),
+                                                null_values=NULL_VALUES, true_values=TRUE_VALUES,
+                                                false_values=FALSE_VALUES, strings_can_be_null=True,
+                                                quoted_strings_can_be_null=True)
+        writer = None
+        try:
+            for batch in pa_csv.open_csv(file_path, convert_options=convert_options):
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, batch.schema)
+                writer.write_batch(batch)
+            if writer is None:
+                raise ValueError(f"File {file_path} is empty")
+            writer.close()
+            writer = None
+            os.replace(tmp_path, parquet_path)
+        finally:
+            if writer is not None:
+                writer.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _evict(self, index, keep=None):
+        """
+        Drop least recently used copies until the cache fits in its budget
+        """
+        total = sum(entry["bytes"] for entry in index.values())
+        for key in sorted(index, key=lambda k: index[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= index[key]["bytes"]
+            self._remove(index, key)
+        return total
+
+    def get(self, file_path):
+        """
+        Return the path of an up to date Parquet copy of `file_path`, building it if
+        needed. Returns None when pyarrow is missing or the copy exceeds the budget.
+        """
+        if not self.enabled:
+            return None
+        fingerprint = file_fingerprint(file_path)
+        key = fingerprint_key(fingerprint)
+        if key in self._oversized or key in self._failed:
+            return None
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            index = self._load_index()
+            entry = index.get(key)
+            parquet_path = os.path.join(self.cache_dir, f"{key}.parquet")
+            if entry is None or not os.path.exists(parquet_path):
+                # Drop copies of older versions of the same file
+                for stale_key in [k for k, e in index.items() if e["source"] == fingerprint["path"]]:
+                    self._remove(index, stale_key)
+                print(f"Building columnar cache for {file_path}")
+                try:
+                    self._convert(file_path, parquet_path)
+                except Exception as e:
+                    print(f"Unable to build the columnar cache for {file_path}, reading the csv file: {str(e)}")
+                    self._failed.add(key)
+                    self._save_index(index)
+                    return None
+                entry = {"source": fingerprint["path"], "file": f"{key}.parquet",
+                         "bytes": os.path.getsize(parquet_path)}
+                index[key] = entry
+            entry["last_access"] = time.time()
+            if self._evict(index, keep=key) > self.max_bytes:
+                # The copy alone does not fit in the budget
+                self._remove(index, key)
+                self._oversized.add(key)
+                parquet_path = None
+            self._save_index(index)
+        return parquet_path
+
+    def read(self, file_path, columns=None):
+        """
+        Read a csv file from its columnar copy, loading only `columns`
+        """
+        parquet_path = self.get(file_path)
+        if parquet_path is None:
+            return pd.read_csv(file_path, usecols=columns)
+        return pd.read_parquet(parquet_path, columns=columns)
+
+    def iter_batches(self, file_path, columns=None, batch_size=100_000):
+        """
+        Iterate over a csv file in DataFrame batches read from its columnar copy
+        """
+        parquet_path = self.get(file_path)
+        if parquet_path is None:
+            yield from pd.read_csv(file_path, usecols=columns or None, chunksize=batch_size)
+            return
+        parquet_file = pq.ParquetFile(parquet_path)
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_columnar_cache(file_path):
+    """
+    Shared cache of the directory containing `file_path`
+    """
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(file_path)), CACHE_DIR_NAME)
+    with _caches_lock:
+        if cache_dir not in _caches:
+            _caches[cache_dir] = ColumnarCache(cache_dir)
+        return _caches[cache_dir]
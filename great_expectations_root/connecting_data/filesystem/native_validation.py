@@ -0,0 +1,375 @@
+"""
+Native validation of in-memory DataFrames with vectorized NumPy / pandas kernels.
+
+Interactive checks skip the GE machinery (datasource, batch request, validator,
+metric resolution): each supported expectation type is a kernel computing its
+result dict directly on the column, with the same keys GE results have. Checks
+that cannot be vectorized (json, dateutil) are evaluated once per distinct value
+and broadcast back to the rows; categorical columns are always checked on their
+categories and broadcast through the integer codes.
+"""
+import json
+import time
+import numpy as np
+import pandas as pd
+from dateutil import parser as dateutil_parser
+
+from connecting_data.filesystem.chunked_validation import categorical_mask, is_categorical, to_python
+from helpers.expectation_results import (
+    PARTIAL_UNEXPECTED_COUNT,
+    build_aggregate_result,
+    build_exception_result,
+    build_map_result,
+    build_result,
+    normalize_expectation,
+)
+
+# Text checks run on the distinct values when there are at most this share of them
+DISTINCT_RATIO = 0.5
+# Kwargs the kernels do not implement, expectations using them are left to GE
+UNSUPPORTED_KWARGS = ["row_condition", "parse_strings_as_datetimes"]
+
+
+def unique_mask(values, check):
+    """
+    Evaluate a scalar check once per distinct value and broadcast it to the rows
+    Params:
+        check (callable) : value -> True when the value is unexpected
+    """
+    if is_categorical(values):
+        return categorical_mask(values, [check(value) for value in values.cat.categories])
+    codes, uniques = pd.factorize(values)
+    return pd.Series(np.fromiter((check(value) for value in uniques), dtype=bool, count=len(uniques))[codes],
+                     index=values.index)
+
+
+def vector_mask(values, check):
+    """
+    Evaluate a vectorized check on the values, or on the distinct values of a categorical
+    or repetitive text column
+    Params:
+        check (callable) : Series -> boolean Series (or array), True for unexpected values
+    """
+    if is_categorical(values):
+        return categorical_mask(values, np.asarray(check(pd.Series(values.cat.categories))))
+    if pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values):
+        codes, uniques = pd.factorize(values)
+        if len(uniques) <= len(values) * DISTINCT_RATIO:
+            return pd.Series(np.asarray(check(pd.Series(uniques)))[codes], index=values.index)
+    return pd.Series(np.asarray(check(values)), index=values.index)
+
+
+def partial_list(unexpected):
+    return [to_python(value) for value in unexpected.iloc[:PARTIAL_UNEXPECTED_COUNT]]
+
+
+def map_kernel(unexpected_mask):
+    """
+    Kernel of a row-level expectation from the mask of its unexpected non missing values
+    """
+    def kernel(dataframe, expectation_type, kwargs):
+        series = dataframe[kwargs["column"]]
+        missing = series.isna()
+        missing_count = int(missing.sum())
+        values = series[~missing] if missing_count else series
+        mask = unexpected_mask(values, kwargs).to_numpy()
+        unexpected_count = int(mask.sum())
+        return build_map_result(expectation_type, kwargs, len(series), missing_count, unexpected_count,
+                                partial_list(values[mask]) if unexpected_count else [], count_missing=False)
+    return kernel
+
+
+def not_null_kernel(dataframe, expectation_type, kwargs):
+    missing_count = int(dataframe[kwargs["column"]].isna().sum())
+    return build_map_result(expectation_type, kwargs, len(dataframe), missing_count, missing_count,
+                            [None] * min(missing_count, PARTIAL_UNEXPECTED_COUNT))
+
+
+def null_kernel(dataframe, expectation_type, kwargs):
+    series = dataframe[kwargs["column"]]
+    present = series[series.notna()]
+    return build_map_result(expectation_type, kwargs, len(series), len(series) - len(present), len(present),
+                            partial_list(present))
+
+
+def unique_kernel(dataframe, expectation_type, kwargs):
+    series = dataframe[kwargs["column"]]
+    missing = series.isna()
+    values = series[~missing]
+    duplicated = values.duplicated(keep=False).to_numpy()
+    return build_map_result(expectation_type, kwargs, len(series), int(missing.sum()), int(duplicated.sum()),
+                            partial_list(values[duplicated]), count_missing=False)
+
+
+def between_mask(values, kwargs):
+    def check(values):
+        min_value, max_value = kwargs.get("min_value"), kwargs.get("max_value")
+        expected = np.ones(len(values), dtype=bool)
+        if min_value is not None:
+            expected &= (values > min_value if kwargs.get("strict_min") else values >= min_value).to_numpy()
+        if max_value is not None:
+            expected &= (values < max_value if kwargs.get("strict_max") else values <= max_value).to_numpy()
+        return ~expected
+    return vector_mask(values, check)
+
+
+def in_set_mask(values, kwargs):
+    return vector_mask(values, lambda values: ~values.isin(kwargs.get("value_set") or []))
+
+
+def not_in_set_mask(values, kwargs):
+    return vector_mask(values, lambda values: values.isin(kwargs.get("value_set") or []))
+
+
+def regex_mask(values, kwargs):
+    return vector_mask(values, lambda values: ~values.astype(str).str.contains(kwargs["regex"], regex=True))
+
+
+def regex_list_mask(values, kwargs):
+    def check(values):
+        text = values.astype(str)
+        matches = np.array([text.str.contains(regex, regex=True).to_numpy() for regex in kwargs["regex_list"]])
+        return ~(matches.all(axis=0) if kwargs.get("match_on") == "all" else matches.any(axis=0))
+    return vector_mask(values, check)
+
+
+def strftime_mask(values, kwargs):
+    def check(values):
+        parsed = pd.to_datetime(values.astype(str), format=kwargs["strftime_format"], errors="coerce")
+        return parsed.isna()
+    return vector_mask(values, check)
+
+
+def _not_dateutil_parseable(value):
+    try:
+        dateutil_parser.parse(str(value))
+        return False
+    except (ValueError, OverflowError):
+        return True
+
+
+def dateutil_mask(values, kwargs):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.Series(False, index=values.index)
+    return unique_mask(values, _not_dateutil_parseable)
+
+
+def _not_json_parseable(value):
+    try:
+        json.loads(value)
+        return False
+    except (TypeError, ValueError):
+        return True
+
+
+def json_parseable_mask(values, kwargs):
+    return unique_mask(values, _not_json_parseable)
+
+
+def json_schema_mask(values, kwargs):
+    import jsonschema
+    validator = jsonschema.Draft7Validator(kwargs["json_schema"])
+
+    def check(value):
+        try:
+            return not validator.is_valid(json.loads(value))
+        except (TypeError, ValueError):
+            return True
+    return unique_mask(values, check)
+
+
+def monotonic_mask(decreasing):
+    """
+    Each value is compared to the previous non missing value, like GE does
+    """
+    def mask(values, kwargs):
+        if is_categorical(values):
+            values = values.astype(values.cat.categories.dtype)
+        previous = values.shift(1)
+        if decreasing:
+            unexpected = values >= previous if kwargs.get("strictly") else values > previous
+        else:
+            unexpected = values <= previous if kwargs.get("strictly") else values < previous
+        return unexpected.fillna(False).astype(bool)
+    return mask
+
+
+def lengths_mask(values, kwargs):
+    def check(values):
+        lengths = values.astype(str).str.len()
+        if "value" in kwargs:
+            return (lengths != kwargs["value"]).to_numpy()
+        return between_mask(lengths, kwargs).to_numpy()
+    return vector_mask(values, check)
+
+
+def column_values(dataframe, kwargs, decode=True):
+    """
+    Non missing values of the column
+    Params:
+        decode (bool) : Decode categoricals to their category dtype, for order based statistics
+    """
+    values = dataframe[kwargs["column"]].dropna()
+    if decode and is_categorical(values):
+        values = values.astype(values.cat.categories.dtype)
+    return values
+
+
+def aggregate_kernel(observe, decode=True):
+    """
+    Kernel of an aggregate expectation checked against min_value / max_value
+    """
+    def kernel(dataframe, expectation_type, kwargs):
+        values = column_values(dataframe, kwargs, decode)
+        observed = to_python(observe(values)) if len(values) else None
+        return build_aggregate_result(expectation_type, kwargs, observed)
+    return kernel
+
+
+def distinct_values_kernel(dataframe, expectation_type, kwargs):
+    series = dataframe[kwargs["column"]]
+    if is_categorical(series):
+        distinct = [value for value, count in series.value_counts(sort=False).items() if count]
+    else:
+        distinct = series.dropna().unique()
+    observed = sorted(to_python(value) for value in distinct)
+    value_set = set(kwargs.get("value_set") or [])
+    if expectation_type == "expect_column_distinct_values_to_be_in_set":
+        success = set(observed) <= value_set
+    elif expectation_type == "expect_column_distinct_values_to_contain_set":
+        success = value_set <= set(observed)
+    else:
+        success = set(observed) == value_set
+    return build_result(expectation_type, kwargs, success, {"observed_value": observed})
+
+
+def quantile_kernel(dataframe, expectation_type, kwargs):
+    quantiles = kwargs["quantile_ranges"]["quantiles"]
+    value_ranges = kwargs["quantile_ranges"]["value_ranges"]
+    values = column_values(dataframe, kwargs)
+    observed = [to_python(value) for value in values.quantile(quantiles, interpolation="nearest")] if len(values) else []
+    success = len(observed) == len(value_ranges) and all(
+        (low is None or value >= low) and (high is None or value <= high)
+        for value, (low, high) in zip(observed, value_ranges))
+    return build_result(expectation_type, kwargs, success,
+                        {"observed_value": {"quantiles": quantiles, "values": observed}})
+
+
+def most_common_value_kernel(dataframe, expectation_type, kwargs):
+    modes = [to_python(value) for value in column_values(dataframe, kwargs, decode=False).mode()]
+    matches = len(set(kwargs.get("value_set") or []).intersection(modes))
+    success = matches > 0 if kwargs.get("ties_okay") else len(modes) == 1 and matches == 1
+    return build_result(expectation_type, kwargs, success, {"observed_value": modes})
+
+
+def row_count_kernel(dataframe, expectation_type, kwargs):
+    return build_aggregate_result(expectation_type, kwargs, len(dataframe))
+
+
+def column_count_kernel(dataframe, expectation_type, kwargs):
+    return build_aggregate_result(expectation_type, kwargs, len(dataframe.columns))
+
+
+def equal_kernel(observe):
+    """
+    Kernel of an expectation whose observed value must equal kwargs["value"]
+    """
+    def kernel(dataframe, expectation_type, kwargs):
+        observed = observe(dataframe)
+        return build_result(expectation_type, kwargs, observed == kwargs["value"], {"observed_value": observed})
+    return kernel
+
+
+def columns_kernel(dataframe, expectation_type, kwargs):
+    columns = [str(column) for column in dataframe.columns]
+    expected = list(kwargs.get("column_list") or [])
+    if expectation_type == "expect_table_columns_to_match_ordered_list":
+        success = columns == expected
+    elif kwargs.get("exact_match", True) is False:
+        success = set(expected) <= set(columns)
+    else:
+        success = set(columns) == set(expected)
+    return build_result(expectation_type, kwargs, success, {"observed_value": columns})
+
+
+NATIVE_KERNELS = {
+    "expect_column_values_to_not_be_null": not_null_kernel,
+    "expect_column_values_to_be_null": null_kernel,
+    "expect_column_values_to_be_unique": unique_kernel,
+    "expect_column_values_to_be_between": map_kernel(between_mask),
+    "expect_column_values_to_be_in_set": map_kernel(in_set_mask),
+    "expect_column_values_to_not_be_in_set": map_kernel(not_in_set_mask),
+    "expect_column_values_to_be_increasing": map_kernel(monotonic_mask(decreasing=False)),
+    "expect_column_values_to_be_decreasing": map_kernel(monotonic_mask(decreasing=True)),
+    "expect_column_values_to_match_regex": map_kernel(regex_mask),
+    "expect_column_values_to_match_regex_list": map_kernel(regex_list_mask),
+    "expect_column_values_to_match_strftime_format": map_kernel(strftime_mask),
+    "expect_column_values_to_be_dateutil_parseable": map_kernel(dateutil_mask),
+    "expect_column_values_to_be_json_parseable": map_kernel(json_parseable_mask),
+    "expect_column_values_to_match_json_schema": map_kernel(json_schema_mask),
+    "expect_column_value_lengths_to_be_between": map_kernel(lengths_mask),
+    "expect_column_value_lengths_to_equal": map_kernel(lengths_mask),
+    "expect_column_distinct_values_to_be_in_set": distinct_values_kernel,
+    "expect_column_distinct_values_to_contain_set": distinct_values_kernel,
+    "expect_column_distinct_values_to_equal_set": distinct_values_kernel,
+    "expect_column_mean_to_be_between": aggregate_kernel(lambda values: values.mean()),
+    "expect_column_median_to_be_between": aggregate_kernel(lambda values: values.median()),
+    "expect_column_stdev_to_be_between": aggregate_kernel(lambda values: values.std()),
+    "expect_column_sum_to_be_between": aggregate_kernel(lambda values: values.sum()),
+    "expect_column_min_to_be_between": aggregate_kernel(lambda values: values.min()),
+    "expect_column_max_to_be_between": aggregate_kernel(lambda values: values.max()),
+    "expect_column_unique_value_count_to_be_between": aggregate_kernel(lambda values: values.nunique(),
+                                                                        decode=False),
+    "expect_column_proportion_of_unique_values_to_be_between": aggregate_kernel(
+        lambda values: values.nunique() / len(values), decode=False),
+    "expect_column_quantile_values_to_be_between": quantile_kernel,
+    "expect_column_most_common_value_to_be_in_set": most_common_value_kernel,
+    "expect_table_row_count_to_be_between": row_count_kernel,
+    "expect_table_row_count_to_equal": equal_kernel(len),
+    "expect_table_column_count_to_be_between": column_count_kernel,
+    "expect_table_column_count_to_equal": equal_kernel(lambda dataframe: len(dataframe.columns)),
+    "expect_table_columns_to_match_ordered_list": columns_kernel,
+    "expect_table_columns_to_match_set": columns_kernel,
+}
+
+
+def supports_native(expectation):
+    """
+    Whether an expectation dict or legacy expectation string has a native kernel
+    """
+    try:
+        expectation_type, kwargs = normalize_expectation(expectation)
+    except ValueError:
+        return False
+    return (expectation_type in NATIVE_KERNELS
+            and not any(kwargs.get(name) for name in UNSUPPORTED_KWARGS))
+
+
+def run_native_expectation(dataframe, expectation):
+    """
+    Evaluate one expectation on a DataFrame with its native kernel
+    Returns:
+        dict : GE compatible result dict, an exception result when the kernel fails
+    """
+    expectation_type, kwargs = normalize_expectation(expectation)
+    kernel = NATIVE_KERNELS.get(expectation_type)
+    if kernel is None:
+        raise ValueError(f"Expectation type not supported by the native engine: {expectation_type}")
+    try:
+        return kernel(dataframe, expectation_type, kwargs)
+    except Exception as e:
+        return build_exception_result(expectation_type, kwargs, e)
+
+
+def run_native_expectations(dataframe, expectations):
+    """
+    Evaluate a list of expectations on a DataFrame
+    Returns:
+        list : (result dict, duration in seconds) per expectation
+    """
+    results = []
+    for expectation in expectations:
+        start = time.perf_counter()
+        result = run_native_expectation(dataframe, expectation)
+        results.append((result, time.perf_counter() - start))
+    return results
@@ -5,22 +5,101 @@ from ruamel import yaml
 import ruamel
 import pandas as pd
 import os
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from great_expectations.core.expectation_configuration import ExpectationConfiguration
+from great_expectations.data_context.types.resource_identifiers import ExpectationSuiteIdentifier
+from helpers.ge_context import CONTEXT_LOCK, get_data_context, register_datasource, serialized
+from helpers.docs_builder import DOCS_BUILDER
+from helpers.single_pass import expectation_key, validate_and_persist
+from helpers.expectation_results import build_exception_result, normalize_expectation
+from helpers.column_profiles import PROFILE_STORE, DatasetProfile, answer_from_profile
+from connecting_data.filesystem.columnar_cache import file_fingerprint, fingerprint_key, get_columnar_cache
+from connecting_data.filesystem.typed_loader import load_typed
+from connecting_data.filesystem.chunked_validation import (
+    DEFAULT_CHUNKSIZE,
+    build_state,
+    iter_file_chunks,
+    required_columns,
+    run_chunked_expectation,
+    validate_chunks,
+)
+from connecting_data.filesystem.native_validation import run_native_expectations, supports_native
+from connecting_data.filesystem.approximate_validation import iter_frame_chunks, run_approximate_expectations
+from connecting_data.filesystem.parallel_validation import run_parallel_expectations, supports_parallel
+from connecting_data.filesystem.progressive_validation import (
+    iter_csv_sample,
+    iter_frame_sample,
+    run_progressive_expectations,
+)
+
+# Validation engines available for local files
+VALIDATION_ENGINES = ["great_expectations", "chunked", "native", "approximate", "progressive", "parallel"]
+# How GE results are persisted: full checkpoint rerun, or the single validation pass
+PERSIST_MODES = ["checkpoint", "single_pass"]
+# GE work of the in-memory engines runs on one worker thread, off the interactive path
+GE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ge-persist")
+
+
+def _log_persist_error(future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Error persisting results with GE in the background: {str(future.exception())}")
+
 
 class PandasFilesystemDatasource():
     """
     Run Data Quality checks on Local Filesystem data
     """
-    def __init__(self, datasource_name, dataframe):
+    def __init__(self, datasource_name, dataframe, file_path=None,
+                 validation_engine="great_expectations", chunksize=DEFAULT_CHUNKSIZE,
+                 persist_mode="checkpoint", use_profile=True, exact_results=False):
         """ 
         Init class attributes
+        Params:
+            dataframe (DataFrame) : In-memory data (only a preview in the streaming modes)
+            file_path (str) : Source file, required by the chunked engine
+            validation_engine (str) : "great_expectations" validates the in-memory
+                                      dataframe, "chunked" streams the file in chunks,
+                                      "native" evaluates the in-memory dataframe with
+                                      vectorized kernels and persists with GE in the background,
+                                      "approximate" streams the file (or the dataframe) and
+                                      estimates distinct counts and quantiles with sketches,
+                                      "progressive" decides row-level checks on growing
+                                      random samples of the file (or the dataframe),
+                                      "parallel" evaluates the in-memory dataframe on a process
+                                      pool and persists with GE in the background
+            chunksize (int) : Rows per chunk for the chunked engine
+            persist_mode (str) : "checkpoint" reruns the suite in a checkpoint after each check,
+                                 "single_pass" validates the suite once and stores that result
+            use_profile (bool) : Answer aggregate expectations from the column profile of the
+                                 file version when it decides them (not with the
+                                 great_expectations engine, whose results are persisted)
+            exact_results (bool) : Confirm the passes of the progressive engine with a full pass
         """
+        if validation_engine not in VALIDATION_ENGINES:
+            raise ValueError(f"Unknown validation engine: {validation_engine}")
+        if validation_engine == "chunked" and file_path is None:
+            raise ValueError("The chunked validation engine requires a file_path")
+        if persist_mode not in PERSIST_MODES:
+            raise ValueError(f"Unknown persist mode: {persist_mode}")
         self.datasource_name = datasource_name
+        self.source_name = datasource_name
         self.expectation_suite_name = f"{datasource_name}_expectation_suite"
         self.checkpoint_name = f"{datasource_name}_checkpoint"
         self.dataframe = dataframe
+        self.file_path = file_path
+        self.validation_engine = validation_engine
+        self.chunksize = chunksize
+        self.persist_mode = persist_mode
+        self.use_profile = use_profile
+        self.exact_results = exact_results
+        self._batch_fingerprint = None
+        self._schema = None
         self.partition_date = datetime.datetime.now()
-        self.context = ge.get_context()
+        self.context = get_data_context()
 
+    @serialized
     def add_or_update_datasource(self):
         """
         Create data source if it does not exist or updating existing one
@@ -36,8 +115,7 @@ class PandasFilesystemDatasource():
                 batch_identifiers:
                     - run_id
         """
-        self.context.test_yaml_config(datasource_yaml)
-        self.context.add_datasource(**yaml.load(datasource_yaml, Loader=ruamel.yaml.Loader))
+        register_datasource(self.context, datasource_yaml)
 
     def configure_datasource(self):
         """
@@ -56,6 +134,7 @@ class PandasFilesystemDatasource():
         )
         return batch_request
     
+    @serialized
     def add_or_update_ge_suite(self):
         """
         create expectation suite if not exist and update it if there is already a suite
@@ -63,6 +142,7 @@ class PandasFilesystemDatasource():
         self.context.add_or_update_expectation_suite(
                      expectation_suite_name = self.expectation_suite_name)
 
+    @serialized
     def get_validator(self):
         """
         Retrieve a validator object for a fine grain adjustment on the expectation suite.
@@ -75,53 +155,365 @@ class PandasFilesystemDatasource():
                                         )
         return validator, batch_request
     
+    @serialized
+    def add_expectations_to_suite(self, expectations):
+        """
+        Store expectations evaluated outside of a validator in the expectation suite
+        """
+        try:
+            suite = self.context.get_expectation_suite(expectation_suite_name=self.expectation_suite_name)
+        except Exception:
+            suite = self.context.add_or_update_expectation_suite(
+                     expectation_suite_name = self.expectation_suite_name)
+        for expectation in expectations:
+            expectation_type, kwargs = normalize_expectation(expectation)
+            suite.add_expectation(ExpectationConfiguration(expectation_type=expectation_type, kwargs=kwargs),
+                                  overwrite_existing=True)
+        self.context.save_expectation_suite(suite)
+        DOCS_BUILDER.request_build(self.context, [ExpectationSuiteIdentifier(self.expectation_suite_name)])
+
+    def add_expectation_to_suite(self, expectation):
+        """
+        Store an expectation evaluated outside of a validator in the expectation suite
+        """
+        self.add_expectations_to_suite([expectation])
+
+    def run_chunked_expectation(self, expectation):
+        """
+        Validate the whole file in bounded chunks instead of the in-memory dataframe.
+        Returns a GE compatible result dict.
+        """
+        print(f"Running chunked expectation on {self.file_path}: {expectation}")
+        expectation_result = run_chunked_expectation(self.file_path, expectation, self.chunksize)
+        self.add_expectation_to_suite(expectation)
+        return expectation_result
+
+    def column_profile(self):
+        """
+        Column statistics of the data version, computed once per version and persisted.
+        The streaming engines profile the whole file as read raw, the others the in-memory
+        dataframe with its compact dtypes: the load mode is part of the profile key, so the
+        statistics of one never answer for the other.
+        """
+        raw = self.validation_engine in ("chunked", "approximate", "progressive") and self.file_path is not None
+        load_mode = "raw" if raw else "typed"
+        version = f"{self.dataset_version()}:{load_mode}"
+        source = os.path.abspath(self.file_path) if self.file_path is not None else f"dataframe:{self.datasource_name}"
+        source = f"{source}:{load_mode}"
+
+        def compute():
+            if raw:
+                return DatasetProfile.from_frames(version, iter_file_chunks(self.file_path, None, self.chunksize))
+            return DatasetProfile.from_dataframe(version, self.dataframe)
+        return PROFILE_STORE.get_or_compute(source, version, compute)
+
+    def run_profiled_expectations(self, expectations):
+        """
+        Answer the expectations decided by the column profile, without scanning the data
+        Returns:
+            dict : Index of the answered expectations -> run dict ("expectation", "result",
+                   "duration_seconds")
+        """
+        # The great_expectations engine validates and persists every result with GE
+        if not self.use_profile or self.validation_engine == "great_expectations":
+            return {}
+        start = time.perf_counter()
+        answers = answer_from_profile(expectations, self.column_profile)
+        if not answers:
+            return {}
+        duration = time.perf_counter() - start
+        answered = [expectations[index] for index in sorted(answers)]
+        print(f"Answered {len(answered)} expectations from the column profile")
+        if self.validation_engine in ("native", "parallel"):
+            self.persist_in_background(answered)
+        else:
+            self.add_expectations_to_suite(answered)
+        return {index: {"expectation": expectations[index], "result": result, "duration_seconds": duration}
+                for index, result in answers.items()}
+
+    def run_approximate_expectations(self, expectations):
+        """
+        Validate the whole file (or the dataframe without file) in one streaming pass,
+        estimating distinct counts and quantiles with mergeable sketches
+        Returns:
+            list : One dict per expectation with its "expectation", its result dict
+                   (with error bounds for the approximate ones) and its "duration_seconds"
+        """
+        def iter_chunks(columns):
+            if self.file_path is not None:
+                return iter_file_chunks(self.file_path, columns, self.chunksize)
+            return iter_frame_chunks(self.dataframe, columns, self.chunksize)
+        print(f"Running approximate expectations on {self.file_path or self.datasource_name}")
+        results = run_approximate_expectations(iter_chunks, expectations)
+        self.add_expectations_to_suite(expectations)
+        return [{"expectation": expectation, "result": result, "duration_seconds": duration}
+                for expectation, (result, duration) in zip(expectations, results)]
+
+    def run_progressive_expectations(self, expectations):
+        """
+        Decide row-level expectations on growing random samples of the file (or the
+        dataframe without file), stopping as soon as they fail (or pass, unless exact
+        results are requested). The other expectations, and the undecided ones, are
+        validated in one full streaming pass.
+        Returns:
+            list : One dict per expectation with its "expectation", its result dict and
+                   its "duration_seconds"
+        """
+        if self.file_path is not None:
+            def sample_chunks(columns, fraction, seed):
+                return iter_csv_sample(self.file_path, columns, fraction, seed)
+
+            def full_chunks(columns):
+                return iter_file_chunks(self.file_path, columns, self.chunksize)
+            total_rows = None
+        else:
+            def sample_chunks(columns, fraction, seed):
+                return iter_frame_sample(self.dataframe, columns, fraction, seed, self.chunksize)
+
+            def full_chunks(columns):
+                return iter_frame_chunks(self.dataframe, columns, self.chunksize)
+            total_rows = len(self.dataframe)
+        print(f"Running progressive expectations on {self.file_path or self.datasource_name}")
+        results = run_progressive_expectations(sample_chunks, full_chunks, expectations, total_rows=total_rows,
+                                               exact=self.exact_results)
+        self.add_expectations_to_suite(expectations)
+        return [{"expectation": expectation, "result": result, "duration_seconds": duration}
+                for expectation, (result, duration) in zip(expectations, results)]
+
+    def persist_in_background(self, expectations):
+        """
+        Validate expectations evaluated outside GE with GE on the worker thread, to store
+        them in the suite, the validation store and the data docs
+        """
+        future = GE_EXECUTOR.submit(self.run_single_pass, expectations)
+        future.add_done_callback(_log_persist_error)
+        return future
+
+    def run_native_expectations(self, expectations):
+        """
+        Evaluate expectations with the native kernels, the ones without a kernel with GE.
+        Returns:
+            list : One dict per expectation with its "expectation", its "result"
+                   (result dict or GE result) and its "duration_seconds"
+        """
+        return self.run_in_memory_engine(expectations, supports_native, run_native_expectations)
+
+    def run_parallel_expectations(self, expectations):
+        """
+        Evaluate expectations on the process pool, split by column and row partition,
+        the ones without a mergeable state with GE.
+        Returns:
+            list : One dict per expectation with its "expectation", its "result"
+                   (result dict or GE result) and its "duration_seconds"
+        """
+        return self.run_in_memory_engine(expectations, supports_parallel, run_parallel_expectations)
+
+    def run_in_memory_engine(self, expectations, supports, run):
+        """
+        Evaluate the supported expectations on the in-memory dataframe with `run`, the
+        others with GE, and persist the evaluated ones with GE in the background.
+        The GE work of this method runs on GE_EXECUTOR; it and every other use of the
+        context (suite updates, checkpoints, data docs builds) hold CONTEXT_LOCK.
+        Params:
+            supports (callable) : Expectation -> whether `run` evaluates it
+            run (callable) : (dataframe, expectations) -> list of (result, duration)
+        """
+        native = [expectation for expectation in expectations if supports(expectation)]
+        fallback = [expectation for expectation in expectations if not supports(expectation)]
+        runs = {}
+        for expectation, (result, duration) in zip(native, run(self.dataframe, native) if native else []):
+            runs[id(expectation)] = {"expectation": expectation, "result": result, "duration_seconds": duration}
+        if fallback:
+            print(f"{self.validation_engine} engine can not evaluate {len(fallback)} expectations, "
+                  f"validating them with GE")
+            start = time.perf_counter()
+            results = GE_EXECUTOR.submit(self.run_single_pass, fallback).result()
+            duration = time.perf_counter() - start
+            for expectation, result in zip(fallback, results):
+                runs[id(expectation)] = {"expectation": expectation, "result": result, "duration_seconds": duration}
+        if native:
+            self.persist_in_background(native)
+        return [runs[id(expectation)] for expectation in expectations]
+
+    def apply_expectation(self, validator, expectation):
+        """
+        Evaluate one expectation (dict or legacy string) with a validator
+        """
+        # Handle both string and dict expectations
+        if isinstance(expectation, dict):
+            # Handle the case where expectation is already a dictionary
+            expectation_type = expectation.get('expectation_type')
+            kwargs = expectation.get('kwargs', {})
+            
+            if not expectation_type:
+                raise ValueError("Invalid expectation format: missing 'expectation_type'")
+            
+            # Convert dict to function call
+            expectation_code = f"{expectation_type}(**{kwargs})"
+            print(f"Running expectation: {expectation_code}")
+            
+            # Execute the expectation
+            local_vars = {"validator": validator}
+            try:
+                exec(f"expectation_result = validator.{expectation_code}", globals(), local_vars)
+                expectation_result = local_vars.get("expectation_result")
+                if expectation_result is None:
+                    raise ValueError(f"Failed to execute expectation: {expectation_code}")
+            except AttributeError as e:
+                raise ValueError(f"Invalid expectation type: {expectation_type}. {str(e)}")
+            except Exception as e:
+                raise ValueError(f"Error executing expectation: {str(e)}")
+        else:
+            # Handle string format (legacy)
+            def my_function(expectation, validator):
+                local_vars = {"validator": validator}
+                exec(f"expectation_result = validator.{expectation}", globals(), local_vars)
+                return local_vars.get("expectation_result")
+            
+            expectation_result = my_function(expectation, validator)
+        return expectation_result
+
+    def batch_fingerprint(self):
+        """
+        Hash of the in-memory dataframe, identifies the version of the batch
+        """
+        if self._batch_fingerprint is None:
+            hashed_rows = pd.util.hash_pandas_object(self.dataframe, index=True).values
+            self._batch_fingerprint = hashlib.sha256(hashed_rows.tobytes()).hexdigest()
+        return self._batch_fingerprint
+
+    def dataset_version(self):
+        """
+        Version of the data: the source file fingerprint, or the dataframe hash
+        """
+        if self.file_path is not None:
+            return fingerprint_key(file_fingerprint(self.file_path))
+        return self.batch_fingerprint()
+
+    def get_schema(self):
+        """
+        Column names and dtypes of the data, used to key cached LLM translations
+        """
+        if self._schema is None:
+            self._schema = {str(column): str(dtype) for column, dtype in self.dataframe.dtypes.items()}
+        return self._schema
+
+    @serialized
+    def run_single_pass(self, expectations):
+        """
+        Add expectations to the suite, then validate the suite once and store that result
+        (validation store and data docs). Unchanged expectations reuse their previous
+        result on an unchanged batch.
+        Returns:
+            list : GE results of `expectations`
+        """
+        validator, batch_request = self.get_validator()
+        configurations = []
+        for expectation in expectations:
+            expectation_type, kwargs = normalize_expectation(expectation)
+            configuration = ExpectationConfiguration(expectation_type=expectation_type, kwargs=kwargs)
+            validator.expectation_suite.add_expectation(configuration, overwrite_existing=True)
+            configurations.append(configuration)
+        validator.save_expectation_suite(discard_failed_expectations=False)
+        run_name = datetime.datetime.now().strftime(f'%Y%m%d-%H%M%S-{self.datasource_name}-run')
+        _, _, results = validate_and_persist(self.context, validator, self.batch_fingerprint(), run_name)
+        return [results[expectation_key(configuration)] for configuration in configurations]
+
     def run_expectation(self, expectation):
         """
         Run your dataquality checks here
         """
-        validator, batch_request = self.get_validator()
+        profiled = self.run_profiled_expectations([expectation])
+        if profiled:
+            return profiled[0]["result"]
+        if self.validation_engine == "chunked":
+            return self.run_chunked_expectation(expectation)
+        if self.validation_engine == "native":
+            return self.run_native_expectations([expectation])[0]["result"]
+        if self.validation_engine == "parallel":
+            return self.run_parallel_expectations([expectation])[0]["result"]
+        if self.validation_engine == "approximate":
+            return self.run_approximate_expectations([expectation])[0]["result"]
+        if self.validation_engine == "progressive":
+            return self.run_progressive_expectations([expectation])[0]["result"]
+        if self.persist_mode == "single_pass":
+            return self.run_single_pass([expectation])[0]
+
+        with CONTEXT_LOCK:
+            validator, batch_request = self.get_validator()
         
-        try:
-            # Handle both string and dict expectations
-            if isinstance(expectation, dict):
-                # Handle the case where expectation is already a dictionary
-                expectation_type = expectation.get('expectation_type')
-                kwargs = expectation.get('kwargs', {})
-                
-                if not expectation_type:
-                    raise ValueError("Invalid expectation format: missing 'expectation_type'")
-                
-                # Convert dict to function call
-                expectation_code = f"{expectation_type}(**{kwargs})"
-                print(f"Running expectation: {expectation_code}")
-                
-                # Execute the expectation
-                local_vars = {"validator": validator}
+            try:
+                expectation_result = self.apply_expectation(validator, expectation)
+                validator.save_expectation_suite(discard_failed_expectations=False)
+                self.run_ge_checkpoint(batch_request)
+                return expectation_result
+            except Exception as e:
+                print(f"Error running expectation: {str(e)}")
+                raise
+
+    def run_expectations(self, expectations):
+        """
+        Run a list of expectations against the same batch. Expectations decided by the
+        column profile are answered from it, the others by the validation engine.
+        Returns:
+            list : One dict per expectation with its "expectation", its "result"
+                   (GE result or result dict) and its "duration_seconds"
+        """
+        profiled = self.run_profiled_expectations(expectations)
+        remaining = [expectation for index, expectation in enumerate(expectations) if index not in profiled]
+        runs = iter(self.run_engine_expectations(remaining) if remaining else [])
+        return [profiled[index] if index in profiled else next(runs) for index in range(len(expectations))]
+
+    def run_engine_expectations(self, expectations):
+        """
+        Run a list of expectations against the same batch with the validation engine.
+        The validator (datasource, suite, batch) is built once, the suite is saved once
+        and the checkpoint runs once for the whole list.
+        Returns:
+            list : One dict per expectation with its "expectation", its "result"
+                   (GE result or result dict) and its "duration_seconds"
+        """
+        if self.validation_engine == "chunked":
+            states = [build_state(expectation) for expectation in expectations]
+            chunks = iter_file_chunks(self.file_path, required_columns(states), self.chunksize)
+            results = validate_chunks(chunks, states)
+            self.add_expectations_to_suite(expectations)
+            return [{"expectation": expectation, "result": result, "duration_seconds": state.elapsed_seconds}
+                    for expectation, result, state in zip(expectations, results, states)]
+        if self.validation_engine == "native":
+            return self.run_native_expectations(expectations)
+        if self.validation_engine == "parallel":
+            return self.run_parallel_expectations(expectations)
+        if self.validation_engine == "approximate":
+            return self.run_approximate_expectations(expectations)
+        if self.validation_engine == "progressive":
+            return self.run_progressive_expectations(expectations)
+        if self.persist_mode == "single_pass":
+            # The suite is validated in one pass, each expectation reports the pass duration
+            start = time.perf_counter()
+            results = self.run_single_pass(expectations)
+            duration = time.perf_counter() - start
+            return [{"expectation": expectation, "result": result, "duration_seconds": duration}
+                    for expectation, result in zip(expectations, results)]
+
+        with CONTEXT_LOCK:
+            validator, batch_request = self.get_validator()
+            results = []
+            for expectation in expectations:
+                start = time.perf_counter()
                 try:
-                    exec(f"expectation_result = validator.{expectation_code}", globals(), local_vars)
-                    expectation_result = local_vars.get("expectation_result")
-                    if expectation_result is None:
-                        raise ValueError(f"Failed to execute expectation: {expectation_code}")
-                except AttributeError as e:
-                    raise ValueError(f"Invalid expectation type: {expectation_type}. {str(e)}")
+                    expectation_result = self.apply_expectation(validator, expectation)
                 except Exception as e:
-                    raise ValueError(f"Error executing expectation: {str(e)}")
-            else:
-                # Handle string format (legacy)
-                def my_function(expectation, validator):
-                    local_vars = {"validator": validator}
-                    exec(f"expectation_result = validator.{expectation}", globals(), local_vars)
-                    return local_vars.get("expectation_result")
-                
-                expectation_result = my_function(expectation, validator)
-            
+                    print(f"Error running expectation: {str(e)}")
+                    expectation_type, kwargs = normalize_expectation(expectation)
+                    expectation_result = build_exception_result(expectation_type, kwargs, e)
+                results.append({"expectation": expectation, "result": expectation_result,
+                                "duration_seconds": time.perf_counter() - start})
             validator.save_expectation_suite(discard_failed_expectations=False)
             self.run_ge_checkpoint(batch_request)
-            return expectation_result
-        except Exception as e:
-            print(f"Error running expectation: {str(e)}")
-            raise
+            return results
     
+    @serialized
     def add_or_update_ge_checkpoint(self):
         """
         Create new GE checkpoint or update an existing one using the modern API.
@@ -156,10 +548,6 @@ action_list:
   - name: store_evaluation_params
     action:
       class_name: StoreEvaluationParametersAction
-  - name: update_data_docs
-    action:
-      class_name: UpdateDataDocsAction
-      site_names: []
 """
             # Add the new checkpoint
             self.context.add_checkpoint(**yaml.safe_load(checkpoint_config))
@@ -167,13 +555,14 @@ action_list:
             print(f"Error creating/updating checkpoint: {str(e)}")
             raise
 
+    @serialized
     def run_ge_checkpoint(self, batch_request):
         """
         Run GE checkpoint
         """
         self.add_or_update_ge_checkpoint()
 
-        self.context.run_checkpoint(
+        checkpoint_result = self.context.run_checkpoint(
                 checkpoint_name = self.checkpoint_name,
                 validations=[
                             {
@@ -182,6 +571,10 @@ action_list:
                             }
                             ],
                 )
+        # Data docs are rendered in the background, only for the new validation results
+        # and the suite page
+        DOCS_BUILDER.request_build(self.context, [*checkpoint_result.list_validation_result_identifiers(),
+                                                  ExpectationSuiteIdentifier(self.expectation_suite_name)])
 
 def get_mapping(folder_path):
     """
@@ -203,8 +596,8 @@ def local_dataowners(local_filesystem_path):
     mapping, data_owners = get_mapping(local_filesystem_path)
     return mapping, data_owners
 
-# Function to read local filesytem .csv file in a datafrale
-def read_local_filesystem_tb(local_filesystem_path, data_source, mapping):
+# Function to resolve the path of a local filesystem data source
+def local_file_path(local_filesystem_path, data_source, mapping):
     file_name = mapping.get(data_source, None)
     if file_name is None:
         raise ValueError(f"Data source '{data_source}' not found in mapping")
@@ -213,11 +606,29 @@ def read_local_filesystem_tb(local_filesystem_path, data_source, mapping):
     if not local_filesystem_path.endswith('/'):
         local_filesystem_path += '/'
     
-    file_path = f"{local_filesystem_path}{file_name}"
+    return f"{local_filesystem_path}{file_name}"
+
+# Function to read the first rows of a local filesystem .csv file (bounded memory)
+def read_local_filesystem_preview(local_filesystem_path, data_source, mapping, nrows=1000):
+    file_path = local_file_path(local_filesystem_path, data_source, mapping)
+    print(f"Reading preview of file: {file_path}")
+    return pd.read_csv(file_path, nrows=nrows)
+
+# Function to read a local filesystem .csv file through its columnar cache copy
+def read_cached_csv(file_path, columns=None):
+    try:
+        return get_columnar_cache(file_path).read(file_path, columns=columns)
+    except Exception as e:
+        print(f"Columnar cache unavailable for {file_path}: {str(e)}")
+        return pd.read_csv(file_path, usecols=columns)
+
+# Function to read local filesytem .csv file in a datafrale
+def read_local_filesystem_tb(local_filesystem_path, data_source, mapping, columns=None):
+    file_path = local_file_path(local_filesystem_path, data_source, mapping)
     print(f"Reading file: {file_path}")
     
     try:
-        data = pd.read_csv(file_path)
+        data = read_cached_csv(file_path, columns=columns)
         if data.empty:
             raise ValueError(f"File {file_path} is empty")
         return data
@@ -228,4 +639,17 @@ def read_local_filesystem_tb(local_filesystem_path, data_source, mapping):
     except Exception as e:
         print(f"Error reading file {file_path}: {str(e)}")
         # Return a simple DataFrame with one column as a fallback
-        return pd.DataFrame({'dummy_column': [1, 2, 3]})
\ No newline at end of file
+        return pd.DataFrame({'dummy_column': [1, 2, 3]})
+
+# Function to read local filesytem .csv file with compact dtypes and report its memory
+def read_local_filesystem_typed(local_filesystem_path, data_source, mapping, columns=None):
+    file_path = local_file_path(local_filesystem_path, data_source, mapping)
+    print(f"Reading file with compact dtypes: {file_path}")
+    try:
+        data, memory = load_typed(file_path, columns=columns)
+        if data.empty:
+            raise ValueError(f"File {file_path} is empty")
+        return data, memory
+    except Exception as e:
+        print(f"Error reading file {file_path} with compact dtypes: {str(e)}")
+        return read_local_filesystem_tb(local_filesystem_path, data_source, mapping, columns=columns), None
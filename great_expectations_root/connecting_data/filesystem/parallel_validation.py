@@ -0,0 +1,234 @@
+"""
+Parallel validation of an in-memory DataFrame on a process pool.
+
+The suite is split by column (expectations reading the same columns form a group) and
+the rows into partitions. Each (group, partition) task updates the mergeable streaming
+states of its expectations in a worker process, and the partial states are merged in
+partition order into the final results.
+
+The columns are copied once into shared memory blocks: numeric, boolean and datetime
+columns as their raw buffers, the other columns as categorical codes plus their pickled
+categories. Workers attach the blocks and slice zero-copy views of their partition, so
+only the block names, the partition bounds and the small partial states are pickled.
+"""
+import multiprocessing
+import os
+import pickle
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from dotenv import load_dotenv, find_dotenv
+import numpy as np
+import pandas as pd
+
+from connecting_data.filesystem.chunked_validation import EXPECTATION_STATES, build_state, is_categorical, validate_chunks
+from helpers.expectation_results import build_exception_result, normalize_expectation
+
+load_dotenv(find_dotenv())
+
+# Worker processes of the pool (default: one per core)
+PARALLEL_WORKERS = int(os.environ.get('PARALLEL_WORKERS') or os.cpu_count() or 1)
+# Frames smaller than this are validated in-process, the pool overhead would dominate
+PARALLEL_MIN_ROWS = int(os.environ.get('PARALLEL_MIN_ROWS', 200_000))
+# Lower bound of the rows per partition
+MIN_PARTITION_ROWS = 50_000
+# Numpy dtype kinds shared as raw buffers: bool, integers, floats, complex, timedelta, datetime
+BUFFER_KINDS = "biufcmM"
+
+
+def supports_parallel(expectation):
+    """
+    Whether an expectation has a mergeable state the pool can evaluate
+    """
+    try:
+        expectation_type, _ = normalize_expectation(expectation)
+    except ValueError:
+        return False
+    return expectation_type in EXPECTATION_STATES
+
+
+def _open_block(name):
+    # Attached blocks are owned (and unlinked) by the process that created them
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrame():
+    """
+    Columns of a DataFrame copied to shared memory blocks, released with close()
+    """
+    def __init__(self, dataframe, columns):
+        self.blocks = []
+        self.layout = {"run": uuid.uuid4().hex, "rows": len(dataframe), "columns": {}}
+        try:
+            for column in columns:
+                self.layout["columns"][column] = self._share_column(dataframe[column])
+        except Exception:
+            self.close()
+            raise
+
+    def _share(self, array):
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.blocks.append(block)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        return {"name": block.name, "dtype": array.dtype.str, "length": len(array)}
+
+    def _share_column(self, series):
+        if is_categorical(series):
+            codes, categories = series.cat.codes.to_numpy(), series.cat.categories
+        elif isinstance(series.dtype, np.dtype) and series.dtype.kind in BUFFER_KINDS:
+            return {"data": self._share(series.to_numpy())}
+        else:
+            # Strings, objects and extension dtypes travel as codes of their distinct values
+            codes, categories = pd.factorize(series)
+        payload = np.frombuffer(pickle.dumps(pd.Index(categories)), dtype=np.uint8)
+        return {"data": self._share(codes), "categories": self._share(payload)}
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+# Blocks and categories attached by a worker, kept for the tasks of the same run
+_attached = {"run": None, "blocks": [], "arrays": {}, "categories": {}}
+
+
+def _attach(layout):
+    if _attached["run"] != layout["run"]:
+        _attached["arrays"].clear()
+        _attached["categories"].clear()
+        for block in _attached["blocks"]:
+            try:
+                block.close()
+            except BufferError:
+                # A view is still referenced, the mapping is released with it
+                pass
+        _attached.update(run=layout["run"], blocks=[])
+    return _attached
+
+
+def _view(attached, spec):
+    if spec["name"] not in attached["arrays"]:
+        block = _open_block(spec["name"])
+        attached["blocks"].append(block)
+        attached["arrays"][spec["name"]] = np.ndarray(spec["length"], dtype=np.dtype(spec["dtype"]), buffer=block.buf)
+    return attached["arrays"][spec["name"]]
+
+
+def _partition_frame(layout, start, stop):
+    """
+    DataFrame of rows [start, stop) over zero-copy views of the shared columns
+    """
+    attached = _attach(layout)
+    index = pd.RangeIndex(start, stop)
+    columns = {}
+    for column, spec in layout["columns"].items():
+        values = _view(attached, spec["data"])[start:stop]
+        if "categories" in spec:
+            name = spec["categories"]["name"]
+            if name not in attached["categories"]:
+                attached["categories"][name] = pickle.loads(_view(attached, spec["categories"]).tobytes())
+            values = pd.Categorical.from_codes(values, categories=attached["categories"][name])
+        columns[column] = pd.Series(values, index=index, copy=False)
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def _validate_partition(layout, expectations, start, stop):
+    """
+    Worker task: partial states of `expectations` over the rows [start, stop)
+    Returns:
+        tuple : (states, {state index: error message})
+    """
+    chunk = _partition_frame(layout, start, stop)
+    states = [build_state(expectation) for expectation in expectations]
+    errors = {}
+    for index, state in enumerate(states):
+        state_start = time.perf_counter()
+        try:
+            state.update(chunk)
+        except Exception as e:
+            errors[index] = str(e)
+        state.elapsed_seconds += time.perf_counter() - state_start
+    return states, errors
+
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers=PARALLEL_WORKERS):
+    """
+    Shared process pool, started once (spawn, safe in the threaded Streamlit server)
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def partition_bounds(rows, workers):
+    """
+    (start, stop) of one partition per worker, at least MIN_PARTITION_ROWS rows each
+    """
+    count = max(min(workers, rows // MIN_PARTITION_ROWS), 1)
+    edges = np.linspace(0, rows, count + 1).astype(int)
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+
+def run_parallel_expectations(dataframe, expectations, workers=PARALLEL_WORKERS):
+    """
+    Validate a list of expectations against a DataFrame on the process pool
+    Returns:
+        list : (result dict, wall clock seconds of the run) per expectation
+    """
+    start = time.perf_counter()
+    states = [build_state(expectation) for expectation in expectations]
+    if workers <= 1 or len(dataframe) < PARALLEL_MIN_ROWS:
+        results = validate_chunks([dataframe], states)
+        return [(result, time.perf_counter() - start) for result in results]
+
+    groups = {}
+    for index, state in enumerate(states):
+        groups.setdefault(tuple(state.columns), []).append(index)
+    columns = [column for column in dict.fromkeys(c for group in groups for c in group) if column in dataframe.columns]
+    partitions = partition_bounds(len(dataframe), workers)
+    shared = SharedFrame(dataframe, columns)
+    try:
+        pool = get_pool(workers)
+        futures = {}
+        for group, indexes in groups.items():
+            layout = {"run": shared.layout["run"], "rows": shared.layout["rows"],
+                      "columns": {column: shared.layout["columns"][column] for column in group if column in columns}}
+            group_expectations = [{"expectation_type": states[index].expectation_type, "kwargs": states[index].kwargs}
+                                  for index in indexes]
+            futures[group] = [pool.submit(_validate_partition, layout, group_expectations, partition_start, stop)
+                              for partition_start, stop in partitions]
+        errors = {}
+        for group, indexes in groups.items():
+            for partial, partition in enumerate(futures[group]):
+                partial_states, partial_errors = partition.result()
+                for position, index in enumerate(indexes):
+                    if position in partial_errors:
+                        errors.setdefault(index, partial_errors[position])
+                    elif partial == 0:
+                        states[index] = partial_states[position]
+                    else:
+                        states[index].merge(partial_states[position])
+    finally:
+        shared.close()
+    duration = time.perf_counter() - start
+    return [(build_exception_result(state.expectation_type, state.kwargs, RuntimeError(errors[index]))
+             if index in errors else state.result(), duration)
+            for index, state in enumerate(states)]
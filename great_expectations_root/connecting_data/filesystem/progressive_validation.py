@@ -0,0 +1,191 @@
+"""
+Progressive sampling with early termination for row-level expectations.
+
+A row-level expectation (not null, in set, match regex, ...) fails as soon as its
+unexpected rows exceed the `mostly` tolerance, which a sample can show long before a
+full pass. Progressive mode evaluates growing random samples (TABLESAMPLE SYSTEM in
+postgresql, random blocks of a csv file, random rows of a dataframe) and stops as soon
+as every expectation is decided:
+    - definitively failed: the unexpected rows found in the sample alone exceed the
+      tolerance on the whole dataset (any unexpected row when mostly is 1);
+    - statistically failed or passed: the confidence interval of the unexpected
+      proportion lies entirely above or below the tolerance.
+Expectations still undecided after the last sample, the other expectation types, and
+the statistical passes when exact results are requested get one full streaming pass.
+Failures never need one.
+"""
+import io
+import math
+import os
+from dotenv import load_dotenv, find_dotenv
+import numpy as np
+import pandas as pd
+
+from connecting_data.filesystem.chunked_validation import (
+    EXPECTATION_STATES,
+    ColumnMapState,
+    UniqueState,
+    build_state,
+    required_columns,
+    validate_chunks,
+)
+from helpers.expectation_results import build_exception_result, normalize_expectation
+
+load_dotenv(find_dotenv())
+
+# Fractions of the rows sampled at each stage, before the full pass
+SAMPLE_FRACTIONS = [float(fraction) for fraction in
+                    os.environ.get('PROGRESSIVE_SAMPLE_FRACTIONS', '0.01,0.05,0.25').split(',')]
+# Standard errors covered by the confidence interval of the unexpected proportion.
+# Block samples (TABLESAMPLE SYSTEM, csv blocks) are clustered, hence the wide default.
+CONFIDENCE_Z = float(os.environ.get('PROGRESSIVE_CONFIDENCE_Z', 3.0))
+# Bytes read per random block of a csv file
+CSV_SAMPLE_BLOCK_BYTES = 1024 ** 2
+
+# Row-level types decided by samples. Duplicates need the whole column, so the
+# uniqueness expectation always gets the full pass.
+PROGRESSIVE_TYPES = [expectation_type for expectation_type, state_class in EXPECTATION_STATES.items()
+                     if issubclass(state_class, ColumnMapState) and state_class is not UniqueState]
+
+
+def proportion_bounds(count, total, z=CONFIDENCE_Z):
+    """
+    Wilson score interval of the proportion count / total
+    """
+    if not total:
+        return 0.0, 1.0
+    p = count / total
+    denominator = 1 + z * z / total
+    centre = p + z * z / (2 * total)
+    margin = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total))
+    lower = (centre - margin) / denominator if count else 0.0
+    upper = (centre + margin) / denominator if count < total else 1.0
+    return max(lower, 0.0), min(upper, 1.0)
+
+
+def sample_outcome(state, total_rows=None, z=CONFIDENCE_Z):
+    """
+    Decide a row-level expectation from its state updated with a sample
+    Params:
+        total_rows (int) : Rows of the whole dataset when known exactly
+    Returns:
+        tuple : (outcome, decision, bounds), the outcome is None and the decision
+                "undecided" when the sample is not conclusive
+    """
+    domain_count = state.element_count if state.count_missing else state.element_count - state.missing_count
+    mostly = state.kwargs.get("mostly")
+    tolerance = 1 - (1 if mostly is None else mostly)
+    bounds = proportion_bounds(state.unexpected_count, domain_count, z)
+    # Unexpected rows of the sample are unexpected rows of the dataset
+    limit = tolerance * total_rows if total_rows is not None else (0 if tolerance <= 0 else None)
+    if limit is not None and state.unexpected_count > limit:
+        return False, "definitive", bounds
+    if domain_count and bounds[0] > tolerance:
+        return False, "statistical", bounds
+    if domain_count and bounds[1] <= tolerance:
+        return True, "statistical", bounds
+    return None, "undecided", bounds
+
+
+def run_progressive_expectations(sample_chunks, full_chunks, expectations, total_rows=None, exact=False,
+                                 fractions=None, z=CONFIDENCE_Z):
+    """
+    Validate a list of expectations on growing samples, then in one full pass for the
+    ones the samples did not decide
+    Params:
+        sample_chunks (callable) : (columns, fraction, seed) -> iterable of DataFrame chunks
+                                   of a random sample of about `fraction` of the rows
+        full_chunks (callable) : Columns to read -> iterable of DataFrame chunks of every row
+        total_rows (int) : Rows of the dataset when known exactly, None otherwise
+        exact (bool) : Confirm statistical passes with the full pass
+    Returns:
+        list : (result dict, seconds spent validating it) per expectation
+    """
+    fractions = SAMPLE_FRACTIONS if fractions is None else fractions
+    results = {}
+    durations = {index: 0.0 for index in range(len(expectations))}
+    sampled = []
+    full = []
+    for index, expectation in enumerate(expectations):
+        expectation_type, kwargs = normalize_expectation(expectation)
+        if expectation_type in PROGRESSIVE_TYPES:
+            sampled.append(index)
+        elif expectation_type in EXPECTATION_STATES:
+            full.append(index)
+        else:
+            results[index] = build_exception_result(expectation_type, kwargs, ValueError(
+                f"Expectation type not supported in progressive mode: {expectation_type}"))
+
+    for seed, fraction in enumerate(fractions):
+        if not sampled:
+            break
+        states = {index: build_state(expectations[index]) for index in sampled}
+        chunks = sample_chunks(required_columns(list(states.values())), fraction, seed)
+        for (index, state), result in zip(states.items(), validate_chunks(chunks, list(states.values()))):
+            durations[index] += state.elapsed_seconds
+            if result["exception_info"]["raised_exception"]:
+                results[index] = result
+                continue
+            outcome, decision, bounds = sample_outcome(state, total_rows, z)
+            if outcome is False or (outcome and not exact):
+                result["success"] = outcome
+                result["result"]["details"] = {"progressive": {
+                    "decision": decision, "sample_fraction": fraction, "sampled_rows": state.element_count,
+                    "unexpected_proportion_bounds": list(bounds), "confidence_z": z}}
+                results[index] = result
+        sampled = [index for index in sampled if index not in results]
+        if sampled:
+            print(f"{len(sampled)} expectations undecided on a {fraction:.0%} sample")
+
+    remaining = sorted(sampled + full)
+    if remaining:
+        states = {index: build_state(expectations[index]) for index in remaining}
+        chunks = full_chunks(required_columns(list(states.values())))
+        for (index, state), result in zip(states.items(), validate_chunks(chunks, list(states.values()))):
+            durations[index] += state.elapsed_seconds
+            if index in sampled and not result["exception_info"]["raised_exception"]:
+                result["result"]["details"] = {"progressive": {"decision": "full_pass"}}
+            results[index] = result
+    return [(results[index], durations[index]) for index in range(len(expectations))]
+
+
+def iter_csv_sample(file_path, columns=None, fraction=0.01, seed=0, block_bytes=CSV_SAMPLE_BLOCK_BYTES):
+    """
+    Random blocks of about `block_bytes` of a csv file, read by seeking to their offsets,
+    so a sample costs its size and not the size of the file. A block holds the lines
+    starting inside it, csv files with line breaks inside quoted values are not supported.
+    """
+    with open(file_path, "rb") as f:
+        header = f.readline()
+        body_start = f.tell()
+        block_count = max(math.ceil((os.path.getsize(file_path) - body_start) / block_bytes), 1)
+        rng = np.random.default_rng(seed)
+        blocks = rng.choice(block_count, size=min(max(math.ceil(fraction * block_count), 1), block_count),
+                            replace=False)
+        for block in sorted(blocks):
+            start = body_start + int(block) * block_bytes
+            end = start + block_bytes
+            # Move to the first line starting at or after `start`
+            f.seek(start - 1)
+            f.readline()
+            if f.tell() >= end:
+                continue
+            data = f.read(end - f.tell())
+            if data and not data.endswith(b"\n"):
+                data += f.readline()
+            if not data.strip():
+                continue
+            try:
+                yield pd.read_csv(io.BytesIO(header + data), usecols=columns or None)
+            except pd.errors.ParserError as e:
+                print(f"Skipping unparsable sample block of {file_path}: {str(e)}")
+
+
+def iter_frame_sample(dataframe, columns=None, fraction=0.01, seed=0, chunksize=100_000):
+    """
+    Random rows of an in-memory DataFrame, in chunks
+    """
+    frame = dataframe[columns] if columns else dataframe
+    sample = frame.sample(frac=min(fraction, 1.0), random_state=seed)
+    for start in range(0, len(sample), chunksize):
+        yield sample.iloc[start:start + chunksize]
@@ -0,0 +1,159 @@
+"""
+Memory compact loading of local csv files.
+
+The schema of a file is sniffed once from a sample and stored next to the columnar
+cache. Loads then use it to read low cardinality text as categoricals and downcast
+integer columns. Float columns stay float64 (float32 sums and means differ from the
+default load) and date columns stay as read, so that set membership and regex checks
+compare the csv strings. Set membership and regex checks of the native and parallel
+engines run once per category of the categorical columns.
+"""
+import json
+import os
+import re
+import pandas as pd
+
+from connecting_data.filesystem.columnar_cache import get_columnar_cache, file_fingerprint
+
+# Rows used to sniff the schema of a file
+SCHEMA_SAMPLE_ROWS = 10_000
+# Text columns with at most this share of distinct values are loaded as categoricals
+CATEGORY_MAX_RATIO = 0.5
+CATEGORY_MAX_DISTINCT = 10_000
+DATE_PATTERN = re.compile(r"^\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2}|\d{1,2}[-/]\d{1,2}[-/]\d{2,4})")
+
+
+def _looks_like_dates(values):
+    """
+    True when every sampled value starts with a date and parses as a datetime
+    """
+    if values.empty or not values.map(lambda v: bool(DATE_PATTERN.match(str(v)))).all():
+        return False
+    try:
+        pd.to_datetime(values, errors="raise")
+    except (ValueError, TypeError):
+        return False
+    return True
+
+
+def sniff_schema(file_path, sample_rows=SCHEMA_SAMPLE_ROWS):
+    """
+    Infer the logical type of every column from the first rows of a csv file
+    Returns:
+        dict : {"columns": {column: kind}, "default_bytes_per_row": {column: bytes}}
+               where kind is one of "integer", "nullable_integer", "float",
+               "category", "datetime", "text"
+    """
+    sample = pd.read_csv(file_path, nrows=sample_rows)
+    columns = {}
+    bytes_per_row = {}
+    rows = max(len(sample), 1)
+    for column in sample.columns:
+        values = sample[column]
+        bytes_per_row[column] = float(values.memory_usage(index=False, deep=True)) / rows
+        if pd.api.types.is_integer_dtype(values) or pd.api.types.is_bool_dtype(values):
+            columns[column] = "integer"
+        elif pd.api.types.is_float_dtype(values):
+            non_null = values.dropna()
+            is_integral = not non_null.empty and bool((non_null == non_null.round()).all())
+            # Integral floats only come from missing values in an integer column
+            columns[column] = "float" if not is_integral else "nullable_integer"
+        elif _looks_like_dates(values.dropna()):
+            columns[column] = "datetime"
+        else:
+            distinct = values.nunique(dropna=True)
+            if distinct <= CATEGORY_MAX_DISTINCT and distinct <= CATEGORY_MAX_RATIO * rows:
+                columns[column] = "category"
+            else:
+                columns[column] = "text"
+    return {"columns": columns, "default_bytes_per_row": bytes_per_row}
+
+
+def _schema_path(file_path):
+    cache = get_columnar_cache(file_path)
+    return os.path.join(cache.cache_dir, "schemas", f"{os.path.basename(file_path)}.json")
+
+
+def get_schema(file_path):
+    """
+    Return the stored schema of a csv file, sniffing it again only if the file changed
+    """
+    schema_path = _schema_path(file_path)
+    fingerprint = file_fingerprint(file_path)
+    try:
+        with open(schema_path) as f:
+            stored = json.load(f)
+        if stored.get("fingerprint") == fingerprint:
+            return stored
+    except (OSError, ValueError):
+        pass
+    schema = sniff_schema(file_path)
+    schema["fingerprint"] = fingerprint
+    os.makedirs(os.path.dirname(schema_path), exist_ok=True)
+    with open(schema_path, "w") as f:
+        json.dump(schema, f, indent=1)
+    return schema
+
+
+def _downcast(values, kind):
+    # Only integers: aggregates of float32 columns are computed in float32
+    if kind == "integer":
+        return pd.to_numeric(values, downcast="integer")
+    if kind == "nullable_integer" and not values.isna().any():
+        return pd.to_numeric(values, downcast="integer")
+    return values
+
+
+def apply_schema(data, schema):
+    """
+    Convert the columns of a DataFrame to the compact dtypes of a schema
+    """
+    for column, kind in schema["columns"].items():
+        if column not in data.columns:
+            continue
+        try:
+            if kind == "category" and not isinstance(data[column].dtype, pd.CategoricalDtype):
+                data[column] = data[column].astype("category")
+            elif kind in ("integer", "nullable_integer", "float"):
+                data[column] = _downcast(data[column], kind)
+        except (ValueError, TypeError) as e:
+            print(f"Unable to convert column {column} to {kind}: {str(e)}")
+    return data
+
+
+def memory_report(data, schema):
+    """
+    Memory used by the compact DataFrame compared to a default pandas load
+    """
+    typed_bytes = int(data.memory_usage(index=True, deep=True).sum())
+    per_row = schema.get("default_bytes_per_row", {})
+    default_bytes = int(sum(per_row.get(column, 0) for column in data.columns) * len(data)
+                        + data.index.memory_usage())
+    return {
+        "rows": len(data),
+        "default_bytes": default_bytes,
+        "typed_bytes": typed_bytes,
+        "reduction_percent": (1 - typed_bytes / default_bytes) * 100 if default_bytes else None,
+    }
+
+
+def load_typed(file_path, columns=None):
+    """
+    Load a csv file with compact dtypes
+    Returns:
+        (DataFrame, dict) : The data and its memory report
+    """
+    schema = get_schema(file_path)
+    parquet_path = None
+    try:
+        parquet_path = get_columnar_cache(file_path).get(file_path)
+    except Exception as e:
+        print(f"Columnar cache unavailable for {file_path}: {str(e)}")
+    if parquet_path is not None:
+        data = pd.read_parquet(parquet_path, columns=columns)
+    else:
+        kinds = schema["columns"]
+        data = pd.read_csv(file_path, usecols=columns,
+                           dtype={c: "category" for c, kind in kinds.items() if kind == "category"})
+    data = apply_schema(data, schema)
+    return data, memory_report(data, schema)
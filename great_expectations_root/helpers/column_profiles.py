@@ -0,0 +1,435 @@
+"""
+Column statistics profiles answering aggregate expectations without scanning the data.
+
+A profile holds, per column, the row / null / non null counts, min, max, sum, mean,
+standard deviation and distinct count of one dataset version (csv file fingerprint, or
+PostgreSQL table and pg_stat_user_tables counters). It is computed once per version,
+persisted to disk as JSON and shared by every session. Aggregate expectations, and the
+row-level ones whose outcome follows from the statistics (no nulls, bounds within the
+column range, all values distinct), are then answered from the profile.
+"""
+from collections import OrderedDict
+import datetime
+import hashlib
+import json
+import math
+import os
+import threading
+from dotenv import load_dotenv, find_dotenv
+import pandas as pd
+
+from helpers.expectation_results import (
+    PARTIAL_UNEXPECTED_COUNT,
+    build_aggregate_result,
+    build_map_result,
+    build_result,
+    is_between,
+    normalize_expectation,
+)
+
+load_dotenv(find_dotenv())
+
+PROFILE_DIR = os.environ.get('COLUMN_PROFILE_DIR') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uncommitted', 'column_profiles')
+# Distinct values tracked per column when a profile is built from chunks, beyond it the
+# distinct count is unknown
+PROFILE_MAX_DISTINCT = int(os.environ.get('COLUMN_PROFILE_MAX_DISTINCT', 100_000))
+# Profiles kept in memory
+PROFILE_MEMORY_SIZE = 64
+PROFILE_FORMAT_VERSION = 1
+# Kwargs changing the evaluated rows or values, expectations using them are never answered
+UNSUPPORTED_KWARGS = ["row_condition", "parse_strings_as_datetimes"]
+
+
+def _to_python(value):
+    if value is None:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        try:
+            value = value.item()
+        except (ValueError, AttributeError):
+            pass
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class ColumnProfile():
+    """
+    Mergeable statistics of one column
+    """
+    def __init__(self):
+        self.row_count = 0
+        self.null_count = 0
+        self.min = None
+        self.max = None
+        self.orderable = True
+        self.numeric = True
+        self.sum = 0
+        self.mean = None
+        # Sum of squared deviations from the mean, for the standard deviation
+        self.m2 = 0.0
+        self.distinct = 0
+        self.distinct_exact = True
+        self.head = []
+        self._distinct_values = set()
+
+    @property
+    def count(self):
+        """
+        Non missing values
+        """
+        return self.row_count - self.null_count
+
+    @property
+    def stdev(self):
+        """
+        Sample standard deviation, like pandas and GE
+        """
+        if not self.numeric or self.count < 2:
+            return None
+        return math.sqrt(self.m2 / (self.count - 1))
+
+    def _merge_moments(self, count, total, mean, m2):
+        previous = self.count - count
+        if previous <= 0:
+            self.sum, self.mean, self.m2 = total, mean, m2
+            return
+        delta = mean - self.mean
+        self.sum += total
+        self.mean += delta * count / self.count
+        self.m2 += m2 + delta * delta * previous * count / self.count
+
+    def _merge_bounds(self, low, high):
+        try:
+            self.min = low if self.min is None else min(self.min, low)
+            self.max = high if self.max is None else max(self.max, high)
+        except TypeError:
+            self.orderable, self.min, self.max = False, None, None
+
+    def update(self, series, exact_distinct=False):
+        """
+        Add a chunk of the column
+        Params:
+            exact_distinct (bool) : The series is the whole column, count its distinct values
+                                    directly instead of tracking them
+        """
+        values = series.dropna()
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(values.cat.categories.dtype)
+        self.row_count += len(series)
+        self.null_count += len(series) - len(values)
+        if values.empty:
+            return self
+        room = PARTIAL_UNEXPECTED_COUNT - len(self.head)
+        if room > 0:
+            self.head.extend(_to_python(value) for value in values.iloc[:room])
+        if self.orderable:
+            try:
+                self._merge_bounds(_to_python(values.min()), _to_python(values.max()))
+            except TypeError:
+                self.orderable, self.min, self.max = False, None, None
+        if self.numeric and pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            mean = float(values.mean())
+            self._merge_moments(len(values), _to_python(values.sum()), mean, float(((values - mean) ** 2).sum()))
+        else:
+            self.numeric, self.sum, self.mean, self.m2 = False, None, None, 0.0
+        if exact_distinct and self.row_count == len(series):
+            self.distinct = int(values.nunique())
+            self._distinct_values = None
+        elif self._distinct_values is not None:
+            self._distinct_values.update(values.unique())
+            self.distinct = len(self._distinct_values)
+            if self.distinct > PROFILE_MAX_DISTINCT:
+                self._distinct_values = None
+                self.distinct, self.distinct_exact = None, False
+        else:
+            self.distinct, self.distinct_exact = None, False
+        return self
+
+    def to_dict(self):
+        return {"row_count": self.row_count, "null_count": self.null_count, "count": self.count,
+                "min": self.min, "max": self.max, "numeric": self.numeric, "sum": self.sum,
+                "mean": self.mean, "stdev": self.stdev, "m2": self.m2, "distinct": self.distinct,
+                "distinct_exact": self.distinct_exact, "head": self.head}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild a profile from to_dict(), or from the aggregates of a database query
+        """
+        profile = cls()
+        profile.row_count = data["row_count"]
+        profile.null_count = data["null_count"]
+        profile.min, profile.max = data.get("min"), data.get("max")
+        profile.orderable = data.get("min") is not None or not profile.count
+        profile.numeric = bool(data.get("numeric"))
+        profile.sum, profile.mean = data.get("sum"), data.get("mean")
+        if "m2" in data:
+            profile.m2 = data["m2"]
+        elif data.get("stdev") is not None and profile.count > 1:
+            profile.m2 = data["stdev"] ** 2 * (profile.count - 1)
+        profile.distinct = data.get("distinct")
+        profile.distinct_exact = bool(data.get("distinct_exact")) and profile.distinct is not None
+        profile.head = list(data.get("head") or [])
+        profile._distinct_values = None
+        return profile
+
+
+class DatasetProfile():
+    """
+    Profiles of every column of one dataset version
+    """
+    def __init__(self, version, row_count=0, columns=None, computed_at=None):
+        self.version = version
+        self.row_count = row_count
+        self.columns = columns if columns is not None else {}
+        self.computed_at = computed_at or datetime.datetime.now().isoformat(timespec="seconds")
+
+    @classmethod
+    def from_frames(cls, version, frames):
+        """
+        Profile a dataset streamed as DataFrame chunks, in one pass
+        """
+        profile = cls(version)
+        for frame in frames:
+            profile.row_count += len(frame)
+            for column in frame.columns:
+                profile.columns.setdefault(str(column), ColumnProfile()).update(frame[column])
+        return profile
+
+    @classmethod
+    def from_dataframe(cls, version, dataframe):
+        """
+        Profile an in-memory DataFrame, with exact distinct counts
+        """
+        columns = {str(column): ColumnProfile().update(dataframe[column], exact_distinct=True)
+                   for column in dataframe.columns}
+        return cls(version, len(dataframe), columns)
+
+    def to_dict(self):
+        return {"format": PROFILE_FORMAT_VERSION, "version": self.version, "row_count": self.row_count,
+                "computed_at": self.computed_at,
+                "columns": {column: profile.to_dict() for column, profile in self.columns.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("format") != PROFILE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported column profile format: {data.get('format')}")
+        return cls(data["version"], data["row_count"],
+                   {column: ColumnProfile.from_dict(profile) for column, profile in data["columns"].items()},
+                   data.get("computed_at"))
+
+    def answer(self, expectation):
+        """
+        Result dict of an expectation computed from the profile
+        Returns:
+            dict : GE compatible result dict, None when the profile cannot decide
+        """
+        expectation_type, kwargs = normalize_expectation(expectation)
+        if any(kwargs.get(name) for name in UNSUPPORTED_KWARGS):
+            return None
+        column = self.columns.get(kwargs["column"]) if "column" in kwargs else None
+        if "column" in kwargs and column is None:
+            return None
+        try:
+            result = _answer(self, column, expectation_type, kwargs)
+        except (TypeError, KeyError):
+            # Bounds not comparable with the column values
+            return None
+        if result is not None:
+            result["meta"]["column_profile"] = {"dataset_version": self.version, "computed_at": self.computed_at}
+        return result
+
+
+def _within_bounds(column, kwargs):
+    """
+    True when the whole column range is within the bounds of the expectation
+    """
+    if not column.orderable or column.min is None:
+        return False
+    bounds = (kwargs.get("min_value"), kwargs.get("max_value"), kwargs.get("strict_min"), kwargs.get("strict_max"))
+    return is_between(column.min, *bounds) and is_between(column.max, *bounds)
+
+
+def _answer(profile, column, expectation_type, kwargs):
+    """
+    Result dict of an expectation, None when the statistics do not decide it
+    """
+    if expectation_type == "expect_table_row_count_to_be_between":
+        return build_aggregate_result(expectation_type, kwargs, profile.row_count)
+    if expectation_type == "expect_table_row_count_to_equal":
+        return build_result(expectation_type, kwargs, profile.row_count == kwargs["value"],
+                            {"observed_value": profile.row_count})
+    if expectation_type == "expect_column_values_to_not_be_null":
+        return build_map_result(expectation_type, kwargs, column.row_count, column.null_count, column.null_count,
+                                [None] * min(column.null_count, PARTIAL_UNEXPECTED_COUNT))
+    if expectation_type == "expect_column_values_to_be_null":
+        if column.count and not column.head:
+            # No sample of the non missing values for the partial unexpected list
+            return None
+        return build_map_result(expectation_type, kwargs, column.row_count, column.null_count, column.count,
+                                column.head)
+    if expectation_type == "expect_column_values_to_be_unique":
+        # Only a success can be told: the unexpected count needs the duplicated values
+        if not (column.distinct_exact and column.distinct == column.count):
+            return None
+        return build_map_result(expectation_type, kwargs, column.row_count, column.null_count, 0, [],
+                                count_missing=False)
+    if expectation_type == "expect_column_values_to_be_between":
+        # Same, a column range within the bounds means no unexpected value
+        if not _within_bounds(column, kwargs):
+            return None
+        return build_map_result(expectation_type, kwargs, column.row_count, column.null_count, 0, [],
+                                count_missing=False)
+    if expectation_type in ("expect_column_min_to_be_between", "expect_column_max_to_be_between"):
+        if not column.orderable:
+            return None
+        observed = column.min if expectation_type == "expect_column_min_to_be_between" else column.max
+        return build_aggregate_result(expectation_type, kwargs, observed)
+    if expectation_type in NUMERIC_STATISTICS:
+        if not column.numeric:
+            return None
+        return build_aggregate_result(expectation_type, kwargs, getattr(column, NUMERIC_STATISTICS[expectation_type]))
+    if expectation_type == "expect_column_unique_value_count_to_be_between":
+        return build_aggregate_result(expectation_type, kwargs, column.distinct) if column.distinct_exact else None
+    if expectation_type == "expect_column_proportion_of_unique_values_to_be_between":
+        if not column.distinct_exact:
+            return None
+        return build_aggregate_result(expectation_type, kwargs,
+                                      column.distinct / column.count if column.count else None)
+    return None
+
+
+# Expectation type -> ColumnProfile attribute of the observed value
+NUMERIC_STATISTICS = {
+    "expect_column_sum_to_be_between": "sum",
+    "expect_column_mean_to_be_between": "mean",
+    "expect_column_stdev_to_be_between": "stdev",
+}
+PROFILE_EXPECTATION_TYPES = [
+    "expect_table_row_count_to_be_between",
+    "expect_table_row_count_to_equal",
+    "expect_column_values_to_not_be_null",
+    "expect_column_values_to_be_null",
+    "expect_column_values_to_be_unique",
+    "expect_column_values_to_be_between",
+    "expect_column_min_to_be_between",
+    "expect_column_max_to_be_between",
+    "expect_column_unique_value_count_to_be_between",
+    "expect_column_proportion_of_unique_values_to_be_between",
+    *NUMERIC_STATISTICS,
+]
+
+
+def may_answer(expectation):
+    """
+    Whether the profile may answer an expectation, before computing the profile
+    """
+    try:
+        expectation_type, kwargs = normalize_expectation(expectation)
+    except ValueError:
+        return False
+    return expectation_type in PROFILE_EXPECTATION_TYPES and not any(kwargs.get(name) for name in UNSUPPORTED_KWARGS)
+
+
+class ColumnProfileStore():
+    """
+    Latest profile of each dataset, on disk (one JSON file per dataset) and in memory
+    """
+    def __init__(self, profile_dir=PROFILE_DIR, memory_size=PROFILE_MEMORY_SIZE):
+        self.profile_dir = profile_dir
+        self.memory_size = memory_size
+        self.hits = 0
+        self.misses = 0
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, source):
+        return os.path.join(self.profile_dir, hashlib.sha1(source.encode("utf-8")).hexdigest() + ".json")
+
+    def _remember(self, source, profile):
+        self._profiles[source] = profile
+        self._profiles.move_to_end(source)
+        while len(self._profiles) > self.memory_size:
+            self._profiles.popitem(last=False)
+
+    def get(self, source, version):
+        """
+        Profile of a dataset version, None when it was never computed
+        """
+        with self._lock:
+            profile = self._profiles.get(source)
+            if profile is None or profile.version != version:
+                try:
+                    with open(self._path(source)) as f:
+                        profile = DatasetProfile.from_dict(json.load(f))
+                except (OSError, ValueError, KeyError):
+                    profile = None
+                if profile is not None:
+                    self._remember(source, profile)
+            if profile is not None and profile.version == version:
+                self.hits += 1
+                return profile
+            self.misses += 1
+            return None
+
+    def set(self, source, profile):
+        """
+        Store the profile of the current version, replacing the previous one
+        """
+        with self._lock:
+            self._remember(source, profile)
+            try:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                tmp_path = self._path(source) + ".tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(dict(profile.to_dict(), source=source), f, default=str)
+                os.replace(tmp_path, self._path(source))
+            except OSError as e:
+                print(f"Unable to save the column profile of {source}: {str(e)}")
+
+    def get_or_compute(self, source, version, compute):
+        """
+        Profile of a dataset version, computed with `compute()` on a miss
+        """
+        profile = self.get(source, version)
+        if profile is None:
+            print(f"Computing the column profile of {source}")
+            profile = compute()
+            self.set(source, profile)
+        return profile
+
+    def stats(self):
+        with self._lock:
+            return {"profiles_in_memory": len(self._profiles), "hits": self.hits, "misses": self.misses,
+                    "profile_dir": self.profile_dir}
+
+
+PROFILE_STORE = ColumnProfileStore()
+
+
+def answer_from_profile(expectations, get_profile):
+    """
+    Answer the expectations the profile can decide
+    Params:
+        get_profile (callable) : Returns the DatasetProfile, only called when needed
+    Returns:
+        dict : Index of the answered expectations -> result dict
+    """
+    answers = {}
+    if not any(may_answer(expectation) for expectation in expectations):
+        return answers
+    try:
+        profile = get_profile()
+    except Exception as e:
+        print(f"Column profile unavailable: {str(e)}")
+        return answers
+    for index, expectation in enumerate(expectations):
+        if may_answer(expectation):
+            result = profile.answer(expectation)
+            if result is not None:
+                answers[index] = result
+    return answers
@@ -0,0 +1,104 @@
+"""
+Background, incremental data docs builds.
+
+Validation runs used to rebuild the data docs site synchronously (UpdateDataDocsAction)
+while the user waited on the spinner. Builds are now requested with the identifiers
+of the new validation results and of the changed expectation suites only, and a
+background worker renders those pages plus the site index once requests stop
+arriving for a short debounce delay. Builds hold the lock of the shared data context,
+like every other use of it.
+"""
+import datetime
+import threading
+import time
+
+from helpers.ge_context import CONTEXT_LOCK
+
+# Requests arriving within this delay are grouped in one build
+DEBOUNCE_SECONDS = 2.0
+
+
+class DataDocsBuilder():
+    """
+    Debounced background worker building data docs pages for new validation results
+    """
+    def __init__(self, debounce_seconds=DEBOUNCE_SECONDS):
+        self.debounce_seconds = debounce_seconds
+        self._condition = threading.Condition()
+        # id(context) -> (context, list of resource identifiers to render)
+        self._pending = {}
+        self._last_request = 0.0
+        self._thread = None
+        self._status = {
+            "building": False,
+            "pending_pages": 0,
+            "builds": 0,
+            "last_build_finished": None,
+            "last_build_seconds": None,
+            "last_error": None,
+        }
+
+    def request_build(self, context, resource_identifiers):
+        """
+        Queue the pages of new validation results and changed suites for the next build
+        """
+        with self._condition:
+            _, identifiers = self._pending.setdefault(id(context), (context, []))
+            identifiers.extend(identifier for identifier in resource_identifiers if identifier not in identifiers)
+            self._status["pending_pages"] = sum(len(ids) for _, ids in self._pending.values())
+            self._last_request = time.monotonic()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="data-docs-builder", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _next_batch(self):
+        """
+        Wait for pending requests and the end of the debounce delay
+        """
+        with self._condition:
+            while True:
+                if self._pending:
+                    remaining = self._last_request + self.debounce_seconds - time.monotonic()
+                    if remaining <= 0:
+                        batch = list(self._pending.values())
+                        self._pending.clear()
+                        self._status["pending_pages"] = 0
+                        self._status["building"] = True
+                        return batch
+                    self._condition.wait(remaining)
+                else:
+                    self._condition.wait()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            start = time.perf_counter()
+            error = None
+            for context, identifiers in batch:
+                try:
+                    with CONTEXT_LOCK:
+                        context.build_data_docs(resource_identifiers=identifiers, build_index=True)
+                except Exception as e:
+                    error = str(e)
+                    print(f"Error building data docs: {error}")
+            with self._condition:
+                self._status.update({
+                    "building": bool(self._pending),
+                    "builds": self._status["builds"] + 1,
+                    "last_build_finished": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "last_build_seconds": time.perf_counter() - start,
+                    "last_error": error,
+                })
+
+    def status(self):
+        """
+        Snapshot of the builder state, for display
+        """
+        with self._condition:
+            status = dict(self._status)
+            status["building"] = status["building"] or bool(self._pending)
+            return status
+
+
+DOCS_BUILDER = DataDocsBuilder()
@@ -0,0 +1,139 @@
+"""
+Build Great Expectations compatible result dicts outside of a GE validator.
+
+The shapes below mirror `ExpectationValidationResult.to_json_dict()` so that
+`display_test_result` can render them without knowing which engine produced them.
+"""
+import ast
+
+# Number of unexpected values kept for display (GE default for partial lists)
+PARTIAL_UNEXPECTED_COUNT = 20
+
+
+def normalize_expectation(expectation):
+    """
+    Return (expectation_type, kwargs) for an expectation dict or a legacy
+    expectation string such as "expect_column_values_to_not_be_null(column='id')"
+    """
+    if isinstance(expectation, dict):
+        expectation_type = expectation.get('expectation_type')
+        if not expectation_type:
+            raise ValueError("Invalid expectation format: missing 'expectation_type'")
+        return expectation_type, dict(expectation.get('kwargs') or {})
+    try:
+        call = ast.parse(str(expectation).strip(), mode="eval").body
+        if not isinstance(call, ast.Call):
+            raise ValueError("not a function call")
+        expectation_type = call.func.attr if isinstance(call.func, ast.Attribute) else call.func.id
+        kwargs = {keyword.arg: ast.literal_eval(keyword.value) for keyword in call.keywords}
+    except (SyntaxError, ValueError, AttributeError) as e:
+        raise ValueError(f"Invalid expectation format: {expectation}. {str(e)}")
+    return expectation_type, kwargs
+
+
+def as_result_dict(result):
+    """
+    Return the json dict of a GE validation result, or the dict itself when the
+    result was produced by one of the non GE engines
+    """
+    return result if isinstance(result, dict) else result.to_json_dict()
+
+
+def expectation_config(expectation_type, kwargs):
+    """
+    Expectation configuration block of a result dict
+    """
+    return {"expectation_type": expectation_type, "kwargs": dict(kwargs), "meta": {}}
+
+
+def is_between(value, min_value=None, max_value=None, strict_min=False, strict_max=False):
+    """
+    Check an observed value against optional (strict) bounds, like GE does
+    """
+    if value is None:
+        return False
+    if min_value is not None:
+        if strict_min and not value > min_value:
+            return False
+        if not strict_min and not value >= min_value:
+            return False
+    if max_value is not None:
+        if strict_max and not value < max_value:
+            return False
+        if not strict_max and not value <= max_value:
+            return False
+    return True
+
+
+def _percent(part, total):
+    return part / total * 100 if total else None
+
+
+def build_map_result(expectation_type, kwargs, element_count, missing_count,
+                     unexpected_count, partial_unexpected_list, count_missing=True):
+    """
+    Result dict for row-level (column map) expectations.
+    Params:
+        count_missing (bool) : Whether missing values are part of the evaluated domain
+                               (True for the null/not null expectations)
+    """
+    nonmissing_count = element_count - missing_count
+    domain_count = element_count if count_missing else nonmissing_count
+    # mostly=0 is a valid threshold, only a missing one defaults to 1
+    mostly = kwargs.get("mostly")
+    mostly = 1 if mostly is None else mostly
+    if domain_count:
+        success = (domain_count - unexpected_count) / domain_count >= mostly
+    else:
+        success = True
+    result = {
+        "element_count": element_count,
+        "missing_count": missing_count,
+        "missing_percent": _percent(missing_count, element_count),
+        "unexpected_count": unexpected_count,
+        "unexpected_percent": _percent(unexpected_count, domain_count),
+        "unexpected_percent_total": _percent(unexpected_count, element_count),
+        "unexpected_percent_nonmissing": _percent(unexpected_count, nonmissing_count),
+        "partial_unexpected_list": list(partial_unexpected_list)[:PARTIAL_UNEXPECTED_COUNT],
+    }
+    return build_result(expectation_type, kwargs, success, result)
+
+
+def build_aggregate_result(expectation_type, kwargs, observed_value):
+    """
+    Result dict for aggregate expectations (mean, min, max, sum, row count, ...)
+    """
+    success = is_between(observed_value,
+                         kwargs.get("min_value"), kwargs.get("max_value"),
+                         kwargs.get("strict_min", False), kwargs.get("strict_max", False))
+    return build_result(expectation_type, kwargs, success, {"observed_value": observed_value})
+
+
+def build_result(expectation_type, kwargs, success, result):
+    """
+    Wrap a result payload in the GE validation result envelope
+    """
+    return {
+        "success": bool(success),
+        "expectation_config": expectation_config(expectation_type, kwargs),
+        "result": result,
+        "meta": {},
+        "exception_info": {
+            "raised_exception": False,
+            "exception_traceback": None,
+            "exception_message": None,
+        },
+    }
+
+
+def build_exception_result(expectation_type, kwargs, error):
+    """
+    Result dict for an expectation that could not be evaluated
+    """
+    result = build_result(expectation_type, kwargs, False, {})
+    result["exception_info"] = {
+        "raised_exception": True,
+        "exception_traceback": None,
+        "exception_message": str(error),
+    }
+    return result
@@ -0,0 +1,251 @@
+"""
+Argument signatures of the supported expectation types.
+
+The table is used twice before any Great Expectations work starts: to derive the JSON
+schema constraining the LLM output (Ollama structured outputs), and to check the
+kwargs and column names of a translated expectation against the dataset schema, so
+bad translations fail in milliseconds instead of after building a validator.
+"""
+import difflib
+from functools import lru_cache
+import json
+import re
+
+# Define valid Great Expectations expectation types for validation
+VALID_EXPECTATION_TYPES = [
+    # Column expectations
+    "expect_column_values_to_be_null",
+    "expect_column_values_to_not_be_null",
+    "expect_column_values_to_be_in_set",
+    "expect_column_values_to_not_be_in_set",
+    "expect_column_values_to_be_between",
+    "expect_column_values_to_be_increasing",
+    "expect_column_values_to_be_decreasing",
+    "expect_column_values_to_match_regex",
+    "expect_column_values_to_match_regex_list",
+    "expect_column_values_to_match_strftime_format",
+    "expect_column_values_to_be_dateutil_parseable",
+    "expect_column_values_to_be_json_parseable",
+    "expect_column_values_to_match_json_schema",
+    "expect_column_distinct_values_to_be_in_set",
+    "expect_column_distinct_values_to_contain_set",
+    "expect_column_distinct_values_to_equal_set",
+    "expect_column_mean_to_be_between",
+    "expect_column_median_to_be_between",
+    "expect_column_quantile_values_to_be_between",
+    "expect_column_stdev_to_be_between",
+    "expect_column_unique_value_count_to_be_between",
+    "expect_column_proportion_of_unique_values_to_be_between",
+    "expect_column_most_common_value_to_be_in_set",
+    "expect_column_sum_to_be_between",
+    "expect_column_min_to_be_between",
+    "expect_column_max_to_be_between",
+    "expect_column_value_lengths_to_be_between",
+    "expect_column_value_lengths_to_equal",
+    "expect_column_values_to_be_unique",
+    "expect_column_values_to_not_be_null",
+    # Table expectations
+    "expect_table_row_count_to_be_between",
+    "expect_table_row_count_to_equal",
+    "expect_table_column_count_to_be_between",
+    "expect_table_column_count_to_equal",
+    "expect_table_columns_to_match_ordered_list",
+    "expect_table_columns_to_match_set"
+]
+
+# JSON schema of each argument
+# Bounds may be dates or timestamps written as strings
+BOUND = {"type": ["number", "string", "null"]}
+ARGUMENTS = {
+    "column": {"type": "string"},
+    "min_value": BOUND,
+    "max_value": BOUND,
+    "strict_min": {"type": "boolean"},
+    "strict_max": {"type": "boolean"},
+    "value": {"type": "integer"},
+    "value_set": {"type": "array"},
+    "regex": {"type": "string"},
+    "regex_list": {"type": "array", "items": {"type": "string"}},
+    "match_on": {"type": "string", "enum": ["any", "all"]},
+    "strftime_format": {"type": "string"},
+    "json_schema": {"type": "object"},
+    "quantile_ranges": {"type": "object"},
+    "allow_relative_error": {"type": ["boolean", "string"]},
+    "parse_strings_as_datetimes": {"type": "boolean"},
+    "strictly": {"type": "boolean"},
+    "ties_okay": {"type": "boolean"},
+    "column_list": {"type": "array", "items": {"type": "string"}},
+    "exact_match": {"type": ["boolean", "null"]},
+    "mostly": {"type": "number", "minimum": 0, "maximum": 1},
+    "row_condition": {"type": "string"},
+    "condition_parser": {"type": "string", "enum": ["pandas", "great_expectations__experimental__"]},
+    "result_format": {"type": ["string", "object"]},
+    "catch_exceptions": {"type": "boolean"},
+    "include_config": {"type": "boolean"},
+    "meta": {"type": "object"},
+}
+# Accepted by every expectation
+COMMON = ["result_format", "catch_exceptions", "include_config", "meta"]
+CONDITIONS = ["row_condition", "condition_parser"]
+BETWEEN = ["min_value", "max_value", "strict_min", "strict_max"]
+
+
+def _map(*optional, required=()):
+    """
+    Column map expectation: evaluated row by row, accepts mostly
+    """
+    return {"required": ["column", *required], "optional": [*optional, "mostly", *CONDITIONS, *COMMON]}
+
+
+def _aggregate(*optional, required=()):
+    return {"required": ["column", *required], "optional": [*optional, *CONDITIONS, *COMMON]}
+
+
+def _table(*optional, required=()):
+    return {"required": list(required), "optional": [*optional, *CONDITIONS, *COMMON]}
+
+
+SIGNATURES = {
+    "expect_column_values_to_be_null": _map(),
+    "expect_column_values_to_not_be_null": _map(),
+    "expect_column_values_to_be_in_set": _map("parse_strings_as_datetimes", required=["value_set"]),
+    "expect_column_values_to_not_be_in_set": _map("parse_strings_as_datetimes", required=["value_set"]),
+    "expect_column_values_to_be_between": _map(*BETWEEN, "parse_strings_as_datetimes"),
+    "expect_column_values_to_be_increasing": _map("strictly", "parse_strings_as_datetimes"),
+    "expect_column_values_to_be_decreasing": _map("strictly", "parse_strings_as_datetimes"),
+    "expect_column_values_to_match_regex": _map(required=["regex"]),
+    "expect_column_values_to_match_regex_list": _map("match_on", required=["regex_list"]),
+    "expect_column_values_to_match_strftime_format": _map(required=["strftime_format"]),
+    "expect_column_values_to_be_dateutil_parseable": _map(),
+    "expect_column_values_to_be_json_parseable": _map(),
+    "expect_column_values_to_match_json_schema": _map(required=["json_schema"]),
+    "expect_column_distinct_values_to_be_in_set": _aggregate("parse_strings_as_datetimes", required=["value_set"]),
+    "expect_column_distinct_values_to_contain_set": _aggregate("parse_strings_as_datetimes", required=["value_set"]),
+    "expect_column_distinct_values_to_equal_set": _aggregate("parse_strings_as_datetimes", required=["value_set"]),
+    "expect_column_mean_to_be_between": _aggregate(*BETWEEN),
+    "expect_column_median_to_be_between": _aggregate(*BETWEEN),
+    "expect_column_quantile_values_to_be_between": _aggregate("allow_relative_error", required=["quantile_ranges"]),
+    "expect_column_stdev_to_be_between": _aggregate(*BETWEEN),
+    "expect_column_unique_value_count_to_be_between": _aggregate(*BETWEEN),
+    "expect_column_proportion_of_unique_values_to_be_between": _aggregate(*BETWEEN),
+    "expect_column_most_common_value_to_be_in_set": _aggregate("ties_okay", required=["value_set"]),
+    "expect_column_sum_to_be_between": _aggregate(*BETWEEN),
+    "expect_column_min_to_be_between": _aggregate(*BETWEEN, "parse_strings_as_datetimes"),
+    "expect_column_max_to_be_between": _aggregate(*BETWEEN, "parse_strings_as_datetimes"),
+    "expect_column_value_lengths_to_be_between": _map(*BETWEEN),
+    "expect_column_value_lengths_to_equal": _map(required=["value"]),
+    "expect_column_values_to_be_unique": _map(),
+    "expect_table_row_count_to_be_between": _table(*BETWEEN),
+    "expect_table_row_count_to_equal": _table(required=["value"]),
+    "expect_table_column_count_to_be_between": _table(*BETWEEN),
+    "expect_table_column_count_to_equal": _table(required=["value"]),
+    "expect_table_columns_to_match_ordered_list": _table(required=["column_list"]),
+    "expect_table_columns_to_match_set": _table("exact_match", required=["column_list"]),
+}
+
+# Arguments the LLM is allowed to produce; the others are set by the app
+GENERATED_OPTIONAL = {"mostly", "strict_min", "strict_max", "match_on", "strictly", "ties_okay", "exact_match",
+                      "allow_relative_error"}
+
+
+def _kwargs_schema(signature, columns):
+    properties = {}
+    for name in signature["required"] + [name for name in signature["optional"] if name in GENERATED_OPTIONAL]:
+        properties[name] = dict(ARGUMENTS[name])
+        if name == "column" and columns:
+            properties[name]["enum"] = list(columns)
+    return {"type": "object", "properties": properties, "required": list(signature["required"]),
+            "additionalProperties": False}
+
+
+@lru_cache(maxsize=256)
+def _expectation_json_schema(expectation_types, columns):
+    variants = [{
+        "type": "object",
+        "properties": {
+            "expectation_type": {"type": "string", "enum": [expectation_type]},
+            "kwargs": _kwargs_schema(SIGNATURES[expectation_type], columns),
+        },
+        "required": ["expectation_type", "kwargs"],
+    } for expectation_type in expectation_types if expectation_type in SIGNATURES]
+    return json.dumps({"anyOf": variants})
+
+
+def expectation_json_schema(expectation_types, columns=None, multi_check=False):
+    """
+    JSON schema of a translation, for Ollama structured outputs
+    Params:
+        expectation_types (iterable) : Allowed expectation types
+        columns (iterable) : Column names of the dataset, "column" is restricted to them
+        multi_check (bool) : Schema of a JSON array of expectations
+    """
+    schema = json.loads(_expectation_json_schema(tuple(expectation_types), tuple(columns or ())))
+    return {"type": "array", "items": schema} if multi_check else schema
+
+
+def _type_matches(value, json_type):
+    types = json_type if isinstance(json_type, list) else [json_type]
+    checks = {
+        "string": lambda v: isinstance(v, str),
+        "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+        "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+        "boolean": lambda v: isinstance(v, bool),
+        "array": lambda v: isinstance(v, (list, tuple)),
+        "object": lambda v: isinstance(v, dict),
+        "null": lambda v: v is None,
+    }
+    return any(checks[t](value) for t in types)
+
+
+def _unknown_column(column, columns):
+    suggestion = difflib.get_close_matches(str(column), [str(c) for c in columns], n=1)
+    hint = f" Did you mean '{suggestion[0]}'?" if suggestion else ""
+    return f"Unknown column '{column}'.{hint}"
+
+
+def validate_expectation(expectation, columns=None):
+    """
+    Check an expectation against its signature and the dataset columns, without touching the data
+    Params:
+        expectation (dict) : {"expectation_type", "kwargs"}
+        columns (iterable) : Column names of the dataset, None to skip the column checks
+    Returns:
+        list : Error messages, empty when the expectation can be run
+    """
+    if not isinstance(expectation, dict):
+        return ["The translation is not a JSON object"]
+    expectation_type = expectation.get("expectation_type")
+    signature = SIGNATURES.get(expectation_type)
+    if signature is None:
+        return [f"Invalid expectation type: {expectation_type}"]
+    kwargs = expectation.get("kwargs", {})
+    if not isinstance(kwargs, dict):
+        return ["The expectation kwargs are not a JSON object"]
+
+    errors = [f"Missing argument '{name}'" for name in signature["required"] if kwargs.get(name) is None]
+    allowed = set(signature["required"]) | set(signature["optional"])
+    errors += [f"Unexpected argument '{name}' for {expectation_type}" for name in kwargs if name not in allowed]
+    for name, value in kwargs.items():
+        if name in allowed and value is not None and not _type_matches(value, ARGUMENTS[name]["type"]):
+            errors.append(f"Argument '{name}' should be of type {ARGUMENTS[name]['type']}, got {value!r}")
+    if errors:
+        return errors
+
+    if "min_value" in allowed and kwargs.get("min_value") is None and kwargs.get("max_value") is None:
+        errors.append("At least one of 'min_value' and 'max_value' is required")
+    min_value, max_value = kwargs.get("min_value"), kwargs.get("max_value")
+    if min_value is not None and max_value is not None and type(min_value) is type(max_value) and min_value > max_value:
+        errors.append(f"min_value ({min_value}) is greater than max_value ({max_value})")
+    if "mostly" in kwargs and not 0 <= kwargs["mostly"] <= 1:
+        errors.append("'mostly' should be between 0 and 1")
+    if "regex" in kwargs:
+        try:
+            re.compile(kwargs["regex"])
+        except re.error as e:
+            errors.append(f"Invalid regex: {str(e)}")
+    if columns is not None:
+        columns = list(columns)
+        # column_list is the expected table layout, a missing column there is a test failure, not an error
+        if "column" in kwargs and kwargs["column"] not in columns:
+            errors.append(_unknown_column(kwargs["column"], columns))
+    return errors
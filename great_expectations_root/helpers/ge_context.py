@@ -0,0 +1,96 @@
+"""
+Process-wide Great Expectations DataContext.
+
+Streamlit reruns `main()` on every interaction, and each run used to load the project
+configuration and stores again with `ge.get_context()`. The context is now loaded once
+per process and shared across sessions, and reloaded only when `great_expectations.yml`
+changes on disk. Datasources are registered once per configuration: `test_yaml_config`
+and `add_datasource` are skipped when the same configuration is already registered.
+
+The context is not thread safe. Every use of it, by the Streamlit sessions, the GE
+persistence worker and the data docs builder, holds CONTEXT_LOCK.
+"""
+import functools
+import hashlib
+import json
+import os
+import threading
+import great_expectations as ge
+from ruamel import yaml
+import ruamel
+
+# Held by every use of the shared context, re-entrant so that locked methods nest
+CONTEXT_LOCK = threading.RLock()
+_context = None
+_config_mtime = None
+# Datasource name -> hash of the configuration it was registered with
+_registered_datasources = {}
+
+
+def _config_file(context):
+    return os.path.join(context.root_directory, "great_expectations.yml")
+
+
+def _read_mtime(context):
+    try:
+        return os.stat(_config_file(context)).st_mtime_ns
+    except (OSError, TypeError):
+        return None
+
+
+def get_data_context():
+    """
+    Return the shared DataContext, reloading it if great_expectations.yml changed
+    """
+    global _context, _config_mtime
+    with CONTEXT_LOCK:
+        if _context is None or _read_mtime(_context) != _config_mtime:
+            print("Loading Great Expectations data context")
+            _context = ge.get_context()
+            _config_mtime = _read_mtime(_context)
+            _registered_datasources.clear()
+        return _context
+
+
+def serialized(method):
+    """
+    Decorator running a function with CONTEXT_LOCK held
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with CONTEXT_LOCK:
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def config_hash(config):
+    """
+    Stable hash of a datasource configuration
+    """
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def register_datasource(context, datasource_yaml):
+    """
+    Test and add a datasource, unless the same configuration is already registered
+    Returns:
+        The datasource object held by the context
+    """
+    global _config_mtime
+    config = yaml.load(datasource_yaml, Loader=ruamel.yaml.Loader)
+    name = config["name"]
+    key = config_hash(config)
+    with CONTEXT_LOCK:
+        if _registered_datasources.get(name) == key:
+            try:
+                return context.get_datasource(name)
+            except Exception:
+                # The datasource disappeared from the context, register it again
+                _registered_datasources.pop(name, None)
+        context.test_yaml_config(datasource_yaml)
+        datasource = context.add_datasource(**config)
+        _registered_datasources[name] = key
+        # Adding a datasource may rewrite great_expectations.yml, that is not a reason to reload
+        if context is _context:
+            _config_mtime = _read_mtime(context)
+        return datasource
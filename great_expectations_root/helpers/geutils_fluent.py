@@ -4,6 +4,7 @@ import datetime
 from great_expectations.checkpoint.checkpoint import SimpleCheckpoint
 import streamlit as st
 import streamlit.components.v1 as components
+from helpers.ge_context import get_data_context
 
 class DataQuality():
 
@@ -16,7 +17,7 @@ class DataQuality():
         self.checkpoint_name = f"{datasource_name}_checkpoint"
         self.dataframe = dataframe
         self.partition_date = datetime.datetime.now()
-        self.context = ge.get_context()
+        self.context = get_data_context()
 
     
     def add_or_update_datasource_2(self):
@@ -0,0 +1,138 @@
+"""
+Single-pass validate-and-persist.
+
+Instead of evaluating an expectation with the validator and then running the
+checkpoint (which evaluates the whole suite a second time), the suite is validated
+once and that result is written to the validation store, its evaluation parameters
+stored (the actions of the checkpoint) and queued for data docs.
+Results of unchanged expectations on an unchanged batch are reused, so only new or
+modified expectations are evaluated.
+"""
+from collections import OrderedDict
+import datetime
+import json
+import threading
+from great_expectations.core.expectation_suite import ExpectationSuite
+from great_expectations.core.expectation_validation_result import ExpectationSuiteValidationResult
+from great_expectations.core.run_identifier import RunIdentifier
+from great_expectations.data_context.types.resource_identifiers import (
+    ExpectationSuiteIdentifier,
+    ValidationResultIdentifier,
+)
+from helpers.docs_builder import DOCS_BUILDER
+
+# Expectation results kept in memory, across sessions
+RESULT_CACHE_SIZE = 5000
+
+
+def expectation_key(configuration):
+    """
+    Identify an expectation configuration by its type and kwargs
+    """
+    # The validator injects the batch id in the configuration of its results
+    kwargs = {key: value for key, value in configuration.kwargs.items() if key != "batch_id"}
+    return json.dumps({"expectation_type": configuration.expectation_type,
+                       "kwargs": kwargs}, sort_keys=True, default=str)
+
+
+class ValidationResultCache():
+    """
+    LRU cache of expectation results keyed by (batch fingerprint, expectation)
+    """
+    def __init__(self, max_size=RESULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, batch_fingerprint, configuration):
+        key = (batch_fingerprint, expectation_key(configuration))
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+
+    def set(self, batch_fingerprint, configuration, result):
+        key = (batch_fingerprint, expectation_key(configuration))
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+
+RESULT_CACHE = ValidationResultCache()
+
+
+def _statistics(results):
+    evaluated = len(results)
+    successful = sum(1 for result in results if result.success)
+    return {
+        "evaluated_expectations": evaluated,
+        "successful_expectations": successful,
+        "unsuccessful_expectations": evaluated - successful,
+        "success_percent": successful / evaluated * 100 if evaluated else None,
+    }
+
+
+def validate_and_persist(context, validator, batch_fingerprint, run_name, cache=RESULT_CACHE):
+    """
+    Validate the validator's suite once and persist the result.
+    Params:
+        batch_fingerprint (str) : Identifies the version of the batch data
+        run_name (str) : Run name of the stored validation result
+    Returns:
+        (ExpectationSuiteValidationResult, ValidationResultIdentifier, dict) : The suite
+        result, its store identifier and each expectation result keyed by expectation_key
+    """
+    suite = validator.get_expectation_suite(discard_failed_expectations=False)
+    configurations = suite.expectations
+    results = {}
+    pending = []
+    for configuration in configurations:
+        cached = cache.get(batch_fingerprint, configuration)
+        if cached is not None:
+            results[expectation_key(configuration)] = cached
+        else:
+            pending.append(configuration)
+
+    meta = {}
+    if pending:
+        print(f"Evaluating {len(pending)} new or changed expectations, "
+              f"reusing {len(configurations) - len(pending)} results")
+        partial_suite = ExpectationSuite(expectation_suite_name=suite.expectation_suite_name,
+                                         expectations=pending, data_context=context)
+        validation = validator.validate(expectation_suite=partial_suite, catch_exceptions=True)
+        meta = dict(validation.meta)
+        validated = {expectation_key(result.expectation_config): result for result in validation.results}
+        for position, configuration in enumerate(pending):
+            result = validated.get(expectation_key(configuration), validation.results[position])
+            results[expectation_key(configuration)] = result
+            if not result.exception_info.get("raised_exception"):
+                cache.set(batch_fingerprint, configuration, result)
+
+    ordered_results = [results[expectation_key(configuration)] for configuration in configurations]
+    run_id = RunIdentifier(run_name=run_name, run_time=datetime.datetime.now(datetime.timezone.utc))
+    meta.update({
+        "expectation_suite_name": suite.expectation_suite_name,
+        "run_id": run_id,
+        "batch_fingerprint": batch_fingerprint,
+        "validation_time": run_id.run_time.strftime("%Y%m%dT%H%M%S.%fZ"),
+    })
+    suite_result = ExpectationSuiteValidationResult(
+        success=all(result.success for result in ordered_results),
+        results=ordered_results,
+        statistics=_statistics(ordered_results),
+        meta=meta,
+    )
+    identifier = ValidationResultIdentifier(
+        expectation_suite_identifier=ExpectationSuiteIdentifier(suite.expectation_suite_name),
+        run_id=run_id,
+        batch_identifier=validator.active_batch_id,
+    )
+    # Actions of the checkpoint: StoreValidationResultAction, StoreEvaluationParametersAction
+    context.validations_store.set(identifier, suite_result)
+    context.store_evaluation_parameters(suite_result)
+    # The suite page is rebuilt with the result, like UpdateDataDocsAction did
+    DOCS_BUILDER.request_build(context, [identifier, identifier.expectation_suite_identifier])
+    return suite_result, identifier, results
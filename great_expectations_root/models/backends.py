@@ -0,0 +1,359 @@
+"""
+Pluggable async LLM backends translating natural language checks into expectation JSON.
+
+Every backend runs its blocking client in a worker thread, behind a semaphore bounding
+its concurrent requests, with a per-request timeout. Requests are queued on one event
+loop running in a background thread, so Streamlit script threads only wait on a future
+and can cancel it. A router tries the configured backends in order, falling back to the
+next one on error, timeout or invalid output, and keeps a latency histogram per backend.
+
+Backends are configured with environment variables:
+    LLM_BACKENDS : Comma separated fallback order, e.g. "ollama,gpt" (default "ollama")
+    LLM_<NAME>_MAX_CONCURRENCY, LLM_<NAME>_TIMEOUT_SECONDS : Per backend limits
+"""
+import asyncio
+import bisect
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import threading
+import time
+from dotenv import load_dotenv, find_dotenv
+
+from helpers.expectation_results import normalize_expectation
+from models.json_stream import JsonObjectScanner
+from models.ollama_model import OLLAMA_MODEL, stream_chat_completion
+
+load_dotenv(find_dotenv())
+
+# Upper bounds (seconds) of the latency histogram buckets, the last bucket is unbounded
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+# Default limits per backend: (max concurrent requests, timeout in seconds)
+BACKEND_LIMITS = {
+    "ollama": (2, 120),
+    "falcon": (1, 120),
+    "gpt": (4, 30),
+    "fake": (4, 5),
+}
+
+
+class BackendError(Exception):
+    """
+    Raised when no backend produced a valid translation
+    """
+
+
+class LatencyHistogram():
+    """
+    Request latencies in fixed buckets, with outcome counters
+    """
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.outcomes = {}
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, outcome="ok"):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket holding the q quantile, None without observations
+        """
+        with self._lock:
+            total = sum(self.counts)
+            if not total:
+                return None
+            cumulative = 0
+            for index, count in enumerate(self.counts):
+                cumulative += count
+                if cumulative >= q * total:
+                    return self.buckets[index] if index < len(self.buckets) else self.max_seconds
+        return None
+
+    def snapshot(self):
+        with self._lock:
+            total = sum(self.counts)
+            buckets = {f"<= {bound}s": count for bound, count in zip(self.buckets, self.counts)}
+            buckets[f"> {self.buckets[-1]}s"] = self.counts[-1]
+            snapshot = {"requests": total, "outcomes": dict(self.outcomes), "buckets": buckets,
+                        "mean_seconds": self.total_seconds / total if total else None,
+                        "max_seconds": self.max_seconds}
+        snapshot["p50_seconds"] = self.quantile(0.5)
+        snapshot["p95_seconds"] = self.quantile(0.95)
+        return snapshot
+
+
+class LLMBackend():
+    """
+    Base class: a blocking generate() run in worker threads with bounded concurrency
+    """
+    name = None
+
+    def __init__(self, max_concurrency=None, timeout_seconds=None):
+        default_concurrency, default_timeout = BACKEND_LIMITS.get(self.name, (1, 60))
+        prefix = f"LLM_{str(self.name).upper()}"
+        self.max_concurrency = int(max_concurrency or os.environ.get(f"{prefix}_MAX_CONCURRENCY", default_concurrency))
+        self.timeout_seconds = float(timeout_seconds or os.environ.get(f"{prefix}_TIMEOUT_SECONDS", default_timeout))
+        self.histogram = LatencyHistogram()
+        self._semaphore = None
+        self.in_flight = 0
+
+    @property
+    def model(self):
+        return self.name
+
+    def generate(self, system_prompt, user_text, openers, cancel_event, response_format=None):
+        """
+        Blocking translation returning the JSON text of the expectation (or array)
+        Params:
+            cancel_event (threading.Event) : Set when the request is cancelled or timed out,
+                                             backends stop generating early when they can
+            response_format (dict) : JSON schema of the output, for backends supporting constrained generation
+        """
+        raise NotImplementedError
+
+    async def run(self, system_prompt, user_text, openers, executor, response_format=None):
+        """
+        Run generate() in a worker thread, bounded by the semaphore and the timeout.
+        The semaphore slot is only released once the worker thread returns, so an
+        abandoned generation still counts against the concurrency limit.
+        """
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        cancel_event = threading.Event()
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout_seconds)
+            self.in_flight += 1
+
+            def release(done):
+                # Done callbacks of executor futures run on the event loop
+                self.in_flight -= 1
+                self._semaphore.release()
+                if not done.cancelled():
+                    # Mark the error of an abandoned generation as retrieved
+                    done.exception()
+
+            future = loop.run_in_executor(executor, self.generate, system_prompt, user_text, openers, cancel_event,
+                                          response_format)
+            future.add_done_callback(release)
+            remaining = max(self.timeout_seconds - (time.perf_counter() - start), 0)
+            return await asyncio.wait_for(asyncio.shield(future), remaining)
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            if outcome != "ok":
+                cancel_event.set()
+            self.histogram.observe(time.perf_counter() - start, outcome)
+
+    def stats(self):
+        stats = self.histogram.snapshot()
+        stats.update({"model": self.model, "max_concurrency": self.max_concurrency,
+                      "timeout_seconds": self.timeout_seconds, "in_flight": self.in_flight})
+        return stats
+
+
+class OllamaBackend(LLMBackend):
+    """
+    Local Ollama model, streamed and stopped once the JSON value is complete
+    """
+    name = "ollama"
+
+    def __init__(self, model=OLLAMA_MODEL, **kwargs):
+        super().__init__(**kwargs)
+        self._model = model
+
+    @property
+    def model(self):
+        return self._model
+
+    def generate(self, system_prompt, user_text, openers, cancel_event, response_format=None):
+        content, _ = stream_chat_completion(system_prompt, user_text, self._model, openers=openers,
+                                            cancel_event=cancel_event, response_format=response_format)
+        return content
+
+
+class LegacyExpectationBackend(LLMBackend):
+    """
+    Finetuned models returning an expectation call such as
+    "expect_column_values_to_not_be_null(column='x')" for one check, without a system prompt.
+    Each check (line) is translated separately and converted to expectation JSON.
+    """
+    def translate(self, sentence):
+        raise NotImplementedError
+
+    def generate(self, system_prompt, user_text, openers, cancel_event, response_format=None):
+        checks = [line.strip() for line in user_text.splitlines() if line.strip()] if "[" in openers else [user_text]
+        expectations = []
+        for check in checks:
+            if cancel_event.is_set():
+                raise InterruptedError(f"{self.name} generation cancelled")
+            expectation_type, kwargs = normalize_expectation(self.translate(check).strip())
+            expectations.append({"expectation_type": expectation_type, "kwargs": kwargs})
+        return json.dumps(expectations if "[" in openers else expectations[0])
+
+
+class FalconBackend(LegacyExpectationBackend):
+    """
+    Finetuned Falcon-7B (models/falcon_model.py), loaded once per process and kept resident
+    """
+    name = "falcon"
+
+    def translate(self, sentence):
+        from models.falcon_model import get_expectations, get_model
+        model, tknizer = get_model()
+        return get_expectations(sentence, model, tknizer) or ""
+
+
+class GPTBackend(LegacyExpectationBackend):
+    """
+    Finetuned GPT-3 of the great_expectations app (models/gpt_model.py)
+    """
+    name = "gpt"
+
+    def translate(self, sentence):
+        from models.gpt_model import naturallanguagetoexpectation
+        return naturallanguagetoexpectation(sentence)
+
+
+class FakeBackend(LLMBackend):
+    """
+    In-process backend for tests and benchmarks: canned responses with a simulated latency
+    """
+    name = "fake"
+
+    def __init__(self, responses=None, latency_seconds=0.0, fail=False, **kwargs):
+        """
+        Params:
+            responses (dict or callable) : user text -> response text, or a function of the user text
+            latency_seconds (float) : Simulated generation time
+            fail (bool) : Raise an error instead of answering
+        """
+        super().__init__(**kwargs)
+        self.responses = responses or {}
+        self.latency_seconds = latency_seconds
+        self.fail = fail
+        self.calls = 0
+
+    def generate(self, system_prompt, user_text, openers, cancel_event, response_format=None):
+        self.calls += 1
+        if cancel_event.wait(self.latency_seconds):
+            raise InterruptedError("fake generation cancelled")
+        if self.fail:
+            raise RuntimeError("fake backend failure")
+        response = self.responses(user_text) if callable(self.responses) else self.responses.get(user_text)
+        if response is None:
+            raise KeyError(f"No fake response for: {user_text}")
+        scanner = JsonObjectScanner(openers=openers)
+        scanner.feed(response)
+        return scanner.json_text if scanner.complete else response
+
+
+BACKENDS = {backend.name: backend for backend in (OllamaBackend, FalconBackend, GPTBackend, FakeBackend)}
+
+
+class BackendRouter():
+    """
+    Queue translation requests on a background event loop and fall back across backends
+    """
+    def __init__(self, backends):
+        self.backends = list(backends)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(sum(backend.max_concurrency for backend in self.backends), 1),
+            thread_name_prefix="llm-backend")
+        self._loop = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        return self.backends[0].model if self.backends else None
+
+    def model_of(self, backend_name):
+        """
+        Model of the router backend with this name
+        """
+        return next((backend.model for backend in self.backends if backend.name == backend_name), None)
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="llm-backend-loop", daemon=True).start()
+            return self._loop
+
+    async def agenerate(self, system_prompt, user_text, openers="{", is_valid=None, response_format=None):
+        """
+        Try each backend in order until one returns a valid response
+        Returns:
+            (str, str) : The response content and the name of the backend which produced it
+        """
+        errors = []
+        for backend in self.backends:
+            try:
+                content = await backend.run(system_prompt, user_text, openers, self._executor, response_format)
+            except asyncio.TimeoutError:
+                errors.append(f"{backend.name}: timed out after {backend.timeout_seconds:.0f}s")
+                continue
+            except Exception as e:
+                errors.append(f"{backend.name}: {str(e)}")
+                continue
+            if is_valid is None or is_valid(content):
+                return content, backend.name
+            errors.append(f"{backend.name}: invalid response")
+            print(f"Invalid response from the {backend.name} backend, falling back")
+        raise BackendError("No backend produced a valid translation (" + "; ".join(errors) + ")")
+
+    def submit(self, system_prompt, user_text, openers="{", is_valid=None, response_format=None):
+        """
+        Queue a request from any thread
+        Returns:
+            concurrent.futures.Future : Resolves to (content, backend name), cancel() cancels the request
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self.agenerate(system_prompt, user_text, openers, is_valid, response_format), self._get_loop())
+
+    def generate(self, system_prompt, user_text, openers="{", is_valid=None, response_format=None):
+        """
+        Blocking call from a Streamlit script thread, the request is cancelled if the wait is interrupted
+        Returns:
+            (str, str) : The response content and the name of the backend which produced it
+        """
+        future = self.submit(system_prompt, user_text, openers, is_valid, response_format)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def stats(self):
+        return {backend.name: backend.stats() for backend in self.backends}
+
+
+def build_router(names=None):
+    """
+    Router over the backends named in LLM_BACKENDS, in fallback order
+    """
+    names = names or [name.strip() for name in os.environ.get("LLM_BACKENDS", "ollama").split(",") if name.strip()]
+    unknown = [name for name in names if name not in BACKENDS]
+    if unknown:
+        raise ValueError(f"Unknown LLM backends: {', '.join(unknown)}")
+    return BackendRouter([BACKENDS[name]() for name in names])
+
+
+LLM_ROUTER = build_router()
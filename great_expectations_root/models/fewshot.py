@@ -0,0 +1,160 @@
+"""
+Retrieval of the few-shot examples closest to a request, from the fine-tuning dataset.
+
+A TF-IDF index is built over the prompts of `finetuning_template/data/train.json`,
+saved to disk next to the other local caches and loaded once per process. Each request
+only brings its k most similar examples into the prompt, instead of a fixed example block.
+"""
+from collections import Counter
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from dotenv import load_dotenv, find_dotenv
+
+from helpers.expectation_results import normalize_expectation
+
+load_dotenv(find_dotenv())
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRAIN_PATH = os.path.join(ROOT_DIR, "finetuning_template", "data", "train.json")
+INDEX_PATH = os.environ.get("FEWSHOT_INDEX_PATH") or os.path.join(ROOT_DIR, "uncommitted", "fewshot_index.json")
+# Examples added to each prompt
+FEWSHOT_K = int(os.environ.get("FEWSHOT_K", 3))
+INDEX_VERSION = 1
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "be", "check", "column", "ensure", "for", "if", "in", "is",
+    "of", "that", "the", "to", "values", "verify", "whether", "with",
+}
+
+
+def tokenize(text):
+    """
+    Lowercase word unigrams and bigrams, without stop words.
+    Numbers are kept as a single token so that they do not dominate the similarity.
+    """
+    words = ["<num>" if re.fullmatch(r"\d+(?:\.\d+)?", word) else word
+             for word in re.findall(r"[a-z0-9]+(?:\.\d+)?", text.lower())]
+    words = [word for word in words if word not in STOP_WORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class FewShotIndex():
+    """
+    TF-IDF vectors (sparse, L2 normalized) of the training prompts
+    """
+    def __init__(self, examples, idf, vectors, source_hash=None):
+        """
+        Params:
+            examples (list) : {"prompt", "expectation_type", "kwargs"} per training pair
+            idf (dict) : Inverse document frequency per token
+            vectors (list) : Sparse {token: weight} vector per example
+        """
+        self.examples = examples
+        self.idf = idf
+        self.vectors = vectors
+        self.source_hash = source_hash
+        # Inverted index: token -> [(example index, weight)]
+        self._postings = {}
+        for index, vector in enumerate(vectors):
+            for token, weight in vector.items():
+                self._postings.setdefault(token, []).append((index, weight))
+
+    @classmethod
+    def build(cls, train_path=TRAIN_PATH):
+        """
+        Build the index from the training pairs whose completion parses as an expectation call
+        """
+        with open(train_path) as f:
+            pairs = json.load(f)
+        examples = []
+        for pair in pairs:
+            try:
+                expectation_type, kwargs = normalize_expectation(pair["completion"])
+            except (KeyError, ValueError):
+                continue
+            examples.append({"prompt": pair["prompt"].strip(), "expectation_type": expectation_type, "kwargs": kwargs})
+        documents = [Counter(tokenize(example["prompt"])) for example in examples]
+        document_frequency = Counter(token for document in documents for token in document)
+        idf = {token: math.log((1 + len(documents)) / (1 + count)) + 1 for token, count in document_frequency.items()}
+        vectors = [cls._vector(document, idf) for document in documents]
+        return cls(examples, idf, vectors, source_hash=file_hash(train_path))
+
+    @staticmethod
+    def _vector(counts, idf):
+        vector = {token: (1 + math.log(count)) * idf[token] for token, count in counts.items() if token in idf}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {token: weight / norm for token, weight in vector.items()} if norm else {}
+
+    def save(self, index_path=INDEX_PATH):
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        with open(index_path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "source_hash": self.source_hash, "examples": self.examples,
+                       "idf": self.idf, "vectors": self.vectors}, f)
+
+    @classmethod
+    def load(cls, index_path=INDEX_PATH):
+        with open(index_path) as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported few-shot index version: {data.get('version')}")
+        return cls(data["examples"], data["idf"], data["vectors"], source_hash=data["source_hash"])
+
+    def search(self, query, k=FEWSHOT_K, allowed_types=None, exclude_prompts=()):
+        """
+        The k examples most similar to the query (cosine similarity), most similar first
+        Params:
+            allowed_types (iterable) : Only return examples of these expectation types
+            exclude_prompts (iterable) : Prompts never returned, e.g. the replayed case in benchmarks
+        """
+        scores = {}
+        for token, weight in self._vector(Counter(tokenize(query)), self.idf).items():
+            for index, example_weight in self._postings.get(token, ()):
+                scores[index] = scores.get(index, 0.0) + weight * example_weight
+        allowed_types = set(allowed_types) if allowed_types is not None else None
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        examples = []
+        for index, score in ranked:
+            example = self.examples[index]
+            if example["prompt"] in exclude_prompts:
+                continue
+            if allowed_types is None or example["expectation_type"] in allowed_types:
+                examples.append(dict(example, score=score))
+                if len(examples) == k:
+                    break
+        return examples
+
+
+_lock = threading.Lock()
+_index = None
+
+
+def get_fewshot_index(train_path=TRAIN_PATH, index_path=INDEX_PATH):
+    """
+    Process-wide index, loaded from disk, or built and saved when train.json changed
+    """
+    global _index
+    with _lock:
+        if _index is None:
+            source_hash = file_hash(train_path)
+            try:
+                index = FewShotIndex.load(index_path)
+                if index.source_hash != source_hash:
+                    raise ValueError("train.json changed")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Building the few-shot index ({str(e)})")
+                index = FewShotIndex.build(train_path)
+                try:
+                    index.save(index_path)
+                except OSError as e:
+                    print(f"Unable to save the few-shot index: {str(e)}")
+            _index = index
+        return _index
@@ -0,0 +1,81 @@
+"""
+Incremental scanner extracting the first complete JSON object from streamed text.
+
+Small models often keep writing explanations after the JSON they were asked for.
+Feeding the streamed tokens to the scanner lets the caller stop generation as soon
+as the first balanced top-level object is complete and parses.
+"""
+import json
+
+
+def python_to_json(text):
+    """
+    Replace python None by JSON null, as the models sometimes write it
+    """
+    return text.replace(": None", ": null").replace(":None", ":null")
+
+
+class JsonObjectScanner():
+    """
+    Track braces outside of string literals across streamed chunks
+    """
+    def __init__(self, openers="{"):
+        """
+        Params:
+            openers (str) : Characters starting a top-level value, "{" for an object
+        """
+        self.openers = openers
+        # Text received so far, and the JSON text of the value once complete
+        self.text = ""
+        self.json_text = None
+        self._start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.value = None
+
+    def feed(self, chunk):
+        """
+        Scan a new chunk of text
+        Returns:
+            The parsed value once the first balanced top-level value parses, else None
+        """
+        if self.complete:
+            return self.value
+        offset = len(self.text)
+        self.text += chunk
+        for position in range(offset, len(self.text)):
+            char = self.text[position]
+            if self._start is None:
+                if char in self.openers:
+                    self._start = position
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = python_to_json(self.text[self._start:position + 1])
+                    try:
+                        self.value = json.loads(candidate)
+                        self.json_text = candidate
+                        return self.value
+                    except json.JSONDecodeError:
+                        # Balanced but not valid JSON, look for a later value
+                        self._start = None
+        return None
+
+    @property
+    def complete(self):
+        return self.value is not None
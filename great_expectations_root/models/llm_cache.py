@@ -0,0 +1,143 @@
+"""
+Persistent cache of LLM translations (natural language -> expectation JSON).
+
+Entries are keyed by the normalized user text, the schema of the selected table, the
+model name and a hash of the system prompt, and stored in a local SQLite file so that
+they survive restarts and are shared by every session of the app.
+"""
+from contextlib import contextmanager
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv, find_dotenv
+
+load_dotenv(find_dotenv())
+
+LLM_CACHE_PATH = os.environ.get('LLM_CACHE_PATH', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uncommitted', 'llm_cache.sqlite3'))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 5000))
+# Entries older than this are ignored, 0 disables the TTL
+LLM_CACHE_TTL_SECONDS = float(os.environ.get('LLM_CACHE_TTL_SECONDS', 0))
+
+
+def normalize_text(text):
+    """
+    Normalize a user request for caching: collapse whitespace and drop the final period.
+    Case is kept, since value sets such as [COMPLETED, PENDING] are case sensitive.
+    """
+    return re.sub(r"\s+", " ", text).strip().rstrip(".").strip()
+
+
+def prompt_hash(system_prompt):
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache():
+    """
+    SQLite backed LRU cache with an optional TTL and hit / miss counters
+    """
+    def __init__(self, path=LLM_CACHE_PATH, max_entries=LLM_CACHE_MAX_ENTRIES, ttl_seconds=LLM_CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        """
+        Short lived connection, committed and closed on exit
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        try:
+            self._initialize(connection)
+            yield connection
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _initialize(self, connection):
+        if not self._initialized:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT,
+                    created_at REAL,
+                    last_access REAL,
+                    hit_count INTEGER DEFAULT 0
+                )""")
+            connection.execute("CREATE INDEX IF NOT EXISTS llm_responses_last_access ON llm_responses (last_access)")
+            self._initialized = True
+
+    @staticmethod
+    def make_key(user_text, schema, model, system_prompt):
+        """
+        Cache key of a translation request
+        """
+        payload = json.dumps({
+            "text": normalize_text(user_text),
+            "schema": schema,
+            "model": model,
+            "system_prompt": prompt_hash(system_prompt),
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Cached response for a key, or None on a miss (absent or expired)
+        """
+        now = time.time()
+        with self._lock:
+            with self._connect() as connection:
+                row = connection.execute("SELECT response, created_at FROM llm_responses WHERE key = ?",
+                                         (key,)).fetchone()
+                if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                    connection.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                connection.execute("UPDATE llm_responses SET last_access = ?, hit_count = hit_count + 1 WHERE key = ?",
+                                   (now, key))
+                self.hits += 1
+                return row[0]
+
+    def set(self, key, model, response):
+        """
+        Store a response and evict the least recently used entries over the size limit
+        """
+        now = time.time()
+        with self._lock:
+            with self._connect() as connection:
+                connection.execute("""
+                    INSERT OR REPLACE INTO llm_responses (key, model, response, created_at, last_access, hit_count)
+                    VALUES (?, ?, ?, ?, ?, 0)""", (key, model, response, now, now))
+                connection.execute("""
+                    DELETE FROM llm_responses WHERE key IN (
+                        SELECT key FROM llm_responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)""",
+                                   (self.max_entries,))
+
+    def stats(self):
+        """
+        Hit / miss counters of this process and number of stored entries
+        """
+        with self._lock:
+            try:
+                with self._connect() as connection:
+                    entries = connection.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+            except (OSError, sqlite3.Error):
+                entries = None
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "entries": entries,
+                "hit_rate": self.hits / lookups if lookups else None}
+
+
+LLM_CACHE = LLMResponseCache()
@@ -0,0 +1,198 @@
+"""
+Ollama backend translating natural language checks into expectation JSON.
+"""
+import json
+import re
+import time
+import ollama
+
+from models.llm_cache import LLM_CACHE
+from models.json_stream import JsonObjectScanner, python_to_json
+from models.rule_parser import find_column
+
+OLLAMA_MODEL = 'phi4-mini'
+
+
+def chat_completion(system_prompt, user_text, model=OLLAMA_MODEL, response_format=None, usage=None):
+    """
+    Send the request to Ollama and return the raw response content
+    Params:
+        response_format (dict) : JSON schema constraining the output (Ollama structured outputs)
+        usage (dict) : Filled with the prompt and completion token counts reported by Ollama
+    """
+    response = ollama.chat(
+        model=model,
+        messages=[
+            {'role': 'system', 'content': system_prompt},
+            {'role': 'user', 'content': user_text}
+        ],
+        format=response_format or '',
+    )
+    if usage is not None:
+        usage.update(prompt_tokens=response.get('prompt_eval_count'), completion_tokens=response.get('eval_count'))
+    return response['message']['content'].strip()
+
+
+def stream_chat_completion(system_prompt, user_text, model=OLLAMA_MODEL, openers="{", cancel_event=None,
+                           response_format=None):
+    """
+    Stream the response and stop generation once the first JSON object is complete
+    Params:
+        openers (str) : Characters starting the expected JSON value, "[{" to accept an array
+        cancel_event (threading.Event) : When set, generation stops and InterruptedError is raised
+        response_format (dict) : JSON schema constraining the output (Ollama structured outputs)
+    Returns:
+        (str, dict) : The JSON text of the object (the whole cleaned response if none
+                      was found) and generation statistics
+    """
+    start = time.perf_counter()
+    scanner = JsonObjectScanner(openers=openers)
+    stream = ollama.chat(
+        model=model,
+        messages=[
+            {'role': 'system', 'content': system_prompt},
+            {'role': 'user', 'content': user_text}
+        ],
+        format=response_format or '',
+        stream=True
+    )
+    chunks = 0
+    done = False
+    try:
+        for chunk in stream:
+            if cancel_event is not None and cancel_event.is_set():
+                raise InterruptedError("Ollama generation cancelled")
+            chunks += 1
+            scanner.feed(chunk['message']['content'])
+            done = chunk.get('done', False)
+            if scanner.complete:
+                break
+    finally:
+        # Closing the stream drops the connection, which makes Ollama stop generating
+        stream.close()
+    stats = {
+        "chunks": chunks,
+        "stopped_early": scanner.complete and not done,
+        "seconds": time.perf_counter() - start,
+    }
+    print(f"Ollama streamed {chunks} chunks in {stats['seconds']:.2f}s"
+          f"{' (stopped after the JSON object)' if stats['stopped_early'] else ''}")
+    if scanner.complete:
+        return scanner.json_text, stats
+    return clean_response(scanner.text), stats
+
+
+def clean_response(content):
+    """
+    Strip markdown code fences and replace python None by JSON null
+    """
+    content = content.strip()
+    # Attempt to find JSON within potential markdown code blocks
+    if content.startswith("```json"):
+        content = content[7:]
+    elif content.startswith("```"):
+        content = content[3:]
+    
+    if content.endswith("```"):
+        content = content[:-3]
+    
+    # Clean up the response to ensure it's valid JSON
+    content = content.strip()
+    
+    # Fix Python None -> JSON null conversion
+    return python_to_json(content)
+
+
+def parse_expectation(content):
+    """
+    Parse the expectation JSON object of a cleaned response
+    """
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        # Try a different approach - extract JSON using regex
+        json_pattern = r'\{.*\}'
+        match = re.search(json_pattern, content, re.DOTALL)
+        if match:
+            return json.loads(match.group(0))
+        raise
+
+
+def parse_expectations(content):
+    """
+    Parse the expectation list of a multi-check response; a single object is a list of one
+    """
+    try:
+        parsed = json.loads(content)
+    except json.JSONDecodeError:
+        match = re.search(r'\[.*\]', content, re.DOTALL)
+        if match is None:
+            return [parse_expectation(content)]
+        parsed = json.loads(match.group(0))
+    return parsed if isinstance(parsed, list) else [parsed]
+
+
+def match_expectations(checks, elements, columns):
+    """
+    Pair the checks of a multi-check request with the elements of the response: in order
+    when there is one element per check, otherwise by the column each check names (table
+    level checks with the elements without column). A check without a matching element
+    gets None.
+    """
+    if len(elements) == len(checks):
+        return list(elements)
+    remaining = [element for element in elements if isinstance(element, dict)]
+    matched = []
+    for check in checks:
+        column = find_column(check, columns)
+        element = next((element for element in remaining
+                        if (element.get("kwargs") or {}).get("column") == column), None)
+        if element is not None:
+            remaining = [other for other in remaining if other is not element]
+        matched.append(element)
+    return matched
+
+
+def cached_chat_completion(system_prompt, user_text, schema, model=OLLAMA_MODEL, is_valid=None, cache=LLM_CACHE,
+                           stream=True, openers="{", generate=None, response_format=None):
+    """
+    Chat completion through the persistent response cache
+    Params:
+        schema (dict) : Schema of the selected table, part of the cache key
+        model (str) : Model expected to answer, part of the cache key
+        is_valid (callable) : Only responses for which is_valid(content) is True are cached
+        stream (bool) : Stream the generation and stop once the JSON object is complete
+        openers (str) : Characters starting the expected JSON value, "[{" to accept an array
+        generate (callable) : generate(system_prompt, user_text, openers, response_format) returning
+                              the cleaned content and the model which produced it, used instead
+                              of calling Ollama directly. Answers of another model than `model`
+                              (a fallback backend) are not cached under its key.
+        response_format (dict) : JSON schema constraining the output
+    Returns:
+        (str, bool) : The cleaned response content and whether it came from the cache
+    """
+    key = cache.make_key(user_text, schema, model, system_prompt)
+    try:
+        content = cache.get(key)
+    except Exception as e:
+        print(f"LLM cache unavailable: {str(e)}")
+        content = None
+    if content is not None:
+        return content, True
+
+    answered_by = model
+    if generate is not None:
+        content, answered_by = generate(system_prompt, user_text, openers, response_format)
+    elif stream:
+        content, _ = stream_chat_completion(system_prompt, user_text, model, openers=openers,
+                                            response_format=response_format)
+    else:
+        content = clean_response(chat_completion(system_prompt, user_text, model, response_format))
+    if answered_by != model:
+        print(f"Not caching the response of the fallback model {answered_by}")
+    elif is_valid is None or is_valid(content):
+        try:
+            cache.set(key, model, content)
+        except Exception as e:
+            print(f"Unable to store the LLM response in cache: {str(e)}")
+    return content, False
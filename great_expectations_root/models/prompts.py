@@ -0,0 +1,192 @@
+"""
+System prompt of the natural language to expectation translation.
+
+The prompt is a static prefix, byte-identical across calls so that Ollama can reuse
+its prompt-prefix KV cache, followed by a short schema section built from the selected
+data source only, then by the few-shot examples closest to the request. Schema
+sections are cached per dataset version.
+"""
+from collections import OrderedDict
+import json
+import re
+import threading
+
+from models.fewshot import FEWSHOT_K, get_fewshot_index
+
+SYSTEM_PROMPT_PREFIX = """You are an expert in Great Expectations. Your task is to convert the user's natural language description of a data quality check into a single Great Expectations Expectation JSON object. 
+
+ONLY output the JSON object, nothing else. The JSON should be compatible with the Great Expectations `run_expectation` method. Focus on creating ONE expectation per request.
+
+IMPORTANT JSON formatting:
+- Use valid JSON format with double quotes for strings and property names
+- For missing or unlimited values, use 'null' (not None, undefined, or empty string)
+- For example: {"max_value": null} not {"max_value": None}
+
+IMPORTANT Regex Guidelines:
+- Use expect_column_values_to_match_regex only for text pattern matching
+- For numeric columns, use expect_column_values_to_be_between or other numeric expectations
+- Regex patterns must be valid PostgreSQL regular expressions
+
+IMPORTANT: Use ONLY these valid expectation types:
+- expect_column_values_to_be_between
+- expect_column_values_to_be_in_set
+- expect_column_values_to_not_be_null
+- expect_column_values_to_be_null
+- expect_column_values_to_be_unique
+- expect_column_values_to_match_regex (use only for text columns)
+- expect_table_row_count_to_be_between
+- expect_column_mean_to_be_between
+- expect_column_min_to_be_between
+- expect_column_max_to_be_between
+- expect_column_sum_to_be_between
+- expect_column_proportion_of_unique_values_to_be_between
+
+Make sure to format the JSON correctly and use the exact expectation names as listed above.
+Only use the column names of the selected data source listed below.
+
+"""
+
+# Expectation types the prompt allows, retrieved examples are restricted to them
+PROMPT_EXPECTATION_TYPES = re.findall(r"^- (expect_\w+)", SYSTEM_PROMPT_PREFIX, re.MULTILINE)
+
+# Hand-written examples, used when the few-shot index is unavailable
+STATIC_EXAMPLES = """Example user input: 'Column price should be between 0 and 2000000.'
+Example JSON output: {"expectation_type": "expect_column_values_to_be_between", "kwargs": {"column": "price", "min_value": 0, "max_value": 2000000}}
+
+Example user input: 'Column price should be greater than 0.'
+Example JSON output: {"expectation_type": "expect_column_values_to_be_between", "kwargs": {"column": "price", "min_value": 0, "max_value": null}}
+
+Example user input: 'Column status must be one of [COMPLETED, PENDING, SHIPPED]'
+Example JSON output: {"expectation_type": "expect_column_values_to_be_in_set", "kwargs": {"column": "status", "value_set": ["COMPLETED", "PENDING", "SHIPPED"]}}
+
+Example user input: 'Column email should match email format'
+Example JSON output: {"expectation_type": "expect_column_values_to_match_regex", "kwargs": {"column": "email", "regex": "^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\\.[a-zA-Z]{2,}$"}}"""
+
+# Multi-check mode: same instructions, but one JSON array with one object per check
+MULTI_CHECK_PROMPT_PREFIX = SYSTEM_PROMPT_PREFIX.replace(
+    "into a single Great Expectations Expectation JSON object.",
+    "into a JSON array of Great Expectations Expectation JSON objects.",
+).replace(
+    "ONLY output the JSON object, nothing else. The JSON should be compatible with the Great Expectations "
+    "`run_expectation` method. Focus on creating ONE expectation per request.",
+    "The user lists several checks, one per line. ONLY output one JSON array containing one expectation "
+    "JSON object per check, in the order of the checks, nothing else. Each object should be compatible with "
+    "the Great Expectations `run_expectation` method.",
+)
+
+# Format of the multi-check answer, appended after the examples
+MULTI_CHECK_EXAMPLE = """Example user input: 'Column price should be greater than 0.
+Column status must be one of [COMPLETED, PENDING]'
+Example JSON output: [{"expectation_type": "expect_column_values_to_be_between", "kwargs": {"column": "price", "min_value": 0, "max_value": null}}, {"expectation_type": "expect_column_values_to_be_in_set", "kwargs": {"column": "status", "value_set": ["COMPLETED", "PENDING"]}}]"""
+
+# Schema contexts kept in memory, across sessions
+SCHEMA_CONTEXT_CACHE_SIZE = 256
+
+_lock = threading.Lock()
+# (source name, dataset version) -> (schema, system prompt, multi-check system prompt)
+_schema_contexts = OrderedDict()
+
+
+def readable_type(data_type):
+    """
+    Short type name for the prompt, from a pandas dtype or a PostgreSQL data type
+    """
+    data_type = str(data_type).lower()
+    if data_type in ("object", "string", "category") or "char" in data_type or data_type == "text":
+        return "text"
+    if data_type.startswith(("int", "uint", "smallint", "bigint")) or data_type == "integer":
+        return "int"
+    if data_type.startswith(("float", "double", "numeric", "decimal", "real")):
+        return "decimal"
+    if data_type.startswith(("datetime", "timestamp", "date")):
+        return "timestamp"
+    if data_type in ("bool", "boolean"):
+        return "boolean"
+    return data_type
+
+
+def format_schema(source_name, schema):
+    """
+    Schema section of the prompt: the source name and its columns with their types
+    """
+    columns = ", ".join(f"{column} ({readable_type(data_type)})" for column, data_type in schema.items())
+    return f"Selected data source: {source_name}\nColumns: {columns}"
+
+
+def build_system_prompt(source_name, schema, multi_check=False):
+    prefix = MULTI_CHECK_PROMPT_PREFIX if multi_check else SYSTEM_PROMPT_PREFIX
+    return prefix + format_schema(source_name, schema)
+
+
+def schema_context(datasource, multi_check=False):
+    """
+    Schema and system prompt of a data source, cached per dataset version
+    Params:
+        datasource : PandasFilesystemDatasource or PostgreSQLDatasource
+        multi_check (bool) : Return the prompt translating several checks into a JSON array
+    Returns:
+        (dict, str) : {column: data type} and the system prompt
+    """
+    key = (datasource.source_name, datasource.dataset_version())
+    with _lock:
+        context = _schema_contexts.get(key)
+        if context is not None:
+            _schema_contexts.move_to_end(key)
+    if context is None:
+        schema = datasource.get_schema()
+        context = (schema, build_system_prompt(datasource.source_name, schema),
+                   build_system_prompt(datasource.source_name, schema, multi_check=True))
+        with _lock:
+            _schema_contexts[key] = context
+            while len(_schema_contexts) > SCHEMA_CONTEXT_CACHE_SIZE:
+                _schema_contexts.popitem(last=False)
+    schema, prompt, multi_check_prompt = context
+    return schema, multi_check_prompt if multi_check else prompt
+
+
+def format_example(user_input, expectation_type, kwargs):
+    return (f"Example user input: '{user_input}'\n"
+            f"Example JSON output: {json.dumps({'expectation_type': expectation_type, 'kwargs': kwargs})}")
+
+
+def retrieve_examples(user_text, multi_check=False, k=FEWSHOT_K, exclude_prompts=()):
+    """
+    Examples of the fine-tuning dataset closest to the request.
+    In multi-check mode the best example of each check comes first, then the runners-up.
+    """
+    index = get_fewshot_index()
+    queries = [line for line in user_text.splitlines() if line.strip()] if multi_check else [user_text]
+    rankings = [index.search(query, k, allowed_types=PROMPT_EXPECTATION_TYPES, exclude_prompts=exclude_prompts)
+                for query in queries]
+    examples = []
+    for rank in range(k):
+        for ranking in rankings:
+            if rank < len(ranking) and ranking[rank]["prompt"] not in [e["prompt"] for e in examples]:
+                examples.append(ranking[rank])
+    return examples[:k]
+
+
+def examples_section(user_text, multi_check=False, k=FEWSHOT_K, exclude_prompts=()):
+    """
+    Few-shot section of the prompt, the static examples when retrieval is unavailable
+    """
+    try:
+        examples = retrieve_examples(user_text, multi_check, k, exclude_prompts)
+    except Exception as e:
+        print(f"Few-shot retrieval unavailable: {str(e)}")
+        examples = []
+    if examples:
+        section = "\n\n".join(format_example(example["prompt"], example["expectation_type"], example["kwargs"])
+                              for example in examples)
+    else:
+        section = STATIC_EXAMPLES
+    if multi_check:
+        section += "\n\n" + MULTI_CHECK_EXAMPLE
+    return section
+
+
+def with_examples(system_prompt, user_text, multi_check=False, exclude_prompts=()):
+    """
+    Complete a schema-aware system prompt with the examples retrieved for the request
+    """
+    return system_prompt + "\n\n" + examples_section(user_text, multi_check, exclude_prompts=exclude_prompts)
@@ -0,0 +1,239 @@
+"""
+Rule-based fast path translating common check phrasings without the LLM.
+
+Most requests follow the phrasings shown as examples in the system prompt ("Column X
+should be between A and B", "must be one of [..]", "should not be null", "should be
+unique", "should match email format"). They are recognized here against the real
+column names of the selected table. Every word of the check must be accounted for:
+anything not parsed with confidence returns None and falls through to Ollama.
+"""
+import re
+
+EMAIL_REGEX = "^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\\.[a-zA-Z]{2,}$"
+
+NUMBER = r"(-?\d+(?:\.\d+)?)"
+# Aggregate expectations introduced by "the mean of column X ..."
+AGGREGATES = {
+    "mean": "expect_column_mean_to_be_between",
+    "average": "expect_column_mean_to_be_between",
+    "avg": "expect_column_mean_to_be_between",
+    "min": "expect_column_min_to_be_between",
+    "minimum": "expect_column_min_to_be_between",
+    "max": "expect_column_max_to_be_between",
+    "maximum": "expect_column_max_to_be_between",
+    "sum": "expect_column_sum_to_be_between",
+    "total": "expect_column_sum_to_be_between",
+}
+MODAL = r"(?:should|must|shall|has to|needs to|is expected to)(?: always)?"
+# Comparison phrasings of the range bounds -> whether the bound is strict
+LOWER_BOUNDS = {"greater than or equal to": False, "at least": False, "no less than": False, ">=": False,
+                "greater than": True, "more than": True, "above": True, "over": True, ">": True}
+UPPER_BOUNDS = {"less than or equal to": False, "at most": False, "no more than": False, "<=": False,
+                "less than": True, "fewer than": True, "below": True, "under": True, "<": True}
+# Words allowed around the column name in the subject, besides the aggregate names
+SUBJECT_WORDS = {"the", "column", "field", "values", "value", "all", "every", "each", "of", "in", "for"}
+# Proportion of rows for which a row-level check must hold: "at least 95% of the time"
+MOSTLY = r"(?:at least |in at least |in )?(\d+(?:\.\d+)?) ?% of (?:the )?(?:time|rows|values|cases)"
+# Item of a value set: quoted (may contain commas) or bare
+SET_ITEM = r"""\s*(?:'[^']*'|"[^"]*"|[^,'"]+)\s*"""
+
+
+def _alternation(phrasings):
+    # Longest first, so that "greater than or equal to" wins over "greater than"
+    return "|".join(re.escape(phrasing) for phrasing in sorted(phrasings, key=len, reverse=True))
+
+
+def _number(text):
+    value = float(text)
+    return int(value) if value.is_integer() and "." not in text else value
+
+
+def _value(item):
+    """
+    Value of a set item: quoted items are strings, bare numbers are numbers
+    """
+    item = item.strip()
+    if len(item) >= 2 and item[0] == item[-1] and item[0] in "'\"":
+        return item[1:-1]
+    if re.fullmatch(NUMBER, item):
+        return _number(item)
+    return item
+
+
+def _value_set(text):
+    """
+    Items of a comma separated set, None unless the whole text is such a list
+    """
+    if not re.fullmatch(rf"{SET_ITEM}(?:,{SET_ITEM})*,?\s*", text):
+        return None
+    items = [item for item in re.findall(r"""'[^']*'|"[^"]*"|[^,'"]+""", text) if item.strip()]
+    return [_value(item) for item in items] or None
+
+
+def _normalize(name):
+    return re.sub(r"[\s_\-]+", " ", str(name)).strip().lower()
+
+
+def find_column(text, columns):
+    """
+    The single column named in the text, None when there are none or several.
+    Names match case-insensitively, with spaces, underscores and hyphens interchangeable.
+    """
+    remaining = " " + _normalize(text) + " "
+    matches = []
+    # Longest names first, so that "price" is not found again inside "unit price"
+    for column in sorted(columns, key=lambda column: len(_normalize(column)), reverse=True):
+        name = _normalize(column)
+        pattern = rf"(?<![a-z0-9]){re.escape(name)}(?![a-z0-9])"
+        if name and re.search(pattern, remaining):
+            matches.append(column)
+            remaining = re.sub(pattern, "#", remaining)
+    if len(matches) != 1:
+        return None
+    return matches[0]
+
+
+def _between(text):
+    """
+    Range kwargs (min_value, max_value and the strict flags) of a phrasing covering the
+    whole text, None otherwise
+    """
+    match = re.fullmatch(rf"between {NUMBER} and {NUMBER}", text)
+    if match:
+        return {"min_value": _number(match.group(1)), "max_value": _number(match.group(2))}
+    lower, upper = _alternation(LOWER_BOUNDS), _alternation(UPPER_BOUNDS)
+    bounds = {"min_value": None, "max_value": None}
+    for first, second in ((lower, upper), (upper, lower)):
+        match = re.fullmatch(rf"({first}) {NUMBER}(?: and ({second}) {NUMBER})?", text)
+        if match is None:
+            continue
+        for operator, number in ((match.group(1), match.group(2)), (match.group(3), match.group(4))):
+            if operator is None:
+                continue
+            if operator in LOWER_BOUNDS:
+                bounds["min_value"] = _number(number)
+                if LOWER_BOUNDS[operator]:
+                    bounds["strict_min"] = True
+            else:
+                bounds["max_value"] = _number(number)
+                if UPPER_BOUNDS[operator]:
+                    bounds["strict_max"] = True
+        return bounds
+    return None
+
+
+def _split_mostly(subject, predicate):
+    """
+    Extract the proportion of a row-level check, phrased before the subject ("at least
+    95% of the values in X ...") or after the predicate ("..., 95% of the time")
+    Returns:
+        (subject, predicate, mostly) : mostly is None without proportion
+    """
+    mostly = None
+    match = re.fullmatch(rf"(.*?),? {MOSTLY}", predicate)
+    if match:
+        predicate, mostly = match.group(1), float(match.group(2)) / 100
+    match = re.match(rf"{MOSTLY}(?: in| of)?\b", subject.lower())
+    if match:
+        if mostly is not None:
+            return subject, predicate, None
+        subject, mostly = subject[match.end():].strip(), float(match.group(1)) / 100
+    return subject, predicate, mostly
+
+
+def parse_check(text, columns):
+    """
+    Translate a check description into an expectation dict
+    Params:
+        text (str) : Natural language description of one check
+        columns (iterable) : Column names of the selected table
+    Returns:
+        dict or None : {"expectation_type", "kwargs"}, None when no rule applies
+    """
+    sentence = re.sub(r"\s+", " ", text).strip().rstrip(".").strip()
+    lowered = sentence.lower()
+
+    # Row count of the table: "The table should have between 10 and 100 rows"
+    if re.search(r"\brows?\b", re.sub(MOSTLY, "", lowered)) and not re.search(r"\bcolumn\b", lowered):
+        match = re.fullmatch(rf"(?:the )?(?:table|dataset|data) {MODAL} (?:have|contain) (.+?) rows?", lowered)
+        bounds = _between(match.group(1)) if match else None
+        if bounds is None:
+            return None
+        return {"expectation_type": "expect_table_row_count_to_be_between", "kwargs": bounds}
+
+    # Split "<subject> should <predicate>"
+    match = re.search(rf"\b{MODAL}(?: not)? (?:be|match|have)\b", lowered)
+    if match is None:
+        return None
+    subject = sentence[:match.start()].strip()
+    predicate = lowered[match.start():].strip()
+    subject, predicate, mostly = _split_mostly(subject, predicate)
+    column = find_column(subject, columns)
+    if column is None:
+        return None
+    # Words of the subject besides the column name, e.g. the aggregate of "Mean of price".
+    # A column named "Total" is not a sum, and unknown words leave the check to Ollama.
+    name = re.escape(_normalize(column))
+    other_words = re.sub(rf"(?<![a-z0-9]){name}(?![a-z0-9])", " ", _normalize(subject)).split()
+    if any(word not in SUBJECT_WORDS and word not in AGGREGATES for word in other_words):
+        return None
+    aggregates = {AGGREGATES[word] for word in other_words if word in AGGREGATES}
+    if len(aggregates) > 1:
+        return None
+    aggregate = next(iter(aggregates), None)
+    if aggregate is not None and mostly is not None:
+        return None
+    kwargs = {"column": column} if mostly is None else {"column": column, "mostly": mostly}
+
+    # Drop the modal verb, keeping the negation
+    predicate = re.sub(rf"^{MODAL} ", "", predicate)
+    negated = predicate.startswith("not ")
+    if negated:
+        predicate = predicate[4:]
+
+    if aggregate is not None:
+        bounds = _between(re.sub(r"^be ", "", predicate))
+        if bounds is None or negated:
+            return None
+        return {"expectation_type": aggregate, "kwargs": {**kwargs, **bounds}}
+
+    if re.fullmatch(r"be (?:null|empty|missing|blank)", predicate):
+        expectation_type = "expect_column_values_to_not_be_null" if negated else "expect_column_values_to_be_null"
+        return {"expectation_type": expectation_type, "kwargs": kwargs}
+
+    if re.fullmatch(r"be (?:unique|distinct)", predicate) and not negated:
+        return {"expectation_type": "expect_column_values_to_be_unique", "kwargs": kwargs}
+
+    if re.fullmatch(r"(?:match|be in|be a valid|be valid|have (?:a )?valid) (?:an? )?(?:valid )?email(?: address)?(?: format)?",
+                    predicate) and not negated:
+        return {"expectation_type": "expect_column_values_to_match_regex",
+                "kwargs": {**kwargs, "regex": EMAIL_REGEX}}
+
+    # Value sets keep the case of the original text
+    match = re.fullmatch(r"be (?:one of|in|within|in the set|among) ?[\[\(\{](.*)[\]\)\}]", predicate)
+    if match:
+        offset = lowered.rindex(predicate)
+        value_set = _value_set(sentence[offset + match.start(1):offset + match.end(1)])
+        if value_set is None:
+            return None
+        expectation_type = ("expect_column_values_to_not_be_in_set" if negated
+                            else "expect_column_values_to_be_in_set")
+        return {"expectation_type": expectation_type, "kwargs": {**kwargs, "value_set": value_set}}
+
+    if not negated and predicate.startswith("be "):
+        bounds = _between(predicate[3:])
+        if bounds is not None:
+            return {"expectation_type": "expect_column_values_to_be_between", "kwargs": {**kwargs, **bounds}}
+    return None
+
+
+def split_checks(text):
+    """
+    Split a pasted list of rules into one check per line, dropping bullets and numbering
+    """
+    checks = []
+    for line in text.splitlines():
+        line = re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line).strip()
+        if line:
+            checks.append(line)
+    return checks
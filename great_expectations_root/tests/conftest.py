@@ -0,0 +1,55 @@
+import importlib.util
+import os
+import sys
+import types
+
+import pytest
+
+# The app imports its modules relative to great_expectations_root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Modules importing Great Expectations at import time, reloaded for each test using ge_stubs
+GE_HELPERS = ["helpers.ge_context", "helpers.docs_builder", "helpers.single_pass"]
+
+
+def stub_class(name, *positional):
+    """
+    Stand-in for a GE value class: keeps its arguments as attributes, equal by value
+    """
+    def __init__(self, *args, **kwargs):
+        types.SimpleNamespace.__init__(self, **dict(zip(positional, args)), **kwargs)
+    return type(name, (types.SimpleNamespace,), {"__init__": __init__, "__hash__": lambda self: hash(repr(self))})
+
+
+def stub_modules():
+    resource_identifiers = types.SimpleNamespace(
+        ExpectationSuiteIdentifier=stub_class("ExpectationSuiteIdentifier", "expectation_suite_name"),
+        ValidationResultIdentifier=stub_class("ValidationResultIdentifier", "expectation_suite_identifier",
+                                              "run_id", "batch_identifier"),
+    )
+    return {
+        "great_expectations": types.SimpleNamespace(get_context=None),
+        "great_expectations.core.expectation_suite": types.SimpleNamespace(
+            ExpectationSuite=stub_class("ExpectationSuite")),
+        "great_expectations.core.expectation_validation_result": types.SimpleNamespace(
+            ExpectationSuiteValidationResult=stub_class("ExpectationSuiteValidationResult")),
+        "great_expectations.core.run_identifier": types.SimpleNamespace(RunIdentifier=stub_class("RunIdentifier")),
+        "great_expectations.data_context.types.resource_identifiers": resource_identifiers,
+        "ruamel": types.SimpleNamespace(yaml=types.SimpleNamespace(Loader=None, load=None)),
+    }
+
+
+@pytest.fixture
+def ge_stubs(monkeypatch):
+    """
+    Stub the Great Expectations classes used by the helpers when GE is not installed,
+    so that the GE-free logic of GE_HELPERS can be tested
+    """
+    if importlib.util.find_spec("great_expectations") is None:
+        for name, module in stub_modules().items():
+            monkeypatch.setitem(sys.modules, name, module)
+    for name in GE_HELPERS:
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    yield
+    for name in GE_HELPERS:
+        sys.modules.pop(name, None)
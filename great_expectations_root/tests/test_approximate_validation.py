@@ -0,0 +1,43 @@
+"""
+Coverage of the sketch bounds: the true value must fall inside the reported bounds
+at every cardinality, including the small-range to large-range transition.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from connecting_data.filesystem.approximate_validation import HyperLogLog, KLLSketch, hash_values, interval_outcome
+
+TRIALS = 10
+
+
+@pytest.mark.parametrize("cardinality", [100, 5_000, 20_000, 40_000, 60_000, 82_000, 250_000])
+def test_hyperloglog_bounds_cover_the_distinct_count(cardinality):
+    for trial in range(TRIALS):
+        offset = trial * 10_000_000
+        values = pd.Series(np.arange(offset, offset + cardinality)).repeat(2)
+        sketch = HyperLogLog().update(hash_values(values))
+        low, high = sketch.bounds()
+        assert low <= cardinality <= high, (trial, sketch.estimate())
+
+
+def test_hyperloglog_merge_matches_single_pass():
+    values = pd.Series(np.arange(100_000))
+    merged = HyperLogLog().update(hash_values(values[:40_000])).merge(HyperLogLog().update(hash_values(values[40_000:])))
+    assert merged.estimate() == HyperLogLog().update(hash_values(values)).estimate()
+
+
+def test_kll_bounds_cover_the_quantiles():
+    values = np.random.default_rng(0).normal(size=500_000)
+    sketch = KLLSketch()
+    for chunk in np.array_split(values, 10):
+        sketch.update(chunk)
+    for quantile in (0.01, 0.25, 0.5, 0.75, 0.99):
+        low, high = sketch.bounds(quantile)
+        assert low <= np.quantile(values, quantile) <= high
+
+
+def test_interval_outcome_is_undecided_across_a_threshold():
+    assert interval_outcome(95, 105, {"min_value": 100}) is None
+    assert interval_outcome(101, 105, {"min_value": 100}) is True
+    assert interval_outcome(90, 99, {"min_value": 100}) is False
@@ -0,0 +1,106 @@
+"""
+BackendRouter driven by in-process FakeBackends: timeouts, fallback, failures, the
+per-backend concurrency cap and the caching of fallback answers.
+"""
+import json
+import threading
+from concurrent.futures import wait
+
+import pytest
+
+from models.backends import BackendError, BackendRouter, FakeBackend
+from models.llm_cache import LLMResponseCache
+from models.ollama_model import cached_chat_completion
+
+CHECK = "column a should not be null"
+EXPECTATION = {"expectation_type": "expect_column_values_to_not_be_null", "kwargs": {"column": "a"}}
+
+
+def fake(name, **kwargs):
+    backend = FakeBackend(responses={CHECK: json.dumps(EXPECTATION)}, **kwargs)
+    backend.name = name
+    return backend
+
+
+def test_first_backend_answers():
+    primary, secondary = fake("primary"), fake("secondary")
+    content, backend = BackendRouter([primary, secondary]).generate("system", CHECK)
+    assert json.loads(content) == EXPECTATION
+    assert backend == "primary"
+    assert secondary.calls == 0
+
+
+def test_timeout_falls_back():
+    slow = fake("slow", latency_seconds=5, timeout_seconds=0.1)
+    content, backend = BackendRouter([slow, fake("fast")]).generate("system", CHECK)
+    assert backend == "fast"
+    assert json.loads(content) == EXPECTATION
+    assert slow.stats()["outcomes"] == {"timeout": 1}
+
+
+def test_error_falls_back():
+    broken = fake("broken", fail=True)
+    _, backend = BackendRouter([broken, fake("healthy")]).generate("system", CHECK)
+    assert backend == "healthy"
+    assert broken.stats()["outcomes"] == {"error": 1}
+
+
+def test_invalid_response_falls_back():
+    invalid = FakeBackend(responses={CHECK: "not json"})
+    invalid.name = "invalid"
+    _, backend = BackendRouter([invalid, fake("valid")]).generate(
+        "system", CHECK, is_valid=lambda content: content.startswith("{"))
+    assert backend == "valid"
+
+
+def test_all_backends_fail():
+    router = BackendRouter([fake("broken", fail=True), fake("slow", latency_seconds=5, timeout_seconds=0.1)])
+    with pytest.raises(BackendError) as error:
+        router.generate("system", CHECK)
+    assert "broken: fake backend failure" in str(error.value)
+    assert "slow: timed out" in str(error.value)
+
+
+def test_concurrency_cap():
+    backend = fake("capped", latency_seconds=0.2, max_concurrency=2, timeout_seconds=10)
+    running = {"now": 0, "max": 0}
+    lock = threading.Lock()
+    generate = backend.generate
+
+    def counting_generate(*args, **kwargs):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        try:
+            return generate(*args, **kwargs)
+        finally:
+            with lock:
+                running["now"] -= 1
+
+    backend.generate = counting_generate
+    # The idle fallback widens the thread pool, so only the semaphore caps the backend
+    router = BackendRouter([backend, fake("idle", max_concurrency=8)])
+    futures = [router.submit("system", CHECK) for _ in range(6)]
+    wait(futures, timeout=10)
+    assert all(future.result()[1] == "capped" for future in futures)
+    assert running["max"] == 2
+    assert backend.stats()["requests"] == 6
+
+
+def test_fallback_answers_are_not_cached_as_the_primary(tmp_path):
+    primary, secondary = fake("primary", fail=True), fake("secondary")
+    router = BackendRouter([primary, secondary])
+    cache = LLMResponseCache(path=str(tmp_path / "cache.sqlite3"))
+
+    def generate(system_prompt, user_text, openers, response_format):
+        content, backend = router.generate(system_prompt, user_text, openers, response_format=response_format)
+        return content, router.model_of(backend)
+    for _ in range(2):
+        content, cache_hit = cached_chat_completion("system", CHECK, {}, model=router.model, cache=cache,
+                                                    generate=generate)
+        assert json.loads(content) == EXPECTATION and not cache_hit
+    assert secondary.calls == 2
+
+    primary.fail = False
+    cached_chat_completion("system", CHECK, {}, model=router.model, cache=cache, generate=generate)
+    assert cached_chat_completion("system", CHECK, {}, model=router.model, cache=cache, generate=generate)[1]
@@ -0,0 +1,90 @@
+"""
+Expectations answered from column profiles, and profile invalidation on new versions.
+"""
+import pandas as pd
+import pytest
+
+from connecting_data.filesystem.columnar_cache import file_fingerprint, fingerprint_key
+from helpers.column_profiles import ColumnProfileStore, DatasetProfile, answer_from_profile
+
+DATA = pd.DataFrame({"id": [1, 2, 3, 4], "price": [1.5, None, 3.0, 4.5], "status": ["a", "b", "a", None]})
+
+
+def expectation(expectation_type, **kwargs):
+    return {"expectation_type": expectation_type, "kwargs": kwargs}
+
+
+@pytest.fixture
+def profile():
+    return DatasetProfile.from_dataframe("v1", DATA)
+
+
+@pytest.mark.parametrize("check, success, observed", [
+    (expectation("expect_table_row_count_to_be_between", min_value=1, max_value=4), True, 4),
+    (expectation("expect_column_min_to_be_between", column="price", min_value=1), True, 1.5),
+    (expectation("expect_column_max_to_be_between", column="price", max_value=4), False, 4.5),
+    (expectation("expect_column_sum_to_be_between", column="price", min_value=9, max_value=9), True, 9.0),
+    (expectation("expect_column_mean_to_be_between", column="price", min_value=3, max_value=3), True, 3.0),
+    (expectation("expect_column_unique_value_count_to_be_between", column="status", max_value=2), True, 2),
+])
+def test_aggregates_are_answered(profile, check, success, observed):
+    result = answer_from_profile([check], lambda: profile)[0]
+    assert result["success"] is success
+    assert result["result"]["observed_value"] == pytest.approx(observed)
+    assert result["meta"]["column_profile"]["dataset_version"] == "v1"
+
+
+def test_row_level_answers(profile):
+    answers = answer_from_profile([
+        expectation("expect_column_values_to_not_be_null", column="price"),
+        expectation("expect_column_values_to_be_unique", column="id"),
+        expectation("expect_column_values_to_be_between", column="price", min_value=0, max_value=10),
+    ], lambda: profile)
+    assert answers[0]["success"] is False and answers[0]["result"]["unexpected_count"] == 1
+    assert answers[1]["success"] and answers[2]["success"]
+
+
+@pytest.mark.parametrize("check", [
+    # Only a success can be told from the statistics
+    expectation("expect_column_values_to_be_unique", column="status"),
+    expectation("expect_column_values_to_be_between", column="price", min_value=2),
+    # Types, columns and kwargs the profile does not decide
+    expectation("expect_column_values_to_be_in_set", column="status", value_set=["a"]),
+    expectation("expect_column_sum_to_be_between", column="status", min_value=0),
+    expectation("expect_column_min_to_be_between", column="missing", min_value=0),
+    expectation("expect_column_max_to_be_between", column="price", max_value=9, row_condition='id>1'),
+    expectation("expect_column_min_to_be_between", column="price", min_value="x"),
+])
+def test_undecided_expectations_are_left_to_the_engine(profile, check):
+    assert answer_from_profile([check], lambda: profile) == {}
+
+
+def test_profile_is_not_computed_without_candidate():
+    def compute():
+        raise AssertionError("profile computed")
+    assert answer_from_profile([expectation("expect_column_values_to_match_regex", column="a", regex="x")],
+                               compute) == {}
+
+
+def test_changed_file_fingerprint_invalidates_the_profile(tmp_path):
+    path = tmp_path / "data.csv"
+    DATA.to_csv(path, index=False)
+    store = ColumnProfileStore(profile_dir=str(tmp_path / "profiles"))
+    computed = []
+
+    def profile_of_file():
+        version = fingerprint_key(file_fingerprint(str(path)))
+        return store.get_or_compute(str(path), version, lambda: computed.append(version) or
+                                    DatasetProfile.from_dataframe(version, pd.read_csv(path)))
+
+    assert profile_of_file().row_count == 4
+    assert profile_of_file().row_count == 4
+    assert len(computed) == 1
+
+    pd.concat([DATA, DATA]).to_csv(path, index=False)
+    assert profile_of_file().row_count == 8
+    assert len(computed) == 2 and computed[0] != computed[1]
+    # A new store (another process) reads the persisted profile of the current version
+    reloaded = ColumnProfileStore(profile_dir=str(tmp_path / "profiles"))
+    assert reloaded.get(str(path), computed[1]).row_count == 8
+    assert reloaded.get(str(path), computed[0]) is None
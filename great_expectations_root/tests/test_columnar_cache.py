@@ -0,0 +1,48 @@
+"""
+The Parquet copy of a csv file must read like pd.read_csv, whatever the block holding
+the first value of each type.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from connecting_data.filesystem import columnar_cache
+from connecting_data.filesystem.columnar_cache import ColumnarCache
+
+pytest.importorskip("pyarrow")
+
+
+def test_copy_reads_like_read_csv(tmp_path):
+    rows = 310_000
+    frame = pd.DataFrame({"ints": np.arange(rows).astype(object), "text": ["a"] * rows, "time": ["13:08"] * rows,
+                          "date": ["2020-01-01"] * rows, "flag": ["True"] * rows, "floats": np.arange(rows) * 0.5})
+    frame.loc[5, "text"] = ""
+    frame.loc[6, "floats"] = np.nan
+    frame.loc[7, "flag"] = "False"
+    # Type change long after the first csv block
+    frame.loc[300_002, "ints"] = "x"
+    file_path = tmp_path / "data.csv"
+    frame.to_csv(file_path, index=False)
+
+    cache = ColumnarCache(str(tmp_path / ".columnar_cache"))
+    copy = pd.read_parquet(cache.get(str(file_path)))
+    expected = pd.read_csv(file_path, low_memory=False)
+    assert copy.dtypes.to_dict() == expected.dtypes.to_dict()
+    pd.testing.assert_frame_equal(copy, expected)
+
+
+def test_failed_conversion_is_not_retried(tmp_path, monkeypatch):
+    file_path = tmp_path / "data.csv"
+    file_path.write_text("a,b\n1,2\n")
+    cache = ColumnarCache(str(tmp_path / ".columnar_cache"))
+    calls = []
+
+    def failing_infer(path):
+        calls.append(path)
+        raise ValueError("conversion error")
+
+    monkeypatch.setattr(columnar_cache, "infer_column_types", failing_infer)
+    assert cache.get(str(file_path)) is None
+    assert cache.get(str(file_path)) is None
+    assert len(calls) == 1
+    assert not [name for name in (tmp_path / ".columnar_cache").iterdir() if name.suffix == ".tmp"]
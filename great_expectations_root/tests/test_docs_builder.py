@@ -0,0 +1,46 @@
+"""
+Data docs builds: requests within the debounce delay are rendered in one build.
+"""
+import threading
+import time
+
+import pytest
+
+
+class FakeContext():
+    def __init__(self):
+        self.builds = []
+        self.built = threading.Event()
+
+    def build_data_docs(self, resource_identifiers=None, build_index=False):
+        self.builds.append((list(resource_identifiers), build_index))
+        self.built.set()
+
+
+@pytest.fixture
+def builder(ge_stubs):
+    from helpers.docs_builder import DataDocsBuilder
+    return DataDocsBuilder(debounce_seconds=0.3)
+
+
+def test_requests_within_the_debounce_delay_are_built_once(builder):
+    context = FakeContext()
+    builder.request_build(context, ["result-1", "suite"])
+    builder.request_build(context, ["result-2", "suite"])
+    builder.request_build(context, ["result-1", "result-3"])
+    assert builder.status()["pending_pages"] == 4
+    assert context.built.wait(5)
+    # No build left after the first one
+    time.sleep(0.5)
+    assert context.builds == [(["result-1", "suite", "result-2", "result-3"], True)]
+    assert builder.status()["builds"] == 1 and not builder.status()["building"]
+
+
+def test_request_after_a_build_starts_a_new_one(builder):
+    context = FakeContext()
+    builder.request_build(context, ["result-1"])
+    assert context.built.wait(5)
+    context.built.clear()
+    builder.request_build(context, ["result-2"])
+    assert context.built.wait(5)
+    assert [identifiers for identifiers, _ in context.builds] == [["result-1"], ["result-2"]]
@@ -0,0 +1,20 @@
+"""
+Result dicts built outside GE, checked against the GE semantics of their kwargs.
+"""
+import pytest
+
+from helpers.expectation_results import build_map_result
+
+NOT_IN_SET = "expect_column_values_to_be_in_set"
+
+
+@pytest.mark.parametrize("kwargs, success", [
+    ({}, False),
+    ({"mostly": None}, False),
+    ({"mostly": 0}, True),
+    ({"mostly": 0.5}, True),
+    ({"mostly": 0.9}, False),
+])
+def test_mostly_threshold(kwargs, success):
+    result = build_map_result(NOT_IN_SET, {"column": "a", **kwargs}, 10, 0, 4, [], count_missing=False)
+    assert result["success"] is success
@@ -0,0 +1,30 @@
+"""
+Pairing of multi-check requests with the elements of the LLM response.
+"""
+from models.ollama_model import match_expectations
+
+COLUMNS = ["price", "email", "status"]
+CHECKS = ["price should be positive", "email should be unique", "The table should have rows"]
+
+
+def expectation(expectation_type, **kwargs):
+    return {"expectation_type": expectation_type, "kwargs": kwargs}
+
+
+def test_one_element_per_check_is_matched_in_order():
+    elements = [expectation("a", column="x"), expectation("b"), expectation("c")]
+    assert match_expectations(CHECKS, elements, COLUMNS) == elements
+
+
+def test_missing_element_leaves_its_check_unmatched():
+    unique = expectation("expect_column_values_to_be_unique", column="email")
+    row_count = expectation("expect_table_row_count_to_be_between", min_value=1)
+    assert match_expectations(CHECKS, [unique, row_count], COLUMNS) == [None, unique, row_count]
+
+
+def test_extra_elements_are_matched_by_column():
+    elements = [expectation("expect_column_values_to_not_be_null", column="status"),
+                expectation("expect_column_values_to_be_unique", column="email"),
+                expectation("expect_column_min_to_be_between", column="price", min_value=0),
+                expectation("expect_column_max_to_be_between", column="price", max_value=9)]
+    assert match_expectations(CHECKS, elements, COLUMNS) == [elements[2], elements[1], None]
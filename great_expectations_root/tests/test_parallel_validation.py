@@ -0,0 +1,79 @@
+"""
+Parallel engine on the process pool against the native engine: same results with NaNs and mostly.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from connecting_data.filesystem import parallel_validation
+from connecting_data.filesystem.native_validation import run_native_expectations
+from connecting_data.filesystem.parallel_validation import run_parallel_expectations
+
+ROWS = 3000
+
+
+def expectation(expectation_type, **kwargs):
+    return {"expectation_type": expectation_type, "kwargs": kwargs}
+
+
+EXPECTATIONS = [
+    expectation("expect_column_values_to_not_be_null", column="price", mostly=0.9),
+    expectation("expect_column_values_to_not_be_null", column="status", mostly=0.99),
+    expectation("expect_column_values_to_be_null", column="price", mostly=0.05),
+    expectation("expect_column_values_to_be_between", column="price", min_value=0, max_value=90, mostly=0.9),
+    expectation("expect_column_values_to_be_between", column="price", min_value=0, max_value=90, mostly=0.95),
+    expectation("expect_column_values_to_be_in_set", column="status", value_set=["a", "b"], mostly=0.6),
+    expectation("expect_column_values_to_not_be_in_set", column="status", value_set=["c"], mostly=0.5),
+    expectation("expect_column_values_to_match_regex", column="status", regex="^[ab]$", mostly=0.7),
+    expectation("expect_column_values_to_be_unique", column="id"),
+    expectation("expect_column_values_to_be_unique", column="status", mostly=0.5),
+    expectation("expect_table_row_count_to_be_between", min_value=ROWS, max_value=ROWS),
+    expectation("expect_column_mean_to_be_between", column="price", min_value=40, max_value=60),
+    expectation("expect_column_min_to_be_between", column="price", min_value=0),
+    expectation("expect_column_max_to_be_between", column="price", max_value=90),
+    expectation("expect_column_sum_to_be_between", column="price", min_value=0),
+    expectation("expect_column_proportion_of_unique_values_to_be_between", column="status", max_value=0.01),
+]
+
+RESULT_KEYS = ["element_count", "missing_count", "missing_percent", "unexpected_count", "unexpected_percent",
+               "unexpected_percent_nonmissing", "observed_value"]
+
+
+@pytest.fixture
+def dataframe():
+    rng = np.random.default_rng(7)
+    price = rng.uniform(0, 100, ROWS)
+    price[rng.random(ROWS) < 0.1] = np.nan
+    status = rng.choice(np.array(["a", "b", "c"], dtype=object), ROWS, p=[0.45, 0.35, 0.2])
+    status[rng.random(ROWS) < 0.05] = None
+    return pd.DataFrame({"id": np.arange(ROWS), "price": price, "status": status})
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    # Small partitions so the test frame is split across the two workers
+    monkeypatch.setattr(parallel_validation, "PARALLEL_MIN_ROWS", 0)
+    monkeypatch.setattr(parallel_validation, "MIN_PARTITION_ROWS", 500)
+    yield 2
+    parallel_validation.get_pool(2).shutdown()
+    parallel_validation._pool = None
+
+
+def test_parallel_matches_native(dataframe, pool):
+    assert len(parallel_validation.partition_bounds(ROWS, pool)) == 2
+    parallel = [result for result, _ in run_parallel_expectations(dataframe, EXPECTATIONS, workers=pool)]
+    native = [result for result, _ in run_native_expectations(dataframe, EXPECTATIONS)]
+    for check, parallel_result, native_result in zip(EXPECTATIONS, parallel, native):
+        assert not parallel_result["exception_info"]["raised_exception"], check
+        assert parallel_result["success"] == native_result["success"], check
+        for key in RESULT_KEYS:
+            if key in native_result["result"]:
+                assert parallel_result["result"][key] == pytest.approx(native_result["result"][key]), (check, key)
+
+
+def test_mostly_decides_on_both_engines(dataframe, pool):
+    # About 10% of price is NaN and 10% of the non-null values are above 90
+    checks = EXPECTATIONS[3:5]
+    parallel = [result["success"] for result, _ in run_parallel_expectations(dataframe, checks, workers=pool)]
+    native = [result["success"] for result, _ in run_native_expectations(dataframe, checks)]
+    assert parallel == native == [True, False]
@@ -0,0 +1,26 @@
+"""
+Decisions of progressive sampling on the state of a sample.
+"""
+import pandas as pd
+
+from connecting_data.filesystem.chunked_validation import build_state
+from connecting_data.filesystem.progressive_validation import sample_outcome
+
+
+def sampled_state(mostly):
+    kwargs = {"column": "a", "value_set": [1]}
+    if mostly is not None:
+        kwargs["mostly"] = mostly
+    state = build_state({"expectation_type": "expect_column_values_to_be_in_set", "kwargs": kwargs})
+    state.update(pd.DataFrame({"a": [1] * 500 + [2] * 500}))
+    return state
+
+
+def test_mostly_zero_tolerates_every_unexpected_row():
+    outcome, decision, _ = sample_outcome(sampled_state(0), total_rows=100_000)
+    assert (outcome, decision) == (True, "statistical")
+
+
+def test_missing_mostly_fails_on_the_first_unexpected_row():
+    outcome, decision, _ = sample_outcome(sampled_state(None), total_rows=100_000)
+    assert (outcome, decision) == (False, "definitive")
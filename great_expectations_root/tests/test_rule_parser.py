@@ -0,0 +1,62 @@
+"""
+Rule-based fast path: every word of a check is parsed, or it falls through to Ollama.
+"""
+import pytest
+
+from models.rule_parser import parse_check
+
+COLUMNS = ["Total", "price", "email", "status", "name"]
+
+
+def test_column_named_like_an_aggregate_is_a_value_check():
+    assert parse_check("Total should be between 0 and 10", COLUMNS) == {
+        "expectation_type": "expect_column_values_to_be_between",
+        "kwargs": {"column": "Total", "min_value": 0, "max_value": 10}}
+
+
+def test_aggregate_of_a_column():
+    assert parse_check("The mean of price should be between 1 and 2", COLUMNS) == {
+        "expectation_type": "expect_column_mean_to_be_between",
+        "kwargs": {"column": "price", "min_value": 1, "max_value": 2}}
+
+
+def test_two_sided_comparison_keeps_both_bounds():
+    assert parse_check("price should be greater than 0 and less than 100", COLUMNS) == {
+        "expectation_type": "expect_column_values_to_be_between",
+        "kwargs": {"column": "price", "min_value": 0, "max_value": 100, "strict_min": True, "strict_max": True}}
+
+
+def test_inclusive_bound():
+    assert parse_check("price should be at most 5", COLUMNS)["kwargs"] == {
+        "column": "price", "min_value": None, "max_value": 5}
+
+
+@pytest.mark.parametrize("text, mostly", [
+    ("price should be between 0 and 10 at least 95% of the time", 0.95),
+    ("email should not be null in 99% of the rows", 0.99),
+    ("At least 90% of the values in status should be in ['a', 'b']", 0.9),
+])
+def test_proportion_becomes_mostly(text, mostly):
+    assert parse_check(text, COLUMNS)["kwargs"]["mostly"] == mostly
+
+
+@pytest.mark.parametrize("text", [
+    "price should be between 0 and 10 for premium customers",
+    "price should be greater than 0 unless refunded",
+    "The rounded price should be unique",
+    "The mean of price should not be null",
+    "The mean of price should be between 1 and 2 95% of the time",
+])
+def test_unparsed_text_falls_through(text):
+    assert parse_check(text, COLUMNS) is None
+
+
+def test_quoted_set_items_keep_their_commas():
+    assert parse_check("name should be one of ['Smith, John', \"Doe, Jane\", Bob]", COLUMNS)["kwargs"] == {
+        "column": "name", "value_set": ["Smith, John", "Doe, Jane", "Bob"]}
+
+
+def test_row_count():
+    assert parse_check("The table should have more than 10 rows", COLUMNS) == {
+        "expectation_type": "expect_table_row_count_to_be_between",
+        "kwargs": {"min_value": 10, "max_value": None, "strict_min": True}}
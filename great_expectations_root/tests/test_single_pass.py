@@ -0,0 +1,84 @@
+"""
+Single-pass validation: results of unchanged expectations on an unchanged batch are reused.
+"""
+import types
+
+import pytest
+
+
+class Configuration(types.SimpleNamespace):
+    def __init__(self, expectation_type, **kwargs):
+        super().__init__(expectation_type=expectation_type, kwargs=kwargs)
+
+
+class FakeValidator():
+    """
+    Validator of a suite, recording the expectations each validate call evaluates
+    """
+    def __init__(self, configurations):
+        self.configurations = configurations
+        self.active_batch_id = "batch"
+        self.validated = []
+
+    def get_expectation_suite(self, discard_failed_expectations=False):
+        return types.SimpleNamespace(expectation_suite_name="suite", expectations=list(self.configurations))
+
+    def validate(self, expectation_suite, catch_exceptions=True):
+        self.validated.append([configuration.kwargs["column"] for configuration in expectation_suite.expectations])
+        # The validator injects the batch id in the configuration of its results
+        results = [types.SimpleNamespace(success=True, exception_info={"raised_exception": False},
+                                         expectation_config=Configuration(configuration.expectation_type,
+                                                                          batch_id="batch", **configuration.kwargs))
+                   for configuration in expectation_suite.expectations]
+        return types.SimpleNamespace(results=results, meta={})
+
+
+class FakeContext():
+    def __init__(self):
+        self.stored = []
+        self.validations_store = types.SimpleNamespace(set=lambda identifier, result: self.stored.append(result))
+
+    def store_evaluation_parameters(self, result):
+        pass
+
+
+@pytest.fixture
+def single_pass(ge_stubs, monkeypatch):
+    from helpers import single_pass
+    monkeypatch.setattr(single_pass, "DOCS_BUILDER", types.SimpleNamespace(request_build=lambda *args: None))
+    return single_pass
+
+
+def not_null(column):
+    return Configuration("expect_column_values_to_not_be_null", column=column)
+
+
+def test_unchanged_expectations_on_an_unchanged_batch_are_reused(single_pass):
+    cache = single_pass.ValidationResultCache()
+    context = FakeContext()
+    validator = FakeValidator([not_null("a"), not_null("b")])
+    single_pass.validate_and_persist(context, validator, "v1", "run", cache=cache)
+    validator.configurations.append(not_null("c"))
+    suite_result, _, results = single_pass.validate_and_persist(context, validator, "v1", "run", cache=cache)
+
+    assert validator.validated == [["a", "b"], ["c"]]
+    assert len(suite_result.results) == 3 and suite_result.statistics["evaluated_expectations"] == 3
+    assert set(results) == {single_pass.expectation_key(configuration) for configuration in validator.configurations}
+    assert len(context.stored) == 2
+
+
+def test_changed_expectation_is_revalidated(single_pass):
+    cache = single_pass.ValidationResultCache()
+    validator = FakeValidator([not_null("a"), not_null("b")])
+    single_pass.validate_and_persist(FakeContext(), validator, "v1", "run", cache=cache)
+    validator.configurations[1] = Configuration("expect_column_values_to_not_be_null", column="b", mostly=0.9)
+    single_pass.validate_and_persist(FakeContext(), validator, "v1", "run", cache=cache)
+    assert validator.validated == [["a", "b"], ["b"]]
+
+
+def test_changed_batch_fingerprint_revalidates(single_pass):
+    cache = single_pass.ValidationResultCache()
+    validator = FakeValidator([not_null("a"), not_null("b")])
+    single_pass.validate_and_persist(FakeContext(), validator, "v1", "run", cache=cache)
+    single_pass.validate_and_persist(FakeContext(), validator, "v2", "run", cache=cache)
+    assert validator.validated == [["a", "b"], ["a", "b"]]
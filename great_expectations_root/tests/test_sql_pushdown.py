@@ -0,0 +1,104 @@
+"""
+SQL pushdown against a fake connection: one bad expectation fails alone.
+"""
+import datetime
+import re
+from contextlib import contextmanager
+
+import pytest
+
+from connecting_data.database import sql_pushdown
+
+
+class FakeCursor():
+    """
+    Answers each "<expression> AS <alias>" of a query with `values[alias]`, or 0 for
+    the counts. Raises for queries referencing a column of `broken`.
+    """
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self.row = None
+
+    def execute(self, query, params):
+        self.connection.queries.append(query)
+        if self.connection.aborted:
+            raise RuntimeError("current transaction is aborted")
+        if any(f'"{column}"' in query for column in self.connection.broken):
+            self.connection.aborted = True
+            raise RuntimeError("operator does not exist: date >= text")
+        aliases = re.findall(r"AS (e\d+_\w+)", query)
+        aliases = [alias for alias in aliases if re.fullmatch(r"e\d+_(?:elements|missing|unexpected|observed|sample)",
+                                                              alias)]
+        self.description = [(alias,) for alias in aliases]
+        self.row = tuple(self.connection.values.get(alias, 0) for alias in aliases)
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+class FakeConnection():
+    def __init__(self, values=None, broken=()):
+        self.values = values or {}
+        self.broken = set(broken)
+        self.aborted = False
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.aborted = False
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    connection = FakeConnection()
+
+    @contextmanager
+    def pooled_connection():
+        yield connection
+
+    monkeypatch.setattr(sql_pushdown, "pooled_connection", pooled_connection)
+    return connection
+
+
+def expectation(expectation_type, **kwargs):
+    return {"expectation_type": expectation_type, "kwargs": kwargs}
+
+
+def test_type_error_of_one_result_fails_only_its_expectation(connection):
+    connection.values = {"e0_observed": datetime.date(2024, 1, 1), "e1_elements": 10}
+    results = sql_pushdown.run_pushdown("t", [
+        expectation("expect_column_min_to_be_between", column="day", min_value="2020-01-01"),
+        expectation("expect_column_values_to_not_be_null", column="id"),
+    ])
+    assert results[0]["exception_info"]["raised_exception"]
+    assert results[1]["success"] and not results[1]["exception_info"]["raised_exception"]
+
+
+def test_failed_fused_query_reruns_the_fragments(connection):
+    connection.broken = {"day"}
+    connection.values = {"e0_elements": 10, "e1_elements": 10, "e2_observed": 10}
+    results = sql_pushdown.run_pushdown("t", [
+        expectation("expect_column_values_to_not_be_null", column="id"),
+        expectation("expect_column_values_to_be_between", column="day", min_value="x"),
+        expectation("expect_table_row_count_to_be_between", min_value=1),
+    ])
+    assert [result["success"] for result in results] == [True, False, True]
+    assert results[1]["exception_info"]["raised_exception"]
+    assert "operator does not exist" in results[1]["exception_info"]["exception_message"]
+    assert len(connection.queries) == 4
+
+
+def test_unsupported_expectation_does_not_block_the_suite(connection):
+    connection.values = {"e1_elements": 10}
+    results = sql_pushdown.run_pushdown("t", [
+        expectation("expect_column_values_to_be_dateutil_parseable", column="day"),
+        expectation("expect_column_values_to_not_be_null", column="id"),
+    ])
+    assert results[0]["exception_info"]["raised_exception"]
+    assert results[1]["success"]
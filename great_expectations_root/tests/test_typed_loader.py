@@ -0,0 +1,42 @@
+"""
+Compact dtypes of the typed loader and the checks running on categorical codes.
+"""
+import pandas as pd
+
+from connecting_data.filesystem.chunked_validation import build_state, validate_chunks
+from connecting_data.filesystem.native_validation import run_native_expectation
+from connecting_data.filesystem.typed_loader import apply_schema
+
+IN_SET = {"expectation_type": "expect_column_values_to_be_in_set",
+          "kwargs": {"column": "status", "value_set": ["open", "closed"]}}
+
+
+def test_date_columns_keep_the_csv_strings():
+    read = pd.DataFrame({"day": ["2024-01-01", None, "2024-02-01"]})
+    data = apply_schema(read.copy(), {"columns": {"day": "datetime"}})
+    pd.testing.assert_series_equal(data["day"], read["day"])
+
+
+def test_only_integer_columns_are_downcast():
+    data = pd.DataFrame({"count": [1, 2, 3], "price": [0.5, None, 2.0], "code": [1.0, None, 3.0]})
+    data = apply_schema(data, {"columns": {"count": "integer", "price": "float", "code": "nullable_integer"}})
+    assert data["count"].dtype == "int8"
+    assert data["price"].dtype == "float64" and data["code"].dtype == "float64"
+
+
+def test_float_aggregates_match_the_default_load():
+    values = pd.Series(range(5_000_000), dtype="float64")
+    values.iloc[0] = None
+    data = apply_schema(pd.DataFrame({"value": values}), {"columns": {"value": "nullable_integer"}})
+    assert data["value"].sum() == values.sum() == 12499997500000.0
+
+
+def test_in_set_on_categorical_codes():
+    data = apply_schema(pd.DataFrame({"status": ["open", "closed", "lost", None] * 50}),
+                        {"columns": {"status": "category"}})
+    assert isinstance(data["status"].dtype, pd.CategoricalDtype)
+    native = run_native_expectation(data, IN_SET)
+    chunked = validate_chunks([data], [build_state(IN_SET)])[0]
+    for result in (native, chunked):
+        assert result["result"]["unexpected_count"] == 50
+        assert result["result"]["missing_count"] == 50